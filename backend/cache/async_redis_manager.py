@@ -0,0 +1,835 @@
+#!/usr/bin/env python3
+"""
+Async Redis Manager
+LoanFlow Personal Loan Management System
+
+This module provides asyncio access to Redis including:
+- redis.asyncio connection pooling
+- Caching and namespaced caching operations
+- Hash, list and set operations
+- Queue management for background tasks
+- Session storage
+- Pub/Sub messaging
+- Rate limiting
+
+Key prefixing, serialization and metrics are shared with RedisManager so
+sync and async callers see the same data and the same counters.
+"""
+
+import logging
+import asyncio
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+
+import redis.asyncio as aioredis
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache.redis_manager import RedisManager, LUA_SCRIPTS
+
+class AsyncRedisManager:
+    def __init__(self, redis_manager: Optional[RedisManager] = None):
+        self.logger = logging.getLogger(__name__)
+        self.redis_client = None
+        self.connection_pool = None
+        self.status = 'initializing'
+        self.scripts = {}
+        
+        # Sync manager supplies configuration, key building, serialization and metrics
+        self.redis_manager = redis_manager or RedisManager()
+        self.config = self.redis_manager.config
+        self.cache_config = self.redis_manager.cache_config
+        self.queue_config = self.redis_manager.queue_config
+        self.session_config = self.redis_manager.session_config
+        self.namespace_config = self.redis_manager.namespace_config
+        self.metrics = self.redis_manager.metrics
+        self.metrics_lock = self.redis_manager.metrics_lock
+        
+        # Async specific metrics
+        self.async_metrics = {
+            'operations_in_flight': 0,
+            'max_operations_in_flight': 0
+        }
+    
+    async def initialize(self):
+        """Initialize async Redis connection"""
+        try:
+            self.logger.info("Initializing Async Redis Manager...")
+            
+            if self.config['nodes']:
+                raise Exception("AsyncRedisManager does not support sharded REDIS_NODES")
+            
+            pool_kwargs = {
+                'host': self.config['host'],
+                'port': self.config['port'],
+                'db': self.config['db'],
+                'decode_responses': self.config['decode_responses'],
+                'socket_timeout': self.config['socket_timeout'],
+                'socket_connect_timeout': self.config['socket_connect_timeout'],
+                'retry_on_timeout': self.config['retry_on_timeout'],
+                'health_check_interval': self.config['health_check_interval'],
+                'max_connections': self.config['max_connections'],
+                'timeout': self.config['socket_timeout']  # Wait for a free connection instead of failing
+            }
+            
+            if self.config['password']:
+                pool_kwargs['password'] = self.config['password']
+            
+            # Thousands of tasks share max_connections sockets, excess callers queue
+            self.connection_pool = aioredis.BlockingConnectionPool(**pool_kwargs)
+            self.redis_client = aioredis.Redis(connection_pool=self.connection_pool)
+            
+            if not await self.redis_client.ping():
+                raise Exception("Redis ping failed")
+            
+            self.status = 'healthy'
+            self.logger.info("Async Redis Manager initialized successfully")
+            
+        except Exception as e:
+            self.logger.error(f"Async Redis Manager initialization failed: {str(e)}")
+            self.status = 'error'
+            raise
+    
+    async def shutdown(self):
+        """Shutdown async Redis connections"""
+        try:
+            self.logger.info("Shutting down Async Redis Manager...")
+            
+            if self.redis_client:
+                await self.redis_client.aclose()
+            
+            if self.connection_pool:
+                await self.connection_pool.disconnect()
+            
+            self.status = 'stopped'
+            self.logger.info("Async Redis Manager shutdown complete")
+            
+        except Exception as e:
+            self.logger.error(f"Async Redis shutdown error: {str(e)}")
+    
+    def get_status(self) -> str:
+        """Get async Redis manager status"""
+        return self.status
+    
+    def get_metrics(self) -> Dict:
+        """Get async Redis metrics (counters shared with RedisManager)"""
+        total_cache_ops = self.metrics['cache_hits'] + self.metrics['cache_misses']
+        hit_ratio = (self.metrics['cache_hits'] / total_cache_ops * 100) if total_cache_ops > 0 else 0
+        
+        return {
+            **self.metrics,
+            **self.async_metrics,
+            'cache_hit_ratio': round(hit_ratio, 2),
+            'status': self.status,
+            'last_updated': datetime.now().isoformat()
+        }
+    
+    # Caching Operations
+    async def get(self, key: str, default: Any = None) -> Any:
+        """Get value from cache"""
+        try:
+            with self._track_operation():
+                value = await self.redis_client.get(self._build_key(key))
+            
+            with self.metrics_lock:
+                self.metrics['operations_total'] += 1
+                if value is None:
+                    self.metrics['cache_misses'] += 1
+                    return default
+                self.metrics['cache_hits'] += 1
+            
+            return self._deserialize_value(value)
+            
+        except Exception as e:
+            self.logger.error(f"Cache get error for key '{key}': {str(e)}")
+            with self.metrics_lock:
+                self.metrics['cache_misses'] += 1
+            return default
+    
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several values in one round trip (missing keys are omitted)"""
+        try:
+            if not keys:
+                return {}
+            
+            with self._track_operation():
+                values = await self.redis_client.mget([self._build_key(key) for key in keys])
+            
+            result = {key: self._deserialize_value(value) for key, value in zip(keys, values) if value is not None}
+            
+            with self.metrics_lock:
+                self.metrics['cache_hits'] += len(result)
+                self.metrics['cache_misses'] += len(keys) - len(result)
+                self.metrics['operations_total'] += 1
+            
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"Cache get_many error: {str(e)}")
+            return {}
+    
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Set value in cache"""
+        try:
+            ttl = ttl or self.cache_config['default_ttl']
+            
+            with self._track_operation():
+                result = await self.redis_client.setex(self._build_key(key), ttl, self._serialize_value(value))
+            
+            with self.metrics_lock:
+                self.metrics['cache_sets'] += 1
+                self.metrics['operations_total'] += 1
+            
+            return bool(result)
+            
+        except Exception as e:
+            self.logger.error(f"Cache set error for key '{key}': {str(e)}")
+            return False
+    
+    async def delete(self, key: str) -> bool:
+        """Delete key from cache"""
+        try:
+            with self._track_operation():
+                result = await self.redis_client.delete(self._build_key(key))
+            
+            with self.metrics_lock:
+                self.metrics['cache_deletes'] += 1
+                self.metrics['operations_total'] += 1
+            
+            return bool(result)
+            
+        except Exception as e:
+            self.logger.error(f"Cache delete error for key '{key}': {str(e)}")
+            return False
+    
+    async def exists(self, key: str) -> bool:
+        """Check if key exists in cache"""
+        try:
+            return bool(await self.redis_client.exists(self._build_key(key)))
+            
+        except Exception as e:
+            self.logger.error(f"Cache exists error for key '{key}': {str(e)}")
+            return False
+    
+    async def expire(self, key: str, ttl: int) -> bool:
+        """Set expiration time for key"""
+        try:
+            return bool(await self.redis_client.expire(self._build_key(key), ttl))
+            
+        except Exception as e:
+            self.logger.error(f"Cache expire error for key '{key}': {str(e)}")
+            return False
+    
+    async def get_ttl(self, key: str) -> int:
+        """Get time to live for key"""
+        try:
+            return await self.redis_client.ttl(self._build_key(key))
+            
+        except Exception as e:
+            self.logger.error(f"Cache TTL error for key '{key}': {str(e)}")
+            return -1
+    
+    async def increment(self, key: str, amount: int = 1) -> int:
+        """Increment numeric value"""
+        try:
+            return await self.redis_client.incr(self._build_key(key), amount)
+            
+        except Exception as e:
+            self.logger.error(f"Cache increment error for key '{key}': {str(e)}")
+            return 0
+    
+    async def decrement(self, key: str, amount: int = 1) -> int:
+        """Decrement numeric value"""
+        try:
+            return await self.redis_client.decr(self._build_key(key), amount)
+            
+        except Exception as e:
+            self.logger.error(f"Cache decrement error for key '{key}': {str(e)}")
+            return 0
+    
+    # Namespaced Caching
+    async def cache_get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Get value from a namespace at its current generation (cache bypassed if it is unknown)"""
+        try:
+            ns_key = await self._build_namespace_key(namespace, key)
+            
+        except Exception as e:
+            self.logger.error(f"Namespace generation error for '{namespace}': {str(e)}")
+            return default
+        
+        return await self.get(ns_key, default)
+    
+    async def cache_set(self, namespace: str, key: str, value: Any, ttl: Optional[int] = None,
+                        tags: Optional[List[str]] = None) -> bool:
+        """Set value in a namespace, optionally registering it under tags"""
+        try:
+            full_key = self._build_key(await self._build_namespace_key(namespace, key))
+            ttl = ttl or self.cache_config['default_ttl']
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(full_key, ttl, self._serialize_value(value))
+            for tag in tags or []:
+                tag_key = self._build_key(f"tag:{tag}")
+                pipe.sadd(tag_key, full_key)
+                pipe.expire(tag_key, max(ttl, self.namespace_config['tag_ttl']))
+            
+            with self._track_operation():
+                results = await pipe.execute()
+            
+            with self.metrics_lock:
+                self.metrics['cache_sets'] += 1
+                self.metrics['operations_total'] += 1
+            
+            return bool(results[0])
+            
+        except Exception as e:
+            self.logger.error(f"Cache set error for key '{namespace}:{key}': {str(e)}")
+            return False
+    
+    async def cache_delete(self, namespace: str, key: str) -> bool:
+        """Delete value from a namespace"""
+        try:
+            ns_key = await self._build_namespace_key(namespace, key)
+            
+        except Exception as e:
+            self.logger.error(f"Namespace generation error for '{namespace}': {str(e)}")
+            return False
+        
+        return await self.delete(ns_key)
+    
+    async def invalidate_namespace(self, namespace: str) -> int:
+        """Invalidate a whole namespace in O(1) by bumping its generation"""
+        try:
+            generation = await self.redis_client.incr(self._build_key(f"ns_gen:{namespace}"))
+            self.redis_manager.namespace_generations[namespace] = (generation, time.time())
+            
+            with self.metrics_lock:
+                self.metrics['namespace_invalidations'] += 1
+                self.metrics['operations_total'] += 1
+            
+            return generation
+            
+        except Exception as e:
+            self.logger.error(f"Namespace invalidation error for '{namespace}': {str(e)}")
+            return 0
+    
+    async def invalidate_tag(self, tag: str) -> int:
+        """Invalidate all entries registered under a tag, returns keys unlinked"""
+        try:
+            tag_key = self._build_key(f"tag:{tag}")
+            batch_size = self.namespace_config['unlink_batch_size']
+            unlinked = 0
+            batch = []
+            
+            async for member in self.redis_client.sscan_iter(tag_key, count=batch_size):
+                batch.append(member)
+                if len(batch) >= batch_size:
+                    unlinked += await self.redis_client.unlink(*batch)
+                    batch = []
+            
+            if batch:
+                unlinked += await self.redis_client.unlink(*batch)
+            await self.redis_client.unlink(tag_key)
+            
+            with self.metrics_lock:
+                self.metrics['tag_invalidations'] += 1
+                self.metrics['cache_deletes'] += unlinked
+                self.metrics['operations_total'] += 1
+            
+            return unlinked
+            
+        except Exception as e:
+            self.logger.error(f"Tag invalidation error for '{tag}': {str(e)}")
+            return 0
+    
+    # Hash Operations
+    async def hget(self, name: str, key: str) -> Any:
+        """Get field from hash"""
+        try:
+            value = await self.redis_client.hget(self._build_key(name), key)
+            return self._deserialize_value(value) if value else None
+            
+        except Exception as e:
+            self.logger.error(f"Hash get error for '{name}.{key}': {str(e)}")
+            return None
+    
+    async def hset(self, name: str, key: str, value: Any) -> bool:
+        """Set field in hash"""
+        try:
+            return bool(await self.redis_client.hset(self._build_key(name), key, self._serialize_value(value)))
+            
+        except Exception as e:
+            self.logger.error(f"Hash set error for '{name}.{key}': {str(e)}")
+            return False
+    
+    async def hgetall(self, name: str) -> Dict:
+        """Get all fields from hash"""
+        try:
+            hash_data = await self.redis_client.hgetall(self._build_key(name))
+            return {key: self._deserialize_value(value) for key, value in hash_data.items()}
+            
+        except Exception as e:
+            self.logger.error(f"Hash getall error for '{name}': {str(e)}")
+            return {}
+    
+    async def hdel(self, name: str, *keys: str) -> int:
+        """Delete fields from hash"""
+        try:
+            return await self.redis_client.hdel(self._build_key(name), *keys)
+            
+        except Exception as e:
+            self.logger.error(f"Hash delete error for '{name}': {str(e)}")
+            return 0
+    
+    # List Operations (Queues)
+    async def lpush(self, name: str, *values: Any) -> int:
+        """Push values to left of list"""
+        try:
+            serialized_values = [self._serialize_value(v) for v in values]
+            
+            with self._track_operation():
+                result = await self.redis_client.lpush(self._build_key(name), *serialized_values)
+            
+            with self.metrics_lock:
+                self.metrics['queue_pushes'] += len(values)
+                self.metrics['operations_total'] += 1
+            
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"List push error for '{name}': {str(e)}")
+            return 0
+    
+    async def rpush(self, name: str, *values: Any) -> int:
+        """Push values to right of list"""
+        try:
+            serialized_values = [self._serialize_value(v) for v in values]
+            
+            with self._track_operation():
+                result = await self.redis_client.rpush(self._build_key(name), *serialized_values)
+            
+            with self.metrics_lock:
+                self.metrics['queue_pushes'] += len(values)
+                self.metrics['operations_total'] += 1
+            
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"List push error for '{name}': {str(e)}")
+            return 0
+    
+    async def rpop(self, name: str) -> Any:
+        """Pop value from right of list"""
+        try:
+            value = await self.redis_client.rpop(self._build_key(name))
+            
+            with self.metrics_lock:
+                self.metrics['queue_pops'] += 1
+                self.metrics['operations_total'] += 1
+            
+            return self._deserialize_value(value) if value else None
+            
+        except Exception as e:
+            self.logger.error(f"List pop error for '{name}': {str(e)}")
+            return None
+    
+    async def brpop(self, names: List[str], timeout: int = 0) -> Optional[tuple]:
+        """Blocking pop from right of lists (suspends only this task)"""
+        try:
+            full_names = [self._build_key(name) for name in names]
+            
+            with self._track_operation():
+                result = await self.redis_client.brpop(full_names, timeout)
+            
+            if result:
+                name, value = result
+                
+                with self.metrics_lock:
+                    self.metrics['queue_pops'] += 1
+                    self.metrics['operations_total'] += 1
+                
+                return (name.replace(self.cache_config['key_prefix'], ''), self._deserialize_value(value))
+            
+            return None
+            
+        except Exception as e:
+            self.logger.error(f"Blocking list pop error: {str(e)}")
+            return None
+    
+    async def llen(self, name: str) -> int:
+        """Get length of list"""
+        try:
+            return await self.redis_client.llen(self._build_key(name))
+            
+        except Exception as e:
+            self.logger.error(f"List length error for '{name}': {str(e)}")
+            return 0
+    
+    # Set Operations
+    async def sadd(self, name: str, *values: Any) -> int:
+        """Add values to set"""
+        try:
+            return await self.redis_client.sadd(self._build_key(name), *[self._serialize_value(v) for v in values])
+            
+        except Exception as e:
+            self.logger.error(f"Set add error for '{name}': {str(e)}")
+            return 0
+    
+    async def srem(self, name: str, *values: Any) -> int:
+        """Remove values from set"""
+        try:
+            return await self.redis_client.srem(self._build_key(name), *[self._serialize_value(v) for v in values])
+            
+        except Exception as e:
+            self.logger.error(f"Set remove error for '{name}': {str(e)}")
+            return 0
+    
+    async def smembers(self, name: str) -> set:
+        """Get all set members"""
+        try:
+            members = await self.redis_client.smembers(self._build_key(name))
+            return {self._deserialize_value(member) for member in members}
+            
+        except Exception as e:
+            self.logger.error(f"Set members error for '{name}': {str(e)}")
+            return set()
+    
+    async def sismember(self, name: str, value: Any) -> bool:
+        """Check set membership"""
+        try:
+            return bool(await self.redis_client.sismember(self._build_key(name), self._serialize_value(value)))
+            
+        except Exception as e:
+            self.logger.error(f"Set membership error for '{name}': {str(e)}")
+            return False
+    
+    # Pub/Sub Operations
+    async def publish(self, channel: str, message: Any) -> int:
+        """Publish message to channel"""
+        try:
+            return await self.redis_client.publish(self._build_key(channel), self._serialize_value(message))
+            
+        except Exception as e:
+            self.logger.error(f"Publish error for channel '{channel}': {str(e)}")
+            return 0
+    
+    async def subscribe(self, *channels: str):
+        """Subscribe to channels"""
+        try:
+            pubsub = self.redis_client.pubsub()
+            await pubsub.subscribe(*[self._build_key(channel) for channel in channels])
+            return pubsub
+            
+        except Exception as e:
+            self.logger.error(f"Subscribe error: {str(e)}")
+            return None
+    
+    # Queue Management
+    async def enqueue_job(self, queue_name: str, job_data: Dict, priority: str = 'normal') -> bool:
+        """Enqueue job for background processing"""
+        try:
+            job = {
+                'id': self.redis_manager._generate_job_id(),
+                'queue': queue_name,
+                'priority': priority,
+                'data': job_data,
+                'created_at': datetime.now().isoformat(),
+                'enqueued_at': time.time(),
+                'attempts': 0,
+                'max_retries': self.queue_config['max_retries']
+            }
+            
+            return bool(await self.lpush(self.redis_manager._build_queue_key(priority, queue_name), job))
+            
+        except Exception as e:
+            self.logger.error(f"Job enqueue error: {str(e)}")
+            return False
+    
+    async def dequeue_job(self, queue_names: List[str], timeout: int = 10) -> Optional[Dict]:
+        """Dequeue job from queues (weighted-fair or strict priority order)"""
+        try:
+            await self._migrate_legacy_queues(queue_names)
+            queue_keys = self.redis_manager._build_queue_keys(queue_names)
+            
+            # Serve ready jobs by weight so lower priorities cannot starve
+            if self.queue_config['dequeue_strategy'] == 'weighted':
+                job = await self._dequeue_weighted(queue_keys)
+                if job is not None:
+                    return job
+            
+            # Blocking pop from queues (priority order, oldest job first)
+            result = await self.brpop(queue_keys, timeout)
+            if not result:
+                return None
+            
+            job = result[1]
+            self.redis_manager._record_job_wait(job)
+            return job
+            
+        except Exception as e:
+            self.logger.error(f"Job dequeue error: {str(e)}")
+            return None
+    
+    async def claim_job(self, queue_names: List[str], processing_key: str, timeout: int = 10) -> Optional[tuple]:
+        """Dequeue job into a processing list in one atomic step, returning (job, stored value)"""
+        try:
+            await self._migrate_legacy_queues(queue_names)
+            queue_keys = self.redis_manager._build_queue_keys(queue_names)
+            deadline = time.time() + timeout
+            
+            while True:
+                # Same selection and claim script as RedisManager.claim_job
+                selected, promoted = None, False
+                if self.queue_config['dequeue_strategy'] == 'weighted':
+                    backlog = await self._get_queue_backlog(queue_keys)
+                    if backlog:
+                        selected, promoted = self.redis_manager._select_weighted_queue(queue_keys, backlog)
+                
+                if selected or self.queue_config['dequeue_strategy'] != 'weighted':
+                    for claim_keys in self.redis_manager._build_claim_keys(queue_keys, processing_key, selected):
+                        with self._track_operation():
+                            result = await self._get_script('job_claim')(keys=claim_keys)
+                        if result:
+                            return self.redis_manager._finish_claim(result, selected, promoted)
+                
+                if time.time() >= deadline:
+                    return None
+                await asyncio.sleep(self.queue_config['claim_poll_interval'])
+            
+        except Exception as e:
+            self.logger.error(f"Job claim error: {str(e)}")
+            return None
+    
+    async def return_job(self, processing_key: str, job: Dict, value: str) -> bool:
+        """Move claimed job from a processing list back to the head of its queue"""
+        try:
+            queue_key = self.redis_manager._build_queue_key(job.get('priority', 'normal'), job['queue'])
+            return bool(await self._get_script('job_return')(
+                keys=[self._build_key(self.redis_manager._build_processing_key(processing_key, job['queue'])),
+                      self._build_key(queue_key)],
+                args=[value]
+            ))
+            
+        except Exception as e:
+            self.logger.error(f"Job return error: {str(e)}")
+            return False
+    
+    async def ack_jobs(self, processing_key: str, claimed: List[tuple]) -> int:
+        """Remove finished (job, stored value) pairs from their processing lists in one round trip"""
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for job, value in claimed:
+                pipe.lrem(self._build_key(self.redis_manager._build_processing_key(processing_key, job['queue'])), 1, value)
+            return sum(await pipe.execute())
+            
+        except Exception as e:
+            self.logger.error(f"Job ack error: {str(e)}")
+            return 0
+    
+    # Session Management
+    async def create_session(self, session_id: str, user_data: Dict, ttl: int = None, user_id: str = None) -> bool:
+        """Create user session as a hash indexed by user"""
+        try:
+            ttl = ttl or self.session_config['default_ttl']
+            user_id = user_id or user_data.get('user_id')
+            
+            result = await self._get_script('session_create')(
+                keys=self.redis_manager._build_session_keys(session_id, user_id),
+                args=[ttl, session_id] + self.redis_manager._build_session_fields(user_data, ttl, user_id)
+            )
+            
+            return bool(result)
+            
+        except Exception as e:
+            self.logger.error(f"Session creation error: {str(e)}")
+            return False
+    
+    async def get_session(self, session_id: str, user_id: str = None) -> Optional[Dict]:
+        """Get session data, sliding its TTL in the same round trip"""
+        try:
+            result = await self._get_script('session_get')(
+                keys=[self.redis_manager._build_session_key(session_id, user_id)],
+                args=[time.time(), self.session_config['touch_interval']]
+            )
+            
+            with self.metrics_lock:
+                self.metrics['operations_total'] += 1
+                if result is None:
+                    self.metrics['cache_misses'] += 1
+                    return None
+                
+                self.metrics['cache_hits'] += 1
+                if result[0]:
+                    self.metrics['session_touches'] += 1
+            
+            return self.redis_manager._parse_session(result[1])
+            
+        except Exception as e:
+            self.logger.error(f"Session retrieval error: {str(e)}")
+            return None
+    
+    async def delete_session(self, session_id: str, user_id: str = None) -> bool:
+        """Delete session and remove it from its user index"""
+        try:
+            deleted = await self._get_script('session_delete')(
+                keys=self.redis_manager._build_session_keys(session_id, user_id),
+                args=[session_id]
+            )
+            
+            # Previous key layouts, which RedisManager.get_session would otherwise migrate back
+            deleted += await self.redis_client.delete(
+                self._build_key(f"session:{session_id}"), self._build_key(f"session:{{sessions}}:{session_id}")
+            )
+            if user_id:
+                await self.redis_client.srem(self._build_key(f"session_index:{user_id}"), session_id)
+                await self.redis_client.srem(self._build_key(f"session_index:{{sessions}}:{user_id}"), session_id)
+            
+            return bool(deleted)
+            
+        except Exception as e:
+            self.logger.error(f"Session deletion error: {str(e)}")
+            return False
+    
+    # Rate Limiting
+    async def is_rate_limited(self, key: str, limit: int, window: int) -> bool:
+        """Check if key is rate limited (sliding window)"""
+        try:
+            full_key = self._build_key(f"rate_limit:{key}")
+            current_time = int(time.time())
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zremrangebyscore(full_key, 0, current_time - window)
+            pipe.zcard(full_key)
+            _, current_count = await pipe.execute()
+            
+            if current_count >= limit:
+                return True
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zadd(full_key, {str(current_time): current_time})
+            pipe.expire(full_key, window)
+            await pipe.execute()
+            
+            return False
+            
+        except Exception as e:
+            self.logger.error(f"Rate limiting error for key '{key}': {str(e)}")
+            return False
+    
+    # Helper Methods
+    def _build_key(self, key: str) -> str:
+        """Build full cache key with prefix"""
+        return self.redis_manager._build_key(key)
+    
+    def _serialize_value(self, value: Any) -> str:
+        """Serialize value for storage"""
+        return self.redis_manager._serialize_value(value)
+    
+    def _deserialize_value(self, value: str) -> Any:
+        """Deserialize value from storage"""
+        return self.redis_manager._deserialize_value(value)
+    
+    async def _build_namespace_key(self, namespace: str, key: str) -> str:
+        """Build namespaced key, sharing the generation cache with RedisManager"""
+        generations = self.redis_manager.namespace_generations
+        cached = generations.get(namespace)
+        
+        if cached and time.time() - cached[1] < self.namespace_config['generation_cache_ttl']:
+            generation = cached[0]
+        else:
+            generation = int(await self.redis_client.get(self._build_key(f"ns_gen:{namespace}")) or 0)
+            generations[namespace] = (generation, time.time())
+        
+        return f"ns:{namespace}:v{self.cache_config['version']}:g{generation}:{key}"
+    
+    async def _get_queue_backlog(self, queue_keys: List[str]) -> Dict[str, float]:
+        """Get non-empty queues mapped to the age of their oldest job"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        self.redis_manager._queue_backlog_reads(pipe, queue_keys)
+        
+        with self._track_operation():
+            results = await pipe.execute()
+        return self.redis_manager._parse_queue_backlog(queue_keys, results)
+    
+    async def _dequeue_weighted(self, queue_keys: List[str]) -> Optional[Dict]:
+        """Pop next ready job using weighted-fair selection (non-blocking)"""
+        for _ in range(len(queue_keys) + 1):
+            backlog = await self._get_queue_backlog(queue_keys)
+            if not backlog:
+                return None
+            
+            queue_key, promoted = self.redis_manager._select_weighted_queue(queue_keys, backlog)
+            job = await self.rpop(queue_key)
+            
+            if job is None:
+                # Another consumer drained the queue since inspection
+                continue
+            
+            if promoted:
+                job['promoted'] = True
+                with self.metrics_lock:
+                    self.metrics['jobs_promoted'] += 1
+            
+            self.redis_manager._record_job_wait(job)
+            return job
+        
+        return None
+    
+    async def _migrate_legacy_queues(self, queue_names: List[str]):
+        """Move jobs from untagged queue keys to their tagged keys once (shared with RedisManager)"""
+        for queue_name in queue_names:
+            if queue_name in self.redis_manager.migrated_queues:
+                continue
+            
+            try:
+                for priority in self.queue_config['priority_queues']:
+                    moved = await self._get_script('queue_migrate')(keys=[
+                        self._build_key(f"queue:{priority}:{queue_name}"),
+                        self._build_key(self.redis_manager._build_queue_key(priority, queue_name))
+                    ])
+                    if moved:
+                        self.logger.info(f"Moved {moved} jobs from legacy queue {priority}:{queue_name}")
+                
+                self.redis_manager.migrated_queues.add(queue_name)
+                
+            except Exception as e:
+                self.logger.error(f"Legacy queue migration error for '{queue_name}': {str(e)}")
+    
+    def _get_script(self, name: str):
+        """Get Lua script registered on the async client"""
+        if name not in self.scripts:
+            self.scripts[name] = self.redis_client.register_script(LUA_SCRIPTS[name])
+        return self.scripts[name]
+    
+    @contextmanager
+    def _track_operation(self):
+        """Track concurrent operations in flight (event loop thread only)"""
+        self.async_metrics['operations_in_flight'] += 1
+        self.async_metrics['max_operations_in_flight'] = max(
+            self.async_metrics['max_operations_in_flight'], self.async_metrics['operations_in_flight']
+        )
+        try:
+            yield
+        finally:
+            self.async_metrics['operations_in_flight'] -= 1
+
+if __name__ == "__main__":
+    # Example usage and testing
+    async def main():
+        async_redis = AsyncRedisManager()
+        await async_redis.initialize()
+        
+        # Thousands of concurrent operations on one thread
+        await asyncio.gather(*[async_redis.set(f"async_test:{i}", {'value': i}, 60) for i in range(1000)])
+        values = await async_redis.get_many([f"async_test:{i}" for i in range(1000)])
+        print(f"Fetched {len(values)} values")
+        
+        print(f"Metrics: {async_redis.get_metrics()}")
+        await async_redis.shutdown()
+    
+    asyncio.run(main())
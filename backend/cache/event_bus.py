@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Event Bus
+LoanFlow Personal Loan Management System
+
+This module distributes domain events between services including:
+- Typed events with required fields per event type
+- One listener connection per process (pattern subscription)
+- Handler registration by event type pattern
+- Bounded dispatcher pool with backpressure
+- Dropped, failed and slow handler metrics
+- Optional Redis Streams mode with a consumer group per subscription for durable delivery
+- Delivery cap with a dead letter stream for events a handler keeps failing
+
+Services only publish today; a process that subscribes handlers calls start() to
+run the listener.
+"""
+
+import logging
+import fnmatch
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Any, Callable
+from datetime import datetime
+
+# Event types and the data fields they must carry
+EVENT_SCHEMAS = {
+    'application.submitted': ['application_id'],
+    'application.decided': ['application_id', 'decision'],
+    'loan.approved': ['application_id', 'loan_id'],
+    'loan.rejected': ['application_id'],
+    'loan.paid_off': ['loan_id'],
+    'payment.posted': ['loan_id', 'payment_id', 'amount'],
+    'customer.onboarded': ['customer_id']
+}
+
+@dataclass
+class Event:
+    """Domain event"""
+    type: str
+    data: Dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    source: str = field(default_factory=lambda: f"{socket.gethostname()}:{os.getpid()}")
+    timestamp: float = field(default_factory=time.time)
+    
+    def to_json(self) -> str:
+        """Serialize event for transport"""
+        return json.dumps(asdict(self), default=str)
+    
+    @classmethod
+    def from_json(cls, payload: str) -> 'Event':
+        """Deserialize event from transport"""
+        return cls(**json.loads(payload))
+
+class EventBus:
+    def __init__(self, redis_manager, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.redis_manager = redis_manager
+        self.status = 'stopped'
+        
+        self.config = {
+            'mode': os.getenv('EVENT_BUS_MODE', 'pubsub'),  # pubsub or streams
+            'channel_prefix': 'events:',
+            'stream_key': 'event_stream',
+            'stream_maxlen': 100000,  # Approximate trim length
+            'consumer_group': os.getenv('EVENT_BUS_GROUP', 'loanflow'),  # Prefix of the per-subscription groups
+            'consumer_name': f"{socket.gethostname()}:{os.getpid()}",
+            'claim_idle_ms': 60000,  # Reclaim deliveries unacked this long (crashed consumers)
+            'max_deliveries': 5,  # Deliveries per group before the entry is dead-lettered
+            'dead_letter_stream_key': 'event_stream:dead',
+            'dispatcher_workers': int(os.getenv('EVENT_BUS_WORKERS', '8')),
+            'max_pending': 1000,  # Handler calls queued or running
+            'backpressure_timeout': 0.5,  # seconds the listener waits for a slot before dropping (pubsub)
+            'slow_handler_threshold': 1.0,  # seconds
+            'read_batch_size': 100
+        }
+        if config:
+            self.config.update(config)
+        
+        self.handlers = []  # (pattern, handler)
+        self.stream_groups = set()  # Consumer groups known to exist
+        self.handlers_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.listener_thread = None
+        self.executor = None
+        self.slots = threading.BoundedSemaphore(self.config['max_pending'])
+        
+        self.metrics_lock = threading.Lock()
+        self.metrics = {
+            'events_published': 0,
+            'events_received': 0,
+            'events_unhandled': 0,
+            'events_filtered': 0,
+            'events_malformed': 0,
+            'dispatches': 0,
+            'dispatches_dropped': 0,
+            'handler_errors': 0,
+            'slow_handlers': 0,
+            'events_acked': 0,
+            'events_reclaimed': 0,
+            'events_dead_lettered': 0,
+            'listener_reconnects': 0,
+            'pending': 0
+        }
+        self.handler_metrics = {}
+    
+    def start(self):
+        """Start listener and dispatcher pool"""
+        if self.status == 'running':
+            return
+        
+        self.stop_event.clear()
+        self.executor = ThreadPoolExecutor(max_workers=self.config['dispatcher_workers'], thread_name_prefix='event-dispatch')
+        
+        target = self._stream_loop if self.config['mode'] == 'streams' else self._pubsub_loop
+        self.listener_thread = threading.Thread(target=target, daemon=True, name='event-listener')
+        self.listener_thread.start()
+        
+        self.status = 'running'
+        self.logger.info(f"Event bus started ({self.config['mode']} mode, {self.config['dispatcher_workers']} dispatchers)")
+    
+    def stop(self, timeout: float = 10.0):
+        """Stop listening and let running handlers finish"""
+        self.stop_event.set()
+        
+        if self.listener_thread:
+            self.listener_thread.join(timeout=timeout)
+        
+        if self.executor:
+            self.executor.shutdown(wait=True)
+        
+        self.status = 'stopped'
+        self.logger.info("Event bus stopped")
+    
+    def get_status(self) -> str:
+        """Get event bus status"""
+        return self.status
+    
+    def get_metrics(self) -> Dict:
+        """Get event bus metrics"""
+        with self.metrics_lock:
+            handlers = {}
+            for name, stats in self.handler_metrics.items():
+                handlers[name] = {
+                    **stats,
+                    'avg_time': round(stats['total_time'] / stats['calls'], 4) if stats['calls'] else 0
+                }
+            
+            return {
+                **self.metrics,
+                'handlers': handlers,
+                'mode': self.config['mode'],
+                'status': self.status,
+                'last_updated': datetime.now().isoformat()
+            }
+    
+    # Publishing
+    def publish(self, event_type: str, data: Dict) -> Optional[Event]:
+        """Publish typed event"""
+        try:
+            missing = [name for name in EVENT_SCHEMAS.get(event_type, []) if name not in data]
+            if missing:
+                raise ValueError(f"Event '{event_type}' missing fields: {', '.join(missing)}")
+            
+            event = Event(type=event_type, data=data)
+            
+            if self.config['mode'] == 'streams':
+                self.redis_manager.redis_client.xadd(
+                    self.redis_manager._build_key(self.config['stream_key']),
+                    {'event': event.to_json()},
+                    maxlen=self.config['stream_maxlen'],
+                    approximate=True
+                )
+            else:
+                self.redis_manager.redis_client.publish(self._build_channel(event_type), event.to_json())
+            
+            with self.metrics_lock:
+                self.metrics['events_published'] += 1
+            
+            return event
+            
+        except ValueError:
+            raise
+            
+        except Exception as e:
+            self.logger.error(f"Event publish error for '{event_type}': {str(e)}")
+            return None
+    
+    # Subscriptions
+    def subscribe(self, pattern: str, handler: Callable[[Event], Any]):
+        """Register handler for event types matching pattern (e.g. 'loan.*')"""
+        with self.handlers_lock:
+            self.handlers.append((pattern, handler))
+        
+        self.logger.info(f"Event handler {self._handler_name(handler)} subscribed to '{pattern}'")
+    
+    def unsubscribe(self, handler: Callable[[Event], Any]):
+        """Remove handler from every pattern"""
+        with self.handlers_lock:
+            self.handlers = [(pattern, registered) for pattern, registered in self.handlers if registered is not handler]
+    
+    def on(self, pattern: str) -> Callable:
+        """Decorator form of subscribe"""
+        def decorator(handler: Callable[[Event], Any]) -> Callable[[Event], Any]:
+            self.subscribe(pattern, handler)
+            return handler
+        return decorator
+    
+    # Listening
+    def _pubsub_loop(self):
+        """Receive events over one pattern subscription for the whole process"""
+        backoff = 1
+        while not self.stop_event.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis_manager.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self._build_channel('*'))
+                backoff = 1
+                
+                while not self.stop_event.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if not message or message['type'] != 'pmessage':
+                        continue
+                    
+                    # A bad payload is dropped, it must not cost the subscription
+                    try:
+                        self._handle_event(Event.from_json(message['data']))
+                    except Exception as e:
+                        self.logger.error(f"Event message error on {message.get('channel')}: {str(e)}")
+                        with self.metrics_lock:
+                            self.metrics['events_malformed'] += 1
+                        
+            except Exception as e:
+                self.logger.error(f"Event listener error: {str(e)}")
+                with self.metrics_lock:
+                    self.metrics['listener_reconnects'] += 1
+                self.stop_event.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            
+            finally:
+                if pubsub:
+                    pubsub.close()
+    
+    def _stream_loop(self):
+        """Receive events from the stream through one consumer group per subscription"""
+        client = self.redis_manager.redis_client
+        stream_key = self.redis_manager._build_key(self.config['stream_key'])
+        consumer = self.config['consumer_name']
+        backoff = 1
+        
+        while not self.stop_event.is_set():
+            try:
+                last_reclaim = 0
+                
+                while not self.stop_event.is_set():
+                    subscriptions = self._get_stream_subscriptions(stream_key)
+                    
+                    # Deliveries left unacked by crashed consumers or failed handlers
+                    if time.time() - last_reclaim >= self.config['claim_idle_ms'] / 1000:
+                        for group, pattern, handler in subscriptions:
+                            self._reclaim_stale_events(stream_key, group, consumer, pattern, handler)
+                        last_reclaim = time.time()
+                    
+                    # Newest entry before reading, so the wait below wakes on anything added since
+                    latest = client.xrevrange(stream_key, count=1)
+                    latest_id = latest[0][0] if latest else '0-0'
+                    
+                    received = False
+                    for group, pattern, handler in subscriptions:
+                        entries = client.xreadgroup(group, consumer, {stream_key: '>'}, count=self.config['read_batch_size'])
+                        for _, messages in entries or []:
+                            for message_id, fields in messages:
+                                received = True
+                                self._handle_stream_event(Event.from_json(fields['event']), pattern, handler,
+                                                          (stream_key, group, message_id))
+                    
+                    # One blocking read on the stream serves every group
+                    if not received:
+                        client.xread({stream_key: latest_id}, count=1, block=1000)
+                backoff = 1
+                
+            except Exception as e:
+                self.logger.error(f"Event stream listener error: {str(e)}")
+                with self.metrics_lock:
+                    self.metrics['listener_reconnects'] += 1
+                self.stop_event.wait(backoff)
+                backoff = min(backoff * 2, 30)
+    
+    def _get_stream_subscriptions(self, stream_key: str) -> List[tuple]:
+        """Consumer group per subscription, shared by every process running the same handler"""
+        with self.handlers_lock:
+            handlers = list(self.handlers)
+        
+        subscriptions = []
+        for pattern, handler in handlers:
+            group = f"{self.config['consumer_group']}:{pattern}:{self._handler_name(handler)}"
+            if group not in self.stream_groups:
+                self._ensure_consumer_group(stream_key, group)
+                self.stream_groups.add(group)
+            subscriptions.append((group, pattern, handler))
+        return subscriptions
+    
+    def _ensure_consumer_group(self, stream_key: str, group: str):
+        """Create consumer group (and stream) if missing"""
+        try:
+            self.redis_manager.redis_client.xgroup_create(stream_key, group, id='0', mkstream=True)
+        except Exception as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+    
+    def _reclaim_stale_events(self, stream_key: str, group: str, consumer: str, pattern: str, handler: Callable):
+        """Take over deliveries the group never acknowledged, dead-lettering those past the delivery cap"""
+        client = self.redis_manager.redis_client
+        pending = client.xpending_range(stream_key, group, min='-', max='+', count=self.config['read_batch_size'],
+                                        idle=self.config['claim_idle_ms'])
+        
+        retry_ids = []
+        for entry in pending:
+            if entry['times_delivered'] >= self.config['max_deliveries']:
+                self._dead_letter(stream_key, group, entry['message_id'], entry['times_delivered'])
+            else:
+                retry_ids.append(entry['message_id'])
+        
+        if not retry_ids:
+            return
+        
+        # Claiming resets the idle time, so a consumer that claimed first keeps the entry
+        for message_id, fields in client.xclaim(stream_key, group, consumer, self.config['claim_idle_ms'], retry_ids):
+            if fields:
+                with self.metrics_lock:
+                    self.metrics['events_reclaimed'] += 1
+                self._handle_stream_event(Event.from_json(fields['event']), pattern, handler,
+                                          (stream_key, group, message_id))
+    
+    def _dead_letter(self, stream_key: str, group: str, message_id: str, deliveries: int):
+        """Copy delivery to the dead letter stream and acknowledge it for the group"""
+        client = self.redis_manager.redis_client
+        entries = client.xrange(stream_key, min=message_id, max=message_id)
+        if entries:
+            client.xadd(
+                self.redis_manager._build_key(self.config['dead_letter_stream_key']),
+                {'event': entries[0][1]['event'], 'group': group, 'message_id': message_id, 'deliveries': deliveries},
+                maxlen=self.config['stream_maxlen'],
+                approximate=True
+            )
+        
+        self.logger.error(f"Event {message_id} dead-lettered for {group} after {deliveries} deliveries")
+        with self.metrics_lock:
+            self.metrics['events_dead_lettered'] += 1
+        self._ack((stream_key, group, message_id))
+    
+    # Dispatching
+    def _handle_event(self, event: Event):
+        """Dispatch event to matching handlers through the bounded pool"""
+        with self.metrics_lock:
+            self.metrics['events_received'] += 1
+        
+        with self.handlers_lock:
+            handlers = [handler for pattern, handler in self.handlers if fnmatch.fnmatchcase(event.type, pattern)]
+        
+        if not handlers:
+            with self.metrics_lock:
+                self.metrics['events_unhandled'] += 1
+            return
+        
+        for handler in handlers:
+            self._dispatch(handler, event)
+    
+    def _handle_stream_event(self, event: Event, pattern: str, handler: Callable, ack: tuple):
+        """Dispatch a stream delivery to the subscription that owns its group"""
+        with self.metrics_lock:
+            self.metrics['events_received'] += 1
+        
+        if not fnmatch.fnmatchcase(event.type, pattern):
+            # The group belongs to this subscription alone, so other event types are done for it
+            with self.metrics_lock:
+                self.metrics['events_filtered'] += 1
+            self._ack(ack)
+            return
+        
+        self._dispatch(handler, event, ack)
+    
+    def _dispatch(self, handler: Callable, event: Event, ack: Optional[tuple] = None):
+        """Submit one handler call, waiting for capacity on durable deliveries"""
+        if not self._acquire_slot(durable=ack is not None):
+            with self.metrics_lock:
+                self.metrics['dispatches_dropped'] += 1
+            self.logger.warning(f"Event {event.type} dropped for {self._handler_name(handler)}: dispatcher saturated")
+            return
+        
+        with self.metrics_lock:
+            self.metrics['dispatches'] += 1
+            self.metrics['pending'] += 1
+        
+        self.executor.submit(self._run_handler, handler, event, ack)
+    
+    def _acquire_slot(self, durable: bool) -> bool:
+        """Wait for dispatcher capacity (durable deliveries wait indefinitely)"""
+        if durable:
+            while not self.slots.acquire(timeout=1.0):
+                if self.stop_event.is_set():
+                    return False
+            return True
+        
+        return self.slots.acquire(timeout=self.config['backpressure_timeout'])
+    
+    def _run_handler(self, handler: Callable, event: Event, ack: Optional[tuple]):
+        """Run one handler and record its timing"""
+        name = self._handler_name(handler)
+        start_time = time.time()
+        failed = False
+        
+        try:
+            handler(event)
+            
+        except Exception as e:
+            failed = True
+            self.logger.error(f"Event handler {name} failed for {event.type} ({event.id}): {str(e)}")
+        
+        finally:
+            elapsed = time.time() - start_time
+            slow = elapsed > self.config['slow_handler_threshold']
+            if slow:
+                self.logger.warning(f"Slow event handler {name}: {elapsed:.2f}s for {event.type}")
+            
+            with self.metrics_lock:
+                stats = self.handler_metrics.setdefault(name, {'calls': 0, 'errors': 0, 'slow': 0, 'total_time': 0.0, 'max_time': 0.0})
+                stats['calls'] += 1
+                stats['total_time'] += elapsed
+                stats['max_time'] = max(stats['max_time'], elapsed)
+                stats['errors'] += int(failed)
+                stats['slow'] += int(slow)
+                self.metrics['handler_errors'] += int(failed)
+                self.metrics['slow_handlers'] += int(slow)
+                self.metrics['pending'] -= 1
+            
+            self.slots.release()
+            
+            # Failed deliveries stay pending in this handler's group only and are reclaimed later
+            if ack and not failed:
+                self._ack(ack)
+    
+    def _ack(self, ack: tuple):
+        """Acknowledge stream delivery"""
+        try:
+            stream_key, group, message_id = ack
+            self.redis_manager.redis_client.xack(stream_key, group, message_id)
+            
+            with self.metrics_lock:
+                self.metrics['events_acked'] += 1
+                
+        except Exception as e:
+            self.logger.error(f"Event ack error: {str(e)}")
+    
+    # Helper Methods
+    def _build_channel(self, event_type: str) -> str:
+        """Build pub/sub channel for event type"""
+        return self.redis_manager._build_key(f"{self.config['channel_prefix']}{event_type}")
+    
+    def _handler_name(self, handler: Callable) -> str:
+        """Readable handler name for metrics"""
+        return getattr(handler, '__qualname__', repr(handler))
+
+# One event bus (and listener connection) per process
+_event_bus = None
+_event_bus_pid = None
+_event_bus_lock = threading.Lock()
+
+def get_event_bus(redis_manager, config: Optional[Dict] = None) -> EventBus:
+    """Get the process-wide event bus, creating it after fork if needed"""
+    global _event_bus, _event_bus_pid
+    
+    with _event_bus_lock:
+        if _event_bus is None or _event_bus_pid != os.getpid():
+            _event_bus = EventBus(redis_manager, config)
+            _event_bus_pid = os.getpid()
+        return _event_bus
+
+if __name__ == "__main__":
+    # Example usage and testing
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from cache.redis_manager import RedisManager
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    redis_manager = RedisManager()
+    redis_manager.initialize()
+    
+    bus = get_event_bus(redis_manager)
+    
+    @bus.on('loan.*')
+    def log_loan_event(event: Event):
+        print(f"Received {event.type}: {event.data}")
+    
+    bus.start()
+    time.sleep(0.5)
+    
+    bus.publish('loan.approved', {'application_id': 'APP-1', 'loan_id': 'LN-1'})
+    time.sleep(1)
+    
+    print(f"Metrics: {bus.get_metrics()}")
+    bus.stop()
+    redis_manager.shutdown()
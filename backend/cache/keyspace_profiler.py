@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Keyspace Memory Profiler
+LoanFlow Personal Loan Management System
+
+This module attributes Redis memory usage to key groups including:
+- Throttled SCAN-based keyspace sampling
+- Grouping keys by prefix pattern
+- Memory estimates per group via MEMORY USAGE
+- TTL distribution and keys without TTL
+- Largest keys report
+"""
+
+import logging
+import fnmatch
+import heapq
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+from datetime import datetime
+
+class KeyspaceProfiler:
+    """Background sampler of the Redis keyspace"""
+    
+    # Key segments that identify an instance rather than a kind of key
+    ID_SEGMENT = re.compile(r'^(?=.*\d)[\w.\-]+$|^[0-9a-f]{16,}$')
+    
+    TTL_BUCKETS = [
+        ('<1m', 60),
+        ('<1h', 3600),
+        ('<1d', 86400),
+        ('>=1d', float('inf'))
+    ]
+    
+    def __init__(self, redis_manager, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.redis_manager = redis_manager
+        self.status = 'stopped'
+        
+        self.config = {
+            'enabled': os.getenv('KEYSPACE_PROFILER_ENABLED', 'true').lower() == 'true',
+            'interval': int(os.getenv('KEYSPACE_PROFILER_INTERVAL', '300')),  # seconds between runs
+            'scan_count': 200,  # SCAN COUNT hint per batch
+            'batch_pause': 0.05,  # seconds to yield to the server between batches
+            'max_keys': 50000,  # Sample cap per run, larger keyspaces are extrapolated
+            'memory_samples': 5,  # MEMORY USAGE SAMPLES for aggregate types
+            'top_keys': 20,
+            'group_patterns': [
+                'session:*',
+                'session_index:*',
+                'daily_metrics:*',
+                'queue:processing:*',
+                'queue:delayed:*',
+                'ns:*',
+                'tag:*',
+                'worker:*',
+                'lock:*',
+                'lock_fence:*',
+                'lock_signal:*',
+                'rate_limit:*'
+            ]
+        }
+        if config:
+            self.config.update(config)
+        
+        self.stop_event = threading.Event()
+        self.profiler_thread = None
+        self.last_report = {}
+        
+        self.metrics = {
+            'runs': 0,
+            'last_duration': 0.0,
+            'errors': 0
+        }
+    
+    def start(self):
+        """Start background profiling"""
+        if not self.config['enabled'] or self.status == 'running':
+            return
+        
+        self.stop_event.clear()
+        self.profiler_thread = threading.Thread(target=self._profile_loop, daemon=True, name='keyspace-profiler')
+        self.profiler_thread.start()
+        
+        self.status = 'running'
+        self.logger.info(f"Keyspace profiler started (interval {self.config['interval']}s)")
+    
+    def stop(self):
+        """Stop background profiling"""
+        self.stop_event.set()
+        if self.profiler_thread:
+            self.profiler_thread.join(timeout=5)
+        
+        self.status = 'stopped'
+    
+    def get_status(self) -> str:
+        """Get profiler status"""
+        return self.status
+    
+    def get_metrics(self) -> Dict:
+        """Get profiler metrics"""
+        return self.metrics.copy()
+    
+    def get_report(self) -> Dict:
+        """Get the most recent keyspace report"""
+        return self.last_report
+    
+    # Profiling
+    def profile(self) -> Dict:
+        """Sample the keyspace once and build a report"""
+        try:
+            start_time = time.time()
+            client = self.redis_manager.redis_client
+            prefix = self.redis_manager.cache_config['key_prefix']
+            
+            groups = {}
+            largest = []
+            scanned = 0
+            
+            batch = []
+            for key in client.scan_iter(match=f"{prefix}*", count=self.config['scan_count']):
+                batch.append(key)
+                if len(batch) >= self.config['scan_count']:
+                    self._sample_batch(batch, prefix, groups, largest)
+                    scanned += len(batch)
+                    batch = []
+                    
+                    if scanned >= self.config['max_keys']:
+                        break
+                    
+                    # Throttle so sampling never monopolizes the server
+                    if self.stop_event.wait(self.config['batch_pause']):
+                        break
+            
+            if batch:
+                self._sample_batch(batch, prefix, groups, largest)
+                scanned += len(batch)
+            
+            report = self._build_report(groups, largest, scanned, client.dbsize())
+            report['duration'] = round(time.time() - start_time, 3)
+            
+            self.last_report = report
+            self.metrics['runs'] += 1
+            self.metrics['last_duration'] = report['duration']
+            
+            return report
+            
+        except Exception as e:
+            self.logger.error(f"Keyspace profiling error: {str(e)}")
+            self.metrics['errors'] += 1
+            return self.last_report
+    
+    # Helper Methods
+    def _profile_loop(self):
+        """Background profiling loop"""
+        while not self.stop_event.is_set():
+            self.profile()
+            self.stop_event.wait(self.config['interval'])
+    
+    def _sample_batch(self, keys: List[str], prefix: str, groups: Dict, largest: List):
+        """Measure memory and TTL for a batch of keys in one pipeline"""
+        pipe = self.redis_manager.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.memory_usage(key, samples=self.config['memory_samples'])
+            pipe.ttl(key)
+        results = pipe.execute(raise_on_error=False)
+        
+        for i, key in enumerate(keys):
+            size, ttl = results[2 * i], results[2 * i + 1]
+            
+            # Key expired or was deleted between SCAN and MEMORY USAGE
+            if not isinstance(size, int) or ttl == -2:
+                continue
+            
+            short_key = key[len(prefix):]
+            group = groups.setdefault(self._get_group(short_key), {
+                'keys': 0,
+                'bytes': 0,
+                'max_bytes': 0,
+                'no_ttl': 0,
+                'ttl_distribution': {name: 0 for name, _ in self.TTL_BUCKETS}
+            })
+            
+            group['keys'] += 1
+            group['bytes'] += size
+            group['max_bytes'] = max(group['max_bytes'], size)
+            
+            if ttl == -1:
+                group['no_ttl'] += 1
+            else:
+                for name, limit in self.TTL_BUCKETS:
+                    if ttl < limit:
+                        group['ttl_distribution'][name] += 1
+                        break
+            
+            entry = (size, short_key, ttl)
+            if len(largest) < self.config['top_keys']:
+                heapq.heappush(largest, entry)
+            elif size > largest[0][0]:
+                heapq.heapreplace(largest, entry)
+    
+    def _get_group(self, key: str) -> str:
+        """Map a key to its group pattern"""
+        for pattern in self.config['group_patterns']:
+            if fnmatch.fnmatchcase(key, pattern):
+                return pattern
+        
+        # Replace instance segments (ids, dates, hashes) with wildcards
+        segments = key.split(':')
+        return ':'.join('*' if i and self.ID_SEGMENT.match(segment) else segment
+                        for i, segment in enumerate(segments))
+    
+    def _build_report(self, groups: Dict, largest: List, scanned: int, total_keys: int) -> Dict:
+        """Build report, extrapolating sampled groups to the full keyspace"""
+        scale = total_keys / scanned if scanned else 0
+        
+        for group in groups.values():
+            group['avg_bytes'] = round(group['bytes'] / group['keys']) if group['keys'] else 0
+            group['estimated_keys'] = round(group['keys'] * scale)
+            group['estimated_bytes'] = round(group['bytes'] * scale)
+        
+        return {
+            'sampled_keys': scanned,
+            'total_keys': total_keys,
+            'sampled_bytes': sum(group['bytes'] for group in groups.values()),
+            'groups': dict(sorted(groups.items(), key=lambda item: item[1]['bytes'], reverse=True)),
+            'largest_keys': [
+                {'key': key, 'bytes': size, 'ttl': ttl}
+                for size, key, ttl in sorted(largest, reverse=True)
+            ],
+            'keys_without_ttl': sum(group['no_ttl'] for group in groups.values()),
+            'profiled_at': datetime.now().isoformat()
+        }
+
+if __name__ == "__main__":
+    # Example usage and testing
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from cache.redis_manager import RedisManager
+    
+    redis_manager = RedisManager()
+    redis_manager.initialize()
+    
+    profiler = KeyspaceProfiler(redis_manager)
+    report = profiler.profile()
+    
+    print(f"Sampled {report.get('sampled_keys', 0)} of {report.get('total_keys', 0)} keys")
+    for name, group in report.get('groups', {}).items():
+        print(f"{name}: {group['keys']} keys, {group['bytes']} bytes, {group['no_ttl']} without TTL")
+    
+    redis_manager.shutdown()
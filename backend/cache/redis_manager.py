@@ -22,9 +22,148 @@ import hashlib
 from typing import Dict, List, Optional, Any, Union
 from datetime import datetime, timedelta
 import os
+import random
+import sys
 import threading
 import time
+import uuid
+from collections import deque
 from contextlib import contextmanager
+from dataclasses import dataclass
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache.keyspace_profiler import KeyspaceProfiler
+from cache.shard_router import ShardRouter
+
+# Lua scripts registered on first use
+LUA_SCRIPTS = {
+    # Take the lock and issue the next fencing token atomically
+    'lock_acquire': """
+        if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+            return redis.call('incr', KEYS[2])
+        end
+        return 0
+    """,
+    # Release only if owned, then leave a single wake-up signal for waiters
+    'lock_release': """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            redis.call('del', KEYS[1])
+            redis.call('del', KEYS[2])
+            redis.call('rpush', KEYS[2], '1')
+            redis.call('pexpire', KEYS[2], ARGV[2])
+            return 1
+        end
+        return 0
+    """,
+    # Session hash: return fields and slide the TTL, touching at most once per interval
+    'session_get': """
+        if redis.call('type', KEYS[1]).ok ~= 'hash' then
+            return nil
+        end
+        local now = tonumber(ARGV[1])
+        local last = tonumber(redis.call('hget', KEYS[1], '_last_accessed') or '0')
+        local touched = 0
+        if now - last >= tonumber(ARGV[2]) then
+            redis.call('hset', KEYS[1], '_last_accessed', ARGV[1])
+            redis.call('expire', KEYS[1], redis.call('hget', KEYS[1], '_ttl'))
+            touched = 1
+        end
+        if #ARGV > 2 then
+            return {touched, redis.call('hmget', KEYS[1], unpack(ARGV, 3))}
+        end
+        return {touched, redis.call('hgetall', KEYS[1])}
+    """,
+    # Session hash and its user index share the user's {u:<user_id>} hash-tag, so both change atomically
+    'session_create': """
+        redis.call('del', KEYS[1])
+        redis.call('hset', KEYS[1], unpack(ARGV, 3))
+        redis.call('expire', KEYS[1], ARGV[1])
+        if #KEYS > 1 then
+            redis.call('sadd', KEYS[2], ARGV[2])
+            if redis.call('ttl', KEYS[2]) < tonumber(ARGV[1]) then
+                redis.call('expire', KEYS[2], ARGV[1])
+            end
+        end
+        return 1
+    """,
+    'session_update': """
+        if redis.call('exists', KEYS[1]) == 0 then
+            return 0
+        end
+        redis.call('hset', KEYS[1], unpack(ARGV))
+        return 1
+    """,
+    # Delete session and remove it from its user index (KEYS[2], when the session has a user)
+    'session_delete': """
+        local deleted = redis.call('del', KEYS[1])
+        if #KEYS > 1 then
+            redis.call('srem', KEYS[2], ARGV[1])
+        end
+        return deleted
+    """,
+    # Delete the listed sessions of a user index (KEYS[2..] match ARGV), dropping the index once empty
+    'session_revoke': """
+        local revoked = 0
+        for i = 2, #KEYS do
+            revoked = revoked + redis.call('del', KEYS[i])
+            redis.call('srem', KEYS[1], ARGV[i - 1])
+        end
+        if redis.call('scard', KEYS[1]) == 0 then
+            redis.call('del', KEYS[1])
+        end
+        return revoked
+    """,
+    # Pop the oldest job of the first non-empty queue into a worker's processing list
+    # (the queues and the processing list share their queue name's {hash-tag})
+    'job_claim': """
+        for i = 2, #KEYS do
+            local value = redis.call('rpoplpush', KEYS[i], KEYS[1])
+            if value then
+                return {KEYS[i], value}
+            end
+        end
+        return nil
+    """,
+    # Move an in-flight job back to the consuming end of its queue, at most once
+    'job_return': """
+        if redis.call('lrem', KEYS[1], 1, ARGV[1]) > 0 then
+            redis.call('rpush', KEYS[2], ARGV[1])
+            return 1
+        end
+        return 0
+    """,
+    # Append a legacy queue to the consuming end of its tagged queue, oldest job last
+    'queue_migrate': """
+        local moved = 0
+        while true do
+            local value = redis.call('lpop', KEYS[1])
+            if not value then
+                return moved
+            end
+            redis.call('rpush', KEYS[2], value)
+            moved = moved + 1
+        end
+    """,
+    'lock_renew': """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('pexpire', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+}
+
+@dataclass
+class LockHandle:
+    """Held distributed lock"""
+    name: str
+    owner: str
+    token: int  # Monotonic fencing token for this lock name
+    timeout: int
+    count: int = 1
+    lost: bool = False
+    renew_stop: Optional[threading.Event] = None
 
 class RedisManager:
     def __init__(self):
@@ -32,7 +171,7 @@ class RedisManager:
         self.redis_client = None
         self.connection_pool = None
         self.status = 'initializing'
-        self.lock = threading.Lock()
+        self.metrics_lock = threading.Lock()
         
         # Redis configuration
         self.config = {
@@ -45,8 +184,10 @@ class RedisManager:
             'socket_connect_timeout': 30,
             'retry_on_timeout': True,
             'health_check_interval': 30,
-            'max_connections': 50
+            'max_connections': 50,
+            'nodes': [node for node in os.getenv('REDIS_NODES', '').split(',') if node.strip()]  # Shard across these when set
         }
+        self.shard_router = None
         
         # Cache configuration
         self.cache_config = {
@@ -54,17 +195,57 @@ class RedisManager:
             'max_key_length': 250,
             'compression_threshold': 1024,  # Compress values larger than 1KB
             'key_prefix': 'loanflow:',
-            'version': '1.0'
+            'version': os.getenv('CACHE_VERSION', '1.0')  # Bump on deploys that change cached formats
         }
         
+        # Namespace configuration
+        self.namespace_config = {
+            'generation_cache_ttl': 1.0,  # seconds a local generation lookup is trusted
+            'tag_ttl': 86400,  # Minimum lifetime of tag sets
+            'unlink_batch_size': 500
+        }
+        self.namespace_generations = {}
+        
+        # Keyspace memory profiler (started with monitoring)
+        self.keyspace_profiler = None
+        
         # Queue configuration
         self.queue_config = {
             'default_queue': 'default',
             'priority_queues': ['urgent', 'high', 'normal', 'low'],
             'max_retries': 3,
             'retry_delay': 60,  # seconds
-            'dead_letter_queue': 'failed_jobs'
+            'dead_letter_queue': 'failed_jobs',
+            'dequeue_strategy': os.getenv('QUEUE_DEQUEUE_STRATEGY', 'weighted'),  # weighted or strict
+            'priority_weights': {'urgent': 8, 'high': 4, 'normal': 2, 'low': 1},
+            'queue_weights': {},  # Per queue name multiplier (default 1)
+            'max_job_age': 300,  # Promote jobs waiting longer than this (seconds)
+            'claim_poll_interval': 0.1,  # seconds between claim attempts on empty queues
+            'wait_sample_size': 1000
+        }
+        
+        # Distributed lock configuration
+        self.lock_config = {
+            'min_backoff': 0.05,  # seconds, first wait for a release signal
+            'max_backoff': 1.0,  # seconds, cap when holder leases expire silently
+            'renew_fraction': 1 / 3  # Watchdog renews every timeout x fraction
         }
+        self.lock_local = threading.local()
+        self.lock_metrics = {}
+        self.seeded_fences = set()  # Lock names whose fence key was carried over from the untagged key
+        self.scripts = {}
+        
+        # Session configuration
+        self.session_config = {
+            'default_ttl': 3600,  # Sliding expiry (seconds)
+            'touch_interval': int(os.getenv('SESSION_TOUCH_INTERVAL', '60'))  # Min seconds between last_accessed writes
+        }
+        
+        # Weighted dequeue state (deficit round-robin)
+        self.dequeue_deficits = {}
+        self.dequeue_last_key = None
+        self.queue_wait_times = {}
+        self.migrated_queues = set()  # Queue names whose untagged legacy keys were drained
         
         # Performance metrics
         self.metrics = {
@@ -74,6 +255,11 @@ class RedisManager:
             'cache_deletes': 0,
             'queue_pushes': 0,
             'queue_pops': 0,
+            'jobs_promoted': 0,
+            'session_touches': 0,
+            'sessions_revoked': 0,
+            'namespace_invalidations': 0,
+            'tag_invalidations': 0,
             'connection_errors': 0,
             'operations_total': 0
         }
@@ -111,6 +297,9 @@ class RedisManager:
         try:
             self.logger.info("Shutting down Redis Manager...")
             
+            if self.keyspace_profiler:
+                self.keyspace_profiler.stop()
+            
             if self.redis_client:
                 self.redis_client.close()
             
@@ -140,6 +329,10 @@ class RedisManager:
             return {
                 **self.metrics,
                 'cache_hit_ratio': round(hit_ratio, 2),
+                'queue_wait_times': self.get_queue_wait_metrics(),
+                'locks': self.get_lock_metrics(),
+                'keyspace': self.keyspace_profiler.get_report() if self.keyspace_profiler else {},
+                'shards': self.shard_router.get_metrics() if self.shard_router else {},
                 'redis_memory_used': redis_info.get('used_memory_human', 'N/A'),
                 'redis_connected_clients': redis_info.get('connected_clients', 0),
                 'redis_uptime': redis_info.get('uptime_in_seconds', 0),
@@ -170,6 +363,14 @@ class RedisManager:
             if self.config['password']:
                 pool_kwargs['password'] = self.config['password']
             
+            if self.config['nodes']:
+                # One pool per shard node, keys routed by consistent hashing
+                for field in ('host', 'port', 'db'):
+                    pool_kwargs.pop(field)
+                self.shard_router = ShardRouter.from_urls(self.config['nodes'], pool_kwargs)
+                self.logger.info(f"Redis sharding enabled across {len(self.config['nodes'])} nodes")
+                return
+            
             self.connection_pool = redis.ConnectionPool(**pool_kwargs)
             
             self.logger.info(f"Redis connection pool created with {self.config['max_connections']} max connections")
@@ -181,7 +382,10 @@ class RedisManager:
     def _create_redis_client(self):
         """Create Redis client"""
         try:
-            self.redis_client = redis.Redis(connection_pool=self.connection_pool)
+            if self.shard_router:
+                self.redis_client = self.shard_router
+            else:
+                self.redis_client = redis.Redis(connection_pool=self.connection_pool)
             
         except Exception as e:
             self.logger.error(f"Redis client creation failed: {str(e)}")
@@ -206,26 +410,26 @@ class RedisManager:
         try:
             full_key = self._build_key(key)
             
-            with self.lock:
+            with self.metrics_lock:
                 self.metrics['operations_total'] += 1
             
             value = self.redis_client.get(full_key)
             
             if value is not None:
-                with self.lock:
+                with self.metrics_lock:
                     self.metrics['cache_hits'] += 1
                 
                 # Deserialize value
                 return self._deserialize_value(value)
             else:
-                with self.lock:
+                with self.metrics_lock:
                     self.metrics['cache_misses'] += 1
                 
                 return default
                 
         except Exception as e:
             self.logger.error(f"Cache get error for key '{key}': {str(e)}")
-            with self.lock:
+            with self.metrics_lock:
                 self.metrics['cache_misses'] += 1
             return default
     
@@ -241,7 +445,7 @@ class RedisManager:
             # Set value with TTL
             result = self.redis_client.setex(full_key, ttl, serialized_value)
             
-            with self.lock:
+            with self.metrics_lock:
                 self.metrics['cache_sets'] += 1
                 self.metrics['operations_total'] += 1
             
@@ -257,7 +461,7 @@ class RedisManager:
             full_key = self._build_key(key)
             result = self.redis_client.delete(full_key)
             
-            with self.lock:
+            with self.metrics_lock:
                 self.metrics['cache_deletes'] += 1
                 self.metrics['operations_total'] += 1
             
@@ -317,6 +521,163 @@ class RedisManager:
             self.logger.error(f"Cache decrement error for key '{key}': {str(e)}")
             return 0
     
+    # Namespaced Caching
+    def cache_get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Get value from a namespace at its current generation (cache bypassed if it is unknown)"""
+        try:
+            ns_key = self._build_namespace_key(namespace, key)
+            
+        except Exception:
+            return default
+        
+        return self.get(ns_key, default)
+    
+    def cache_set(self, namespace: str, key: str, value: Any, ttl: Optional[int] = None,
+                  tags: Optional[List[str]] = None) -> bool:
+        """Set value in a namespace, optionally registering it under tags"""
+        try:
+            ns_key = self._build_namespace_key(namespace, key)
+            full_key = self._build_key(ns_key)
+            ttl = ttl or self.cache_config['default_ttl']
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(full_key, ttl, self._serialize_value(value))
+            for tag in tags or []:
+                tag_key = self._build_key(f"tag:{tag}")
+                pipe.sadd(tag_key, full_key)
+                pipe.expire(tag_key, max(ttl, self.namespace_config['tag_ttl']))
+            results = pipe.execute()
+            
+            with self.metrics_lock:
+                self.metrics['cache_sets'] += 1
+                self.metrics['operations_total'] += 1
+            
+            return bool(results[0])
+            
+        except Exception as e:
+            self.logger.error(f"Cache set error for key '{namespace}:{key}': {str(e)}")
+            return False
+    
+    def cache_get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        """Get several values from a namespace in one round trip (misses omitted)"""
+        try:
+            if not keys:
+                return {}
+            
+            full_keys = [self._build_key(self._build_namespace_key(namespace, key)) for key in keys]
+            values = self.redis_client.mget(full_keys)
+            
+            found = {key: self._deserialize_value(value) for key, value in zip(keys, values) if value is not None}
+            
+            with self.metrics_lock:
+                self.metrics['cache_hits'] += len(found)
+                self.metrics['cache_misses'] += len(keys) - len(found)
+                self.metrics['operations_total'] += 1
+            
+            return found
+            
+        except Exception as e:
+            self.logger.error(f"Cache get many error for namespace '{namespace}': {str(e)}")
+            return {}
+    
+    def cache_set_many(self, namespace: str, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Set several values in a namespace in one pipeline"""
+        try:
+            if not items:
+                return True
+            
+            ttl = ttl or self.cache_config['default_ttl']
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in items.items():
+                full_key = self._build_key(self._build_namespace_key(namespace, key))
+                pipe.setex(full_key, ttl, self._serialize_value(value))
+            results = pipe.execute()
+            
+            with self.metrics_lock:
+                self.metrics['cache_sets'] += len(items)
+                self.metrics['operations_total'] += 1
+            
+            return all(results)
+            
+        except Exception as e:
+            self.logger.error(f"Cache set many error for namespace '{namespace}': {str(e)}")
+            return False
+    
+    def cache_delete(self, namespace: str, key: str) -> bool:
+        """Delete value from a namespace"""
+        try:
+            ns_key = self._build_namespace_key(namespace, key)
+            
+        except Exception:
+            return False
+        
+        return self.delete(ns_key)
+    
+    def invalidate_namespace(self, namespace: str) -> int:
+        """Invalidate a whole namespace in O(1) by bumping its generation"""
+        try:
+            generation = self.redis_client.incr(self._build_key(f"ns_gen:{namespace}"))
+            
+            # Entries of older generations are unreachable and expire by TTL
+            self.namespace_generations[namespace] = (generation, time.time())
+            
+            with self.metrics_lock:
+                self.metrics['namespace_invalidations'] += 1
+                self.metrics['operations_total'] += 1
+            
+            self.logger.info(f"Cache namespace '{namespace}' invalidated (generation {generation})")
+            return generation
+            
+        except Exception as e:
+            self.logger.error(f"Namespace invalidation error for '{namespace}': {str(e)}")
+            return 0
+    
+    def invalidate_tag(self, tag: str) -> int:
+        """Invalidate all entries registered under a tag, returns keys unlinked"""
+        try:
+            tag_key = self._build_key(f"tag:{tag}")
+            batch_size = self.namespace_config['unlink_batch_size']
+            unlinked = 0
+            batch = []
+            
+            # UNLINK frees memory off the main thread; batching bounds each call
+            for member in self.redis_client.sscan_iter(tag_key, count=batch_size):
+                batch.append(member)
+                if len(batch) >= batch_size:
+                    unlinked += self.redis_client.unlink(*batch)
+                    batch = []
+            
+            if batch:
+                unlinked += self.redis_client.unlink(*batch)
+            self.redis_client.unlink(tag_key)
+            
+            with self.metrics_lock:
+                self.metrics['tag_invalidations'] += 1
+                self.metrics['cache_deletes'] += unlinked
+                self.metrics['operations_total'] += 1
+            
+            return unlinked
+            
+        except Exception as e:
+            self.logger.error(f"Tag invalidation error for '{tag}': {str(e)}")
+            return 0
+    
+    def get_namespace_generation(self, namespace: str) -> int:
+        """Get current generation of a namespace (raises if Redis cannot be read)"""
+        try:
+            cached = self.namespace_generations.get(namespace)
+            if cached and time.time() - cached[1] < self.namespace_config['generation_cache_ttl']:
+                return cached[0]
+            
+            generation = int(self.redis_client.get(self._build_key(f"ns_gen:{namespace}")) or 0)
+            self.namespace_generations[namespace] = (generation, time.time())
+            return generation
+            
+        except Exception as e:
+            # Guessing generation 0 would serve entries from before the last invalidation
+            self.logger.error(f"Namespace generation error for '{namespace}': {str(e)}")
+            raise
+    
     # Hash Operations
     def hget(self, name: str, key: str) -> Any:
         """Get field from hash"""
@@ -375,7 +736,7 @@ class RedisManager:
             serialized_values = [self._serialize_value(v) for v in values]
             result = self.redis_client.lpush(full_name, *serialized_values)
             
-            with self.lock:
+            with self.metrics_lock:
                 self.metrics['queue_pushes'] += len(values)
                 self.metrics['operations_total'] += 1
             
@@ -392,7 +753,7 @@ class RedisManager:
             serialized_values = [self._serialize_value(v) for v in values]
             result = self.redis_client.rpush(full_name, *serialized_values)
             
-            with self.lock:
+            with self.metrics_lock:
                 self.metrics['queue_pushes'] += len(values)
                 self.metrics['operations_total'] += 1
             
@@ -408,7 +769,7 @@ class RedisManager:
             full_name = self._build_key(name)
             value = self.redis_client.lpop(full_name)
             
-            with self.lock:
+            with self.metrics_lock:
                 self.metrics['queue_pops'] += 1
                 self.metrics['operations_total'] += 1
             
@@ -424,7 +785,7 @@ class RedisManager:
             full_name = self._build_key(name)
             value = self.redis_client.rpop(full_name)
             
-            with self.lock:
+            with self.metrics_lock:
                 self.metrics['queue_pops'] += 1
                 self.metrics['operations_total'] += 1
             
@@ -446,7 +807,31 @@ class RedisManager:
                 original_name = name.replace(self.cache_config['key_prefix'], '')
                 deserialized_value = self._deserialize_value(value)
                 
-                with self.lock:
+                with self.metrics_lock:
+                    self.metrics['queue_pops'] += 1
+                    self.metrics['operations_total'] += 1
+                
+                return (original_name, deserialized_value)
+            
+            return None
+            
+        except Exception as e:
+            self.logger.error(f"Blocking list pop error: {str(e)}")
+            return None
+    
+    def brpop(self, names: List[str], timeout: int = 0) -> Optional[tuple]:
+        """Blocking pop from right of lists"""
+        try:
+            full_names = [self._build_key(name) for name in names]
+            result = self.redis_client.brpop(full_names, timeout)
+            
+            if result:
+                name, value = result
+                # Remove prefix from name
+                original_name = name.replace(self.cache_config['key_prefix'], '')
+                deserialized_value = self._deserialize_value(value)
+                
+                with self.metrics_lock:
                     self.metrics['queue_pops'] += 1
                     self.metrics['operations_total'] += 1
                 
@@ -547,32 +932,36 @@ class RedisManager:
                 'priority': priority,
                 'data': job_data,
                 'created_at': datetime.now().isoformat(),
+                'enqueued_at': time.time(),
                 'attempts': 0,
                 'max_retries': self.queue_config['max_retries']
             }
             
             # Add to priority queue
-            queue_key = f"queue:{priority}:{queue_name}"
-            return bool(self.lpush(queue_key, job))
+            return bool(self.lpush(self._build_queue_key(priority, queue_name), job))
             
         except Exception as e:
             self.logger.error(f"Job enqueue error: {str(e)}")
             return False
     
     def dequeue_job(self, queue_names: List[str], timeout: int = 10) -> Optional[Dict]:
-        """Dequeue job from queues (priority order)"""
+        """Dequeue job from queues (weighted-fair or strict priority order)"""
         try:
-            # Build queue keys in priority order
-            queue_keys = []
-            for priority in self.queue_config['priority_queues']:
-                for queue_name in queue_names:
-                    queue_keys.append(f"queue:{priority}:{queue_name}")
+            self._migrate_legacy_queues(queue_names)
+            queue_keys = self._build_queue_keys(queue_names)
+            
+            # Serve ready jobs by weight so lower priorities cannot starve
+            if self.queue_config['dequeue_strategy'] == 'weighted':
+                job = self._dequeue_weighted(queue_keys)
+                if job is not None:
+                    return job
             
-            # Blocking pop from queues
-            result = self.blpop(queue_keys, timeout)
+            # Blocking pop from queues (priority order, oldest job first)
+            result = self.brpop(queue_keys, timeout)
             
             if result:
                 queue_key, job_data = result
+                self._record_job_wait(job_data)
                 return job_data
             
             return None
@@ -581,6 +970,64 @@ class RedisManager:
             self.logger.error(f"Job dequeue error: {str(e)}")
             return None
     
+    def claim_job(self, queue_names: List[str], processing_key: str, timeout: int = 10) -> Optional[tuple]:
+        """Dequeue job into a processing list in one atomic step, returning (job, stored value).
+        
+        Each queue name has its own processing list (processing_key:{queue_name}) on the
+        shard node of its queues, so a claim never spans nodes.
+        """
+        try:
+            self._migrate_legacy_queues(queue_names)
+            queue_keys = self._build_queue_keys(queue_names)
+            deadline = time.time() + timeout
+            
+            while True:
+                # Weighted selection picks the queue to try first; the others follow in priority order
+                selected, promoted = None, False
+                if self.queue_config['dequeue_strategy'] == 'weighted':
+                    backlog = self._get_queue_backlog(queue_keys)
+                    if backlog:
+                        selected, promoted = self._select_weighted_queue(queue_keys, backlog)
+                
+                if selected or self.queue_config['dequeue_strategy'] != 'weighted':
+                    for claim_keys in self._build_claim_keys(queue_keys, processing_key, selected):
+                        result = self._get_script('job_claim')(keys=claim_keys)
+                        if result:
+                            return self._finish_claim(result, selected, promoted)
+                
+                if time.time() >= deadline:
+                    return None
+                time.sleep(self.queue_config['claim_poll_interval'])
+            
+        except Exception as e:
+            self.logger.error(f"Job claim error: {str(e)}")
+            return None
+    
+    def return_job(self, processing_key: str, job: Dict, value: str) -> bool:
+        """Move claimed job from a processing list back to the head of its queue"""
+        try:
+            queue_key = self._build_queue_key(job.get('priority', 'normal'), job['queue'])
+            return bool(self._get_script('job_return')(
+                keys=[self._build_key(self._build_processing_key(processing_key, job['queue'])), self._build_key(queue_key)],
+                args=[value]
+            ))
+            
+        except Exception as e:
+            self.logger.error(f"Job return error: {str(e)}")
+            return False
+    
+    def ack_jobs(self, processing_key: str, claimed: List[tuple]) -> int:
+        """Remove finished (job, stored value) pairs from their processing lists in one round trip"""
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for job, value in claimed:
+                pipe.lrem(self._build_key(self._build_processing_key(processing_key, job['queue'])), 1, value)
+            return sum(pipe.execute())
+            
+        except Exception as e:
+            self.logger.error(f"Job ack error: {str(e)}")
+            return 0
+    
     def requeue_job(self, job: Dict, delay: int = None) -> bool:
         """Requeue failed job with retry logic"""
         try:
@@ -605,6 +1052,35 @@ class RedisManager:
             self.logger.error(f"Job requeue error: {str(e)}")
             return False
     
+    def release_delayed_jobs(self, queue_name: str) -> int:
+        """Move delayed jobs whose retry time has passed back to their priority queue"""
+        try:
+            delayed_queue_key = f"queue:delayed:{queue_name}"
+            full_key = self._build_key(delayed_queue_key)
+            now = datetime.now()
+            released = 0
+            
+            for value in self.redis_client.lrange(full_key, 0, -1):
+                job = self._deserialize_value(value)
+                if not isinstance(job, dict):
+                    continue
+                
+                retry_at = job.get('retry_at')
+                if retry_at and datetime.fromisoformat(retry_at) > now:
+                    continue
+                
+                # Only the consumer that removes the entry re-enqueues it
+                if self.redis_client.lrem(full_key, 1, value):
+                    job['enqueued_at'] = time.time()
+                    self.lpush(self._build_queue_key(job.get('priority', 'normal'), queue_name), job)
+                    released += 1
+            
+            return released
+            
+        except Exception as e:
+            self.logger.error(f"Delayed job release error: {str(e)}")
+            return 0
+    
     def get_queue_stats(self, queue_name: str) -> Dict:
         """Get queue statistics"""
         try:
@@ -618,8 +1094,7 @@ class RedisManager:
             
             # Count jobs by priority
             for priority in self.queue_config['priority_queues']:
-                queue_key = f"queue:{priority}:{queue_name}"
-                count = self.llen(queue_key)
+                count = self.llen(self._build_queue_key(priority, queue_name))
                 stats['priority_breakdown'][priority] = count
                 stats['total_jobs'] += count
             
@@ -637,6 +1112,31 @@ class RedisManager:
             self.logger.error(f"Queue stats error: {str(e)}")
             return {'error': str(e)}
     
+    def get_queue_wait_metrics(self) -> Dict:
+        """Get job wait time statistics per priority class"""
+        try:
+            with self.metrics_lock:
+                samples = {priority: sorted(waits) for priority, waits in self.queue_wait_times.items()}
+            
+            stats = {}
+            for priority, waits in samples.items():
+                if not waits:
+                    continue
+                
+                stats[priority] = {
+                    'samples': len(waits),
+                    'avg_wait': round(sum(waits) / len(waits), 3),
+                    'p50_wait': round(waits[len(waits) // 2], 3),
+                    'p95_wait': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3),
+                    'max_wait': round(waits[-1], 3)
+                }
+            
+            return stats
+            
+        except Exception as e:
+            self.logger.error(f"Queue wait metrics error: {str(e)}")
+            return {}
+    
     # Rate Limiting
     def is_rate_limited(self, key: str, limit: int, window: int) -> bool:
         """Check if key is rate limited"""
@@ -669,84 +1169,474 @@ class RedisManager:
     
     # Distributed Locking
     @contextmanager
-    def lock(self, name: str, timeout: int = 10, blocking_timeout: int = 10):
-        """Distributed lock context manager"""
-        lock_key = f"lock:{name}"
-        full_key = self._build_key(lock_key)
-        lock_value = str(time.time())
-        
-        acquired = False
-        try:
-            # Try to acquire lock
-            end_time = time.time() + blocking_timeout
-            while time.time() < end_time:
-                if self.redis_client.set(full_key, lock_value, nx=True, ex=timeout):
-                    acquired = True
+    def lock(self, name: str, timeout: int = 10, blocking_timeout: int = 10, auto_renew: bool = False):
+        """Distributed lock context manager (yields handle with fencing token)"""
+        handle = self.acquire_lock(name, timeout, blocking_timeout, auto_renew)
+        
+        if handle is None:
+            raise Exception(f"Could not acquire lock '{name}' within {blocking_timeout} seconds")
+        
+        try:
+            yield handle
+            
+        finally:
+            self.release_lock(handle)
+    
+    def acquire_lock(self, name: str, timeout: int = 10, blocking_timeout: int = 10, auto_renew: bool = False) -> Optional['LockHandle']:
+        """Acquire distributed lock, waiting for release signals instead of polling"""
+        # Re-entrant within the owning thread
+        held_locks = self._get_held_locks()
+        if name in held_locks:
+            handle = held_locks[name]
+            handle.count += 1
+            self._record_lock_metric(name, 'reentrant')
+            return handle
+        
+        lock_key, fence_key, signal_key = self._build_lock_keys(name)
+        owner = uuid.uuid4().hex
+        if name not in self.seeded_fences:
+            self._seed_lock_fence(name, fence_key)
+        
+        start_time = time.time()
+        deadline = start_time + blocking_timeout
+        backoff = self.lock_config['min_backoff']
+        contended = False
+        
+        try:
+            while True:
+                token = self._get_script('lock_acquire')(keys=[lock_key, fence_key], args=[owner, int(timeout * 1000)])
+                if token:
                     break
-                time.sleep(0.1)
+                
+                contended = True
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._record_lock_metric(name, 'timeouts', wait_time=time.time() - start_time)
+                    return None
+                
+                # Block until the holder signals release; the backoff cap covers
+                # holders whose lease expires without releasing
+                wait = min(remaining, backoff * (1 + random.random() * 0.2))
+                self.redis_client.blpop([signal_key], timeout=wait)
+                backoff = min(backoff * 2, self.lock_config['max_backoff'])
+                
+        except Exception as e:
+            self.logger.error(f"Lock acquire error for '{name}': {str(e)}")
+            return None
+        
+        handle = LockHandle(name=name, owner=owner, token=int(token), timeout=timeout)
+        held_locks[name] = handle
+        
+        self._record_lock_metric(name, 'acquired', wait_time=time.time() - start_time, contended=contended)
+        
+        if auto_renew:
+            self._start_lock_watchdog(handle)
+        
+        return handle
+    
+    def release_lock(self, handle: 'LockHandle') -> bool:
+        """Release distributed lock and wake one waiter"""
+        try:
+            handle.count -= 1
+            if handle.count > 0:
+                return True
             
-            if not acquired:
-                raise Exception(f"Could not acquire lock '{name}' within {blocking_timeout} seconds")
+            self._get_held_locks().pop(handle.name, None)
             
-            yield
+            if handle.renew_stop:
+                handle.renew_stop.set()
             
-        finally:
-            if acquired:
-                # Release lock only if we own it
-                lua_script = """
-                if redis.call('get', KEYS[1]) == ARGV[1] then
-                    return redis.call('del', KEYS[1])
-                else
-                    return 0
-                end
-                """
-                self.redis_client.eval(lua_script, 1, full_key, lock_value)
+            lock_key, _, signal_key = self._build_lock_keys(handle.name)
+            released = self._get_script('lock_release')(
+                keys=[lock_key, signal_key],
+                args=[handle.owner, int(handle.timeout * 1000)]
+            )
+            
+            if not released:
+                handle.lost = True
+                self._record_lock_metric(handle.name, 'leases_lost')
+                self.logger.warning(f"Lock '{handle.name}' expired before release (token {handle.token})")
+            
+            return bool(released)
+            
+        except Exception as e:
+            self.logger.error(f"Lock release error for '{handle.name}': {str(e)}")
+            return False
+    
+    def get_lock_metrics(self) -> Dict:
+        """Get wait time and contention metrics per lock name"""
+        with self.metrics_lock:
+            snapshot = {name: dict(stats) for name, stats in self.lock_metrics.items()}
+        
+        for stats in snapshot.values():
+            attempts = stats['acquired'] + stats['timeouts']
+            stats['avg_wait'] = round(stats['total_wait'] / attempts, 4) if attempts else 0
+            stats['contention_rate'] = round(stats['contended'] / stats['acquired'], 4) if stats['acquired'] else 0
+        
+        return snapshot
     
     # Session Management
-    def create_session(self, session_id: str, user_data: Dict, ttl: int = 3600) -> bool:
-        """Create user session"""
+    # Sessions of a user live under the user's {u:<user_id>} hash-tag, next to the user's index,
+    # so every lookup passes the user_id the session was created with (None for anonymous sessions)
+    def create_session(self, session_id: str, user_data: Dict, ttl: int = None, user_id: str = None) -> bool:
+        """Create user session as a hash indexed by user"""
         try:
-            session_key = f"session:{session_id}"
-            session_data = {
-                'user_data': user_data,
-                'created_at': datetime.now().isoformat(),
-                'last_accessed': datetime.now().isoformat()
-            }
+            ttl = ttl or self.session_config['default_ttl']
+            user_id = user_id or user_data.get('user_id')
+            fields = self._build_session_fields(user_data, ttl, user_id)
+            
+            result = self._get_script('session_create')(
+                keys=self._build_session_keys(session_id, user_id),
+                args=[ttl, session_id] + fields
+            )
+            
+            with self.metrics_lock:
+                self.metrics['operations_total'] += 1
             
-            return self.set(session_key, session_data, ttl)
+            return bool(result)
             
         except Exception as e:
             self.logger.error(f"Session creation error: {str(e)}")
             return False
     
-    def get_session(self, session_id: str) -> Optional[Dict]:
-        """Get session data"""
+    def get_session(self, session_id: str, user_id: str = None) -> Optional[Dict]:
+        """Get session data, sliding its TTL in the same round trip"""
         try:
-            session_key = f"session:{session_id}"
-            session_data = self.get(session_key)
-            
-            if session_data:
-                # Update last accessed time
-                session_data['last_accessed'] = datetime.now().isoformat()
-                self.set(session_key, session_data)
+            values = self._read_session(session_id, user_id, [])
+            if values is None:
+                return self._migrate_legacy_session(session_id, user_id)
             
-            return session_data
+            return self._parse_session(values)
             
         except Exception as e:
             self.logger.error(f"Session retrieval error: {str(e)}")
             return None
     
-    def delete_session(self, session_id: str) -> bool:
-        """Delete session"""
+    def get_session_fields(self, session_id: str, fields: List[str], user_id: str = None) -> Optional[Dict]:
+        """Get selected session fields, sliding its TTL in the same round trip"""
         try:
-            session_key = f"session:{session_id}"
-            return self.delete(session_key)
+            self._check_session_fields(fields)
+            values = self._read_session(session_id, user_id, fields)
+            if values is None:
+                return None
+            
+            return {
+                field: self._deserialize_value(value) if value is not None else None
+                for field, value in zip(fields, values)
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Session field retrieval error: {str(e)}")
+            return None
+    
+    def update_session(self, session_id: str, updates: Dict, user_id: str = None) -> bool:
+        """Update session fields in place (no-op if the session has expired)"""
+        try:
+            self._check_session_fields(updates)
+            fields = []
+            for field, value in updates.items():
+                fields.extend([field, self._serialize_value(value)])
+            
+            result = self._get_script('session_update')(
+                keys=self._build_session_keys(session_id, user_id)[:1],
+                args=fields
+            )
+            
+            with self.metrics_lock:
+                self.metrics['operations_total'] += 1
+            
+            return bool(result)
+            
+        except Exception as e:
+            self.logger.error(f"Session update error: {str(e)}")
+            return False
+    
+    def delete_session(self, session_id: str, user_id: str = None) -> bool:
+        """Delete session and remove it from its user index"""
+        try:
+            deleted = self._get_script('session_delete')(
+                keys=self._build_session_keys(session_id, user_id),
+                args=[session_id]
+            )
+            
+            # A session not yet migrated would otherwise come back on the next read
+            deleted += self._delete_legacy_sessions(user_id, [session_id])
+            
+            with self.metrics_lock:
+                self.metrics['cache_deletes'] += 1
+                self.metrics['operations_total'] += 1
+            
+            return bool(deleted)
             
         except Exception as e:
             self.logger.error(f"Session deletion error: {str(e)}")
             return False
     
+    def get_user_sessions(self, user_id: str) -> List[str]:
+        """Get active session IDs for a user"""
+        try:
+            index_key = self._build_session_index_key(user_id)
+            session_ids = list(self.redis_client.smembers(index_key))
+            if not session_ids:
+                return []
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            for session_id in session_ids:
+                pipe.exists(self._build_session_key(session_id, user_id))
+            alive = pipe.execute()
+            
+            # Prune index entries whose sessions expired on their own
+            expired = [session_id for session_id, exists in zip(session_ids, alive) if not exists]
+            if expired:
+                self.redis_client.srem(index_key, *expired)
+            
+            return [session_id for session_id, exists in zip(session_ids, alive) if exists]
+            
+        except Exception as e:
+            self.logger.error(f"User session lookup error: {str(e)}")
+            return []
+    
+    def revoke_user_sessions(self, user_id: str) -> int:
+        """Revoke all sessions of a user, returns number of sessions removed"""
+        try:
+            index_key = self._build_session_index_key(user_id)
+            revoked = 0
+            
+            # Sessions created between reading the index and deleting are picked up by the next pass
+            for _ in range(3):
+                session_ids = list(self.redis_client.smembers(index_key))
+                if not session_ids:
+                    break
+                revoked += self._get_script('session_revoke')(
+                    keys=[index_key] + [self._build_session_key(session_id, user_id) for session_id in session_ids],
+                    args=session_ids
+                )
+            revoked += self._delete_legacy_sessions(user_id)
+            
+            with self.metrics_lock:
+                self.metrics['sessions_revoked'] += revoked
+                self.metrics['operations_total'] += 1
+            
+            self.logger.info(f"Revoked {revoked} sessions for user {user_id}")
+            return revoked
+            
+        except Exception as e:
+            self.logger.error(f"Session revocation error for user {user_id}: {str(e)}")
+            return 0
+    
     # Helper Methods
+    def _get_script(self, name: str):
+        """Get registered Lua script (EVALSHA with EVAL fallback)"""
+        if name not in self.scripts:
+            self.scripts[name] = self.redis_client.register_script(LUA_SCRIPTS[name])
+        return self.scripts[name]
+    
+    def _read_session(self, session_id: str, user_id: Optional[str], fields: List[str]) -> Optional[List]:
+        """Read session hash and slide TTL (touch throttled to touch_interval)"""
+        result = self._get_script('session_get')(
+            keys=[self._build_session_key(session_id, user_id)],
+            args=[time.time(), self.session_config['touch_interval']] + fields
+        )
+        
+        with self.metrics_lock:
+            self.metrics['operations_total'] += 1
+            if result is None:
+                self.metrics['cache_misses'] += 1
+                return None
+            
+            self.metrics['cache_hits'] += 1
+            if result[0]:
+                self.metrics['session_touches'] += 1
+        
+        return result[1]
+    
+    def _build_session_key(self, session_id: str, user_id: Optional[str]) -> str:
+        """Build session hash key on its user's hash-tag (anonymous sessions are tagged by their id)"""
+        if user_id:
+            return self._build_key(f"session:{{u:{user_id}}}:{session_id}")
+        return self._build_key(f"session:{{s:{session_id}}}")
+    
+    def _build_session_index_key(self, user_id: str) -> str:
+        """Build user session index key on the same hash-tag as the user's sessions"""
+        return self._build_key(f"session_index:{{u:{user_id}}}")
+    
+    def _build_session_keys(self, session_id: str, user_id: Optional[str]) -> List[str]:
+        """Build session key, followed by its user index key when the session has a user"""
+        keys = [self._build_session_key(session_id, user_id)]
+        if user_id:
+            keys.append(self._build_session_index_key(user_id))
+        return keys
+    
+    def _build_session_fields(self, user_data: Dict, ttl: int, user_id: Optional[str]) -> List:
+        """Build flat field/value list for a session hash"""
+        self._check_session_fields(user_data)
+        fields = [
+            '_created_at', datetime.now().isoformat(),
+            '_last_accessed', time.time(),
+            '_ttl', ttl,
+            '_user_id', user_id or ''
+        ]
+        for field, value in user_data.items():
+            fields.extend([field, self._serialize_value(value)])
+        return fields
+    
+    def _check_session_fields(self, fields: Union[Dict, List[str]]):
+        """Reject user fields that would collide with the '_'-prefixed session metadata"""
+        reserved = [field for field in fields if str(field).startswith('_')]
+        if reserved:
+            raise ValueError(f"Session field names starting with '_' are reserved for metadata: {reserved}")
+    
+    def _parse_session(self, values: List) -> Dict:
+        """Parse flat HGETALL reply of a session hash"""
+        session = dict(zip(values[::2], values[1::2]))
+        return {
+            'user_data': {
+                field: self._deserialize_value(value)
+                for field, value in session.items() if not field.startswith('_')
+            },
+            'user_id': session.get('_user_id') or None,
+            'created_at': session.get('_created_at'),
+            'last_accessed': datetime.fromtimestamp(float(session.get('_last_accessed', 0))).isoformat()
+        }
+    
+    def _migrate_legacy_session(self, session_id: str, user_id: Optional[str]) -> Optional[Dict]:
+        """Move a session stored under a previous key layout onto its user's hash-tag.
+        
+        Previous layouts: untagged session:<id> (string or hash format) and the shared
+        {sessions} hash-tag. The session is returned only to the user it belongs to.
+        """
+        for legacy_key, legacy_index in (
+                (self._build_key(f"session:{session_id}"), "session_index:{user_id}"),
+                (self._build_key(f"session:{{sessions}}:{session_id}"), "session_index:{{sessions}}:{user_id}")):
+            key_type = self.redis_client.type(legacy_key)
+            
+            if key_type == 'string':
+                session_data = self._deserialize_value(self.redis_client.get(legacy_key)) or {}
+                user_data = session_data.get('user_data', {})
+                owner = session_data.get('user_id') or user_data.get('user_id')
+            elif key_type == 'hash':
+                fields = self.redis_client.hgetall(legacy_key)
+                session = self._parse_session([item for pair in fields.items() for item in pair])
+                user_data, owner = session['user_data'], session['user_id']
+            else:
+                continue
+            
+            try:
+                self._check_session_fields(user_data)
+            except ValueError as e:
+                # Such a payload can never be migrated; drop it rather than retry on every read
+                self.logger.error(f"Legacy session {session_id} dropped: {str(e)}")
+                self._delete_legacy_sessions(owner, [session_id])
+                return None
+            
+            ttl = self.redis_client.ttl(legacy_key)
+            if not self.create_session(session_id, user_data, ttl if ttl > 0 else None, owner):
+                return None
+            
+            self.redis_client.delete(legacy_key)
+            if owner:
+                self.redis_client.srem(self._build_key(legacy_index.format(user_id=owner)), session_id)
+            
+            return self.get_session(session_id, owner) if (owner or None) == (user_id or None) else None
+        
+        return None
+    
+    def _delete_legacy_sessions(self, user_id: Optional[str], session_ids: Optional[List[str]] = None) -> int:
+        """Delete sessions of the previous key layouts with their index entries (all of the user's if no ids)"""
+        legacy_indexes = [
+            self._build_key(f"session_index:{user_id}"),
+            self._build_key(f"session_index:{{sessions}}:{user_id}")
+        ] if user_id else []
+        
+        if session_ids is None:
+            session_ids = set()
+            for index_key in legacy_indexes:
+                session_ids.update(self.redis_client.smembers(index_key))
+            if legacy_indexes:
+                self.redis_client.delete(*legacy_indexes)
+        elif session_ids:
+            for index_key in legacy_indexes:
+                self.redis_client.srem(index_key, *session_ids)
+        
+        legacy_keys = [
+            key for session_id in session_ids
+            for key in (self._build_key(f"session:{session_id}"), self._build_key(f"session:{{sessions}}:{session_id}"))
+        ]
+        return self.redis_client.delete(*legacy_keys) if legacy_keys else 0
+    
+    def _build_lock_keys(self, name: str) -> tuple:
+        """Build lock, fence and signal keys sharing one {hash-tag}"""
+        return tuple(self._build_key(f"{kind}:{{{name}}}") for kind in ('lock', 'lock_fence', 'lock_signal'))
+    
+    def _seed_lock_fence(self, name: str, fence_key: str):
+        """Carry the fencing counter over from the untagged fence key so tokens keep increasing"""
+        try:
+            legacy_token = self.redis_client.get(self._build_key(f"lock_fence:{name}"))
+            if legacy_token is not None:
+                # NX: never lower a counter another process already seeded or advanced
+                self.redis_client.set(fence_key, legacy_token, nx=True)
+            self.seeded_fences.add(name)
+            
+        except Exception as e:
+            self.logger.error(f"Lock fence seeding error for '{name}': {str(e)}")
+    
+    def _get_held_locks(self) -> Dict:
+        """Get locks held by the current thread"""
+        if not hasattr(self.lock_local, 'held'):
+            self.lock_local.held = {}
+        return self.lock_local.held
+    
+    def _start_lock_watchdog(self, handle: 'LockHandle'):
+        """Renew lock lease in the background while it is held"""
+        handle.renew_stop = threading.Event()
+        lock_key = self._build_lock_keys(handle.name)[0]
+        interval = max(0.1, handle.timeout * self.lock_config['renew_fraction'])
+        
+        def renew():
+            while not handle.renew_stop.wait(interval):
+                try:
+                    renewed = self._get_script('lock_renew')(keys=[lock_key], args=[handle.owner, int(handle.timeout * 1000)])
+                    if not renewed:
+                        handle.lost = True
+                        self._record_lock_metric(handle.name, 'leases_lost')
+                        self.logger.warning(f"Lock '{handle.name}' lease lost (token {handle.token})")
+                        return
+                    
+                    self._record_lock_metric(handle.name, 'renewals')
+                    
+                except Exception as e:
+                    self.logger.error(f"Lock renewal error for '{handle.name}': {str(e)}")
+        
+        threading.Thread(target=renew, daemon=True, name=f"lock-watchdog-{handle.name}").start()
+    
+    def _record_lock_metric(self, name: str, event: str, wait_time: float = 0.0, contended: bool = False):
+        """Record lock event for metrics"""
+        with self.metrics_lock:
+            if name not in self.lock_metrics:
+                self.lock_metrics[name] = {
+                    'acquired': 0,
+                    'contended': 0,
+                    'timeouts': 0,
+                    'reentrant': 0,
+                    'renewals': 0,
+                    'leases_lost': 0,
+                    'total_wait': 0.0,
+                    'max_wait': 0.0
+                }
+            
+            stats = self.lock_metrics[name]
+            stats[event] += 1
+            if contended:
+                stats['contended'] += 1
+            if wait_time:
+                stats['total_wait'] += wait_time
+                stats['max_wait'] = max(stats['max_wait'], wait_time)
+    
+    def _build_namespace_key(self, namespace: str, key: str) -> str:
+        """Build namespaced key carrying cache version and namespace generation"""
+        generation = self.get_namespace_generation(namespace)
+        return f"ns:{namespace}:v{self.cache_config['version']}:g{generation}:{key}"
+    
     def _build_key(self, key: str) -> str:
         """Build full cache key with prefix"""
         # Validate key length
@@ -798,9 +1688,209 @@ class RedisManager:
     
     def _generate_job_id(self) -> str:
         """Generate unique job ID"""
-        import uuid
         return f"job_{int(time.time())}_{str(uuid.uuid4())[:8]}"
     
+    def _build_queue_keys(self, queue_names: List[str]) -> List[str]:
+        """Build queue keys in priority order"""
+        queue_keys = []
+        for priority in self.queue_config['priority_queues']:
+            for queue_name in queue_names:
+                queue_keys.append(self._build_queue_key(priority, queue_name))
+        return queue_keys
+    
+    def _build_queue_key(self, priority: str, queue_name: str) -> str:
+        """Build priority queue key, hash-tagged by queue name to share a node with its processing lists"""
+        return f"queue:{priority}:{{{queue_name}}}"
+    
+    def _build_processing_key(self, processing_key: str, queue_name: str) -> str:
+        """Build a worker's processing list for one queue name"""
+        return f"{processing_key}:{{{queue_name}}}"
+    
+    def _get_queue_name(self, queue_key: str) -> str:
+        """Get queue name of a priority queue key"""
+        return queue_key.split(':', 2)[2].strip('{}')
+    
+    def _get_queue_weight(self, queue_key: str) -> float:
+        """Get dequeue weight for a queue key (priority weight x queue weight)"""
+        priority, queue_name = queue_key.split(':', 2)[1], self._get_queue_name(queue_key)
+        priority_weight = self.queue_config['priority_weights'].get(priority, 1)
+        queue_weight = self.queue_config['queue_weights'].get(queue_name, 1)
+        return max(0.01, float(priority_weight) * float(queue_weight))
+    
+    def _get_job_age(self, job: Any, now: float) -> float:
+        """Get seconds since a job was enqueued"""
+        if not isinstance(job, dict):
+            return 0.0
+        
+        enqueued_at = job.get('enqueued_at')
+        if enqueued_at is None and job.get('created_at'):
+            # Jobs queued before enqueued_at was recorded
+            enqueued_at = datetime.fromisoformat(job['created_at']).timestamp()
+        
+        return max(0.0, now - enqueued_at) if enqueued_at else 0.0
+    
+    def _get_queue_backlog(self, queue_keys: List[str]) -> Dict[str, float]:
+        """Get non-empty queues mapped to the age of their oldest job"""
+        # One round trip for all queue lengths (and oldest jobs)
+        pipe = self.redis_client.pipeline(transaction=False)
+        self._queue_backlog_reads(pipe, queue_keys)
+        return self._parse_queue_backlog(queue_keys, pipe.execute())
+    
+    def _queue_backlog_reads(self, pipe, queue_keys: List[str]):
+        """Queue the length (and oldest job) reads of every queue on a pipeline"""
+        for queue_key in queue_keys:
+            full_key = self._build_key(queue_key)
+            pipe.llen(full_key)
+            if self.queue_config['max_job_age']:
+                pipe.lindex(full_key, -1)
+    
+    def _parse_queue_backlog(self, queue_keys: List[str], results: List) -> Dict[str, float]:
+        """Map the backlog reads of non-empty queues to the age of their oldest job"""
+        check_age = bool(self.queue_config['max_job_age'])
+        step = 2 if check_age else 1
+        now = time.time()
+        backlog = {}
+        for i, queue_key in enumerate(queue_keys):
+            if not results[i * step]:
+                continue
+            
+            oldest = results[i * step + 1] if check_age else None
+            backlog[queue_key] = self._get_job_age(self._deserialize_value(oldest), now) if oldest else 0.0
+        
+        return backlog
+    
+    def _select_weighted_queue(self, queue_keys: List[str], backlog: Dict[str, float]) -> tuple:
+        """Select next queue by age promotion, then deficit round-robin"""
+        # Jobs waiting past max_job_age jump the line, oldest first
+        max_job_age = self.queue_config['max_job_age']
+        if max_job_age:
+            overdue = [(age, queue_key) for queue_key, age in backlog.items() if age >= max_job_age]
+            if overdue:
+                return max(overdue)[1], True
+        
+        active_keys = [queue_key for queue_key in queue_keys if queue_key in backlog]
+        
+        with self.metrics_lock:
+            # Idle queues do not bank credit
+            for queue_key in queue_keys:
+                if queue_key not in backlog:
+                    self.dequeue_deficits.pop(queue_key, None)
+            
+            start = 0
+            if self.dequeue_last_key in active_keys:
+                start = active_keys.index(self.dequeue_last_key)
+            
+            while True:
+                for offset in range(len(active_keys)):
+                    queue_key = active_keys[(start + offset) % len(active_keys)]
+                    if self.dequeue_deficits.get(queue_key, 0) >= 1:
+                        self.dequeue_deficits[queue_key] -= 1
+                        self.dequeue_last_key = queue_key
+                        return queue_key, False
+                
+                # Start a new round: every backlogged queue earns its quantum
+                for queue_key in active_keys:
+                    self.dequeue_deficits[queue_key] = self.dequeue_deficits.get(queue_key, 0) + self._get_queue_weight(queue_key)
+    
+    def _build_claim_keys(self, queue_keys: List[str], processing_key: str, selected: Optional[str]) -> List[List[str]]:
+        """KEYS of one job_claim per queue name (processing list first), the selected queue's name first"""
+        ordered_keys = [selected] + [key for key in queue_keys if key != selected] if selected else queue_keys
+        
+        groups = {}
+        for queue_key in ordered_keys:
+            groups.setdefault(self._get_queue_name(queue_key), []).append(queue_key)
+        
+        return [
+            [self._build_key(self._build_processing_key(processing_key, queue_name))] + [self._build_key(key) for key in group_keys]
+            for queue_name, group_keys in groups.items()
+        ]
+    
+    def _finish_claim(self, result: List, selected: Optional[str], promoted: bool) -> tuple:
+        """Turn a job_claim result into (job, stored value), recording metrics and wait time"""
+        queue_key, value = result
+        job = self._deserialize_value(value)
+        
+        with self.metrics_lock:
+            self.metrics['queue_pops'] += 1
+            self.metrics['operations_total'] += 1
+            if promoted and queue_key == self._build_key(selected):
+                job['promoted'] = True
+                self.metrics['jobs_promoted'] += 1
+        
+        self._record_job_wait(job)
+        return job, value
+    
+    def _dequeue_weighted(self, queue_keys: List[str]) -> Optional[Dict]:
+        """Pop next ready job using weighted-fair selection (non-blocking)"""
+        for _ in range(len(queue_keys) + 1):
+            backlog = self._get_queue_backlog(queue_keys)
+            if not backlog:
+                return None
+            
+            queue_key, promoted = self._select_weighted_queue(queue_keys, backlog)
+            job = self.rpop(queue_key)
+            
+            if job is None:
+                # Another consumer drained the queue since inspection
+                continue
+            
+            if promoted:
+                job['promoted'] = True
+                with self.metrics_lock:
+                    self.metrics['jobs_promoted'] += 1
+            
+            self._record_job_wait(job)
+            return job
+        
+        return None
+    
+    def _migrate_legacy_queues(self, queue_names: List[str]):
+        """Move jobs from untagged queue keys (queue:<priority>:<name>) to their tagged keys once"""
+        for queue_name in queue_names:
+            if queue_name in self.migrated_queues:
+                continue
+            
+            try:
+                for priority in self.queue_config['priority_queues']:
+                    legacy_key = self._build_key(f"queue:{priority}:{queue_name}")
+                    queue_key = self._build_key(self._build_queue_key(priority, queue_name))
+                    try:
+                        moved = self._get_script('queue_migrate')(keys=[legacy_key, queue_key])
+                    except ValueError:
+                        # Keys on different shard nodes: move job by job
+                        moved = 0
+                        while True:
+                            value = self.redis_client.lpop(legacy_key)
+                            if value is None:
+                                break
+                            self.redis_client.rpush(queue_key, value)
+                            moved += 1
+                    
+                    if moved:
+                        self.logger.info(f"Moved {moved} jobs from legacy queue {priority}:{queue_name}")
+                
+                self.migrated_queues.add(queue_name)
+                
+            except Exception as e:
+                self.logger.error(f"Legacy queue migration error for '{queue_name}': {str(e)}")
+    
+    def _record_job_wait(self, job: Any):
+        """Record how long a job waited in its priority class"""
+        try:
+            if not isinstance(job, dict):
+                return
+            
+            wait_time = self._get_job_age(job, time.time())
+            priority = job.get('priority', 'normal')
+            
+            with self.metrics_lock:
+                if priority not in self.queue_wait_times:
+                    self.queue_wait_times[priority] = deque(maxlen=self.queue_config['wait_sample_size'])
+                self.queue_wait_times[priority].append(wait_time)
+                
+        except Exception as e:
+            self.logger.error(f"Job wait recording error: {str(e)}")
+    
     def _move_to_dead_letter_queue(self, job: Dict) -> bool:
         """Move job to dead letter queue"""
         try:
@@ -839,6 +1929,10 @@ class RedisManager:
             monitoring_thread = threading.Thread(target=self._monitor_performance, daemon=True)
             monitoring_thread.start()
             
+            # Start keyspace memory sampling
+            self.keyspace_profiler = KeyspaceProfiler(self)
+            self.keyspace_profiler.start()
+            
             self.logger.info("Redis monitoring initialized")
             
         except Exception as e:
@@ -975,6 +2069,14 @@ if __name__ == "__main__":
         job = redis_manager.dequeue_job(['test_queue'], 1)
         print(f"Dequeued job: {job}")
         
+        # Test atomic claims over several queues (spread across shards when REDIS_NODES is set)
+        for queue_name in ['test_queue', 'test_queue_b', 'test_queue_c']:
+            redis_manager.enqueue_job(queue_name, {'task': f"{queue_name}_task"}, 'normal')
+        claimed = [redis_manager.claim_job(['test_queue', 'test_queue_b', 'test_queue_c'], 'queue:processing:example', 1)
+                   for _ in range(3)]
+        print(f"Claimed jobs: {[job['data']['task'] for job, _ in filter(None, claimed)]}")
+        print(f"Acknowledged: {redis_manager.ack_jobs('queue:processing:example', list(filter(None, claimed)))}")
+        
         # Get metrics
         metrics = redis_manager.get_metrics()
         print(f"Redis Metrics: {metrics}")
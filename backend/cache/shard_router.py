@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+"""
+Shard Router
+LoanFlow Personal Loan Management System
+
+This module spreads Redis keys across several nodes including:
+- Consistent hashing with virtual nodes
+- {hash-tag} support to keep related keys on one node
+- Multi-key commands and pipelines split per node with merged results
+- Lua scripts routed to the node owning their keys
+- Rebalancing when nodes are added or removed
+"""
+
+import logging
+import bisect
+import hashlib
+import os
+import time
+import redis
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Callable
+
+# Returns the first non-empty list among KEYS, popped with ARGV[1]
+POP_FIRST_SCRIPT = """
+    for _, key in ipairs(KEYS) do
+        local value = redis.call(ARGV[1], key)
+        if value then
+            return {key, value}
+        end
+    end
+    return nil
+"""
+
+class HashRing:
+    """Consistent hash ring with virtual nodes"""
+    
+    def __init__(self, nodes: Optional[List[str]] = None, replicas: int = 160):
+        self.replicas = replicas
+        self.nodes = set()
+        self.ring_hashes = []
+        self.ring_nodes = []
+        
+        for node in nodes or []:
+            self.add_node(node)
+    
+    def add_node(self, node: str):
+        """Add node with its virtual points"""
+        if node in self.nodes:
+            return
+        
+        self.nodes.add(node)
+        for i in range(self.replicas):
+            point = self._hash(f"{node}#{i}")
+            index = bisect.bisect(self.ring_hashes, point)
+            self.ring_hashes.insert(index, point)
+            self.ring_nodes.insert(index, node)
+    
+    def remove_node(self, node: str):
+        """Remove node and its virtual points"""
+        if node not in self.nodes:
+            return
+        
+        self.nodes.discard(node)
+        points = [(point, owner) for point, owner in zip(self.ring_hashes, self.ring_nodes) if owner != node]
+        self.ring_hashes = [point for point, _ in points]
+        self.ring_nodes = [owner for _, owner in points]
+    
+    def get_node(self, key: str) -> str:
+        """Get node owning a key"""
+        if not self.ring_hashes:
+            raise ValueError("Hash ring has no nodes")
+        
+        index = bisect.bisect(self.ring_hashes, self._hash(self.hash_tag(key)))
+        return self.ring_nodes[index % len(self.ring_nodes)]
+    
+    @staticmethod
+    def hash_tag(key: str) -> str:
+        """Get the part of a key that is hashed (Redis Cluster {tag} rules)"""
+        start = key.find('{')
+        if start != -1:
+            end = key.find('}', start + 1)
+            if end > start + 1:
+                return key[start + 1:end]
+        return key
+    
+    @staticmethod
+    def _hash(value: str) -> int:
+        """Hash value onto the ring"""
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+class ShardRouter:
+    """Redis client facade routing commands to nodes by consistent hashing"""
+    
+    # Commands whose first argument is their only key
+    SINGLE_KEY_COMMANDS = frozenset([
+        'get', 'set', 'setex', 'setnx', 'getset', 'incr', 'incrby', 'decr', 'decrby',
+        'expire', 'pexpire', 'expireat', 'ttl', 'pttl', 'persist', 'type', 'memory_usage',
+        'hget', 'hset', 'hsetnx', 'hmget', 'hgetall', 'hdel', 'hexists', 'hincrby', 'hlen', 'hkeys',
+        'lpush', 'rpush', 'lpop', 'rpop', 'llen', 'lindex', 'lrange', 'lrem', 'ltrim',
+        'sadd', 'srem', 'smembers', 'sismember', 'scard', 'sscan_iter',
+        'zadd', 'zcard', 'zrem', 'zrange', 'zrangebyscore', 'zremrangebyscore', 'zremrangebyrank', 'zscore',
+        'pfadd', 'xadd', 'xlen', 'xtrim', 'xack', 'xautoclaim', 'xgroup_create', 'xpending',
+        'xpending_range', 'xclaim', 'xrange', 'xrevrange'
+    ])
+    
+    # Commands taking several keys that must share a {hash-tag}, routed by the first key
+    CO_LOCATED_MULTI_KEY_COMMANDS = frozenset(['pfcount'])
+    
+    # Commands taking several keys whose per-node results are summed
+    SUMMED_MULTI_KEY_COMMANDS = frozenset(['delete', 'unlink', 'exists'])
+    
+    # Server statistics that must not be summed across nodes
+    MIN_INFO_FIELDS = frozenset(['uptime_in_seconds', 'uptime_in_days'])
+    
+    def __init__(self, clients: Dict[str, redis.Redis], config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        
+        self.config = {
+            'replicas': 160,  # Virtual nodes per node
+            'pubsub_node': None,  # Node carrying pub/sub (default: first node)
+            'blocking_poll_interval': 0.05,  # Max sleep between cross-node pop sweeps
+            'rebalance_batch_size': 500
+        }
+        if config:
+            self.config.update(config)
+        
+        self.clients = dict(clients)
+        self.ring = HashRing(list(self.clients), self.config['replicas'])
+        self.executor = ThreadPoolExecutor(max_workers=max(2, len(self.clients)), thread_name_prefix='shard-router')
+        self.pop_scripts = {}
+        
+        self.metrics = {
+            'split_commands': 0,
+            'split_pipelines': 0,
+            'keys_migrated': 0,
+            'rebalances': 0
+        }
+    
+    @classmethod
+    def from_urls(cls, urls: List[str], connection_kwargs: Optional[Dict] = None,
+                  config: Optional[Dict] = None) -> 'ShardRouter':
+        """Create router with one connection pool per node URL"""
+        clients = {}
+        for url in urls:
+            url = url.strip()
+            if '://' not in url:
+                url = f"redis://{url}"
+            pool = redis.ConnectionPool.from_url(url, **(connection_kwargs or {}))
+            clients[url] = redis.Redis(connection_pool=pool)
+        
+        return cls(clients, config)
+    
+    def get_node(self, key: str) -> str:
+        """Get node owning a key"""
+        return self.ring.get_node(key)
+    
+    def get_client(self, key: str) -> redis.Redis:
+        """Get client of the node owning a key"""
+        return self.clients[self.ring.get_node(key)]
+    
+    def get_metrics(self) -> Dict:
+        """Get routing metrics"""
+        return {
+            **self.metrics,
+            'nodes': sorted(self.clients)
+        }
+    
+    def __getattr__(self, name: str) -> Callable:
+        """Route single-key commands to the owning node"""
+        if name in ShardRouter.SINGLE_KEY_COMMANDS or name in ShardRouter.CO_LOCATED_MULTI_KEY_COMMANDS:
+            def command(key, *args, **kwargs):
+                return getattr(self.get_client(key), name)(key, *args, **kwargs)
+            return command
+        
+        raise AttributeError(f"'{type(self).__name__}' does not route command '{name}'")
+    
+    # Multi-key Commands
+    def delete(self, *keys: str) -> int:
+        """Delete keys on their nodes"""
+        return self._summed_command('delete', keys)
+    
+    def unlink(self, *keys: str) -> int:
+        """Unlink keys on their nodes"""
+        return self._summed_command('unlink', keys)
+    
+    def exists(self, *keys: str) -> int:
+        """Count existing keys across nodes"""
+        return self._summed_command('exists', keys)
+    
+    def mget(self, keys: List[str], *args: str) -> List:
+        """Get several keys, preserving request order"""
+        keys = ([keys] if isinstance(keys, str) else list(keys)) + list(args)
+        groups = self._group_keys(keys)
+        
+        values = {}
+        for node_keys, node_values in self._run_per_node(
+                lambda node, node_keys: (node_keys, self.clients[node].mget(node_keys)), groups):
+            values.update(zip(node_keys, node_values))
+        
+        return [values.get(key) for key in keys]
+    
+    def blpop(self, keys, timeout: float = 0) -> Optional[tuple]:
+        """Blocking left pop across nodes"""
+        return self._blocking_pop('blpop', keys, timeout)
+    
+    def brpop(self, keys, timeout: float = 0) -> Optional[tuple]:
+        """Blocking right pop across nodes"""
+        return self._blocking_pop('brpop', keys, timeout)
+    
+    def xread(self, streams: Dict, **kwargs):
+        """Read from streams owned by one node"""
+        return self.clients[self._get_streams_node(streams)].xread(streams, **kwargs)
+    
+    def xreadgroup(self, groupname: str, consumername: str, streams: Dict, **kwargs):
+        """Read from streams owned by one node through a consumer group"""
+        return self.clients[self._get_streams_node(streams)].xreadgroup(groupname, consumername, streams, **kwargs)
+    
+    def pipeline(self, transaction: bool = True, shard_hint: Any = None) -> 'ShardedPipeline':
+        """Create pipeline split per node (transactions are per node)"""
+        return ShardedPipeline(self, transaction)
+    
+    def register_script(self, script: str) -> 'ShardedScript':
+        """Register Lua script routed by its keys"""
+        return ShardedScript(self, script)
+    
+    # Server Commands
+    def ping(self) -> bool:
+        """Ping every node"""
+        return all(self._run_per_node(lambda node, _: self.clients[node].ping(), self._all_nodes()))
+    
+    def dbsize(self) -> int:
+        """Total keys across nodes"""
+        return sum(self._run_per_node(lambda node, _: self.clients[node].dbsize(), self._all_nodes()))
+    
+    def flushdb(self) -> bool:
+        """Flush every node"""
+        return all(self._run_per_node(lambda node, _: self.clients[node].flushdb(), self._all_nodes()))
+    
+    def info(self, section: Optional[str] = None) -> Dict:
+        """Server info aggregated across nodes"""
+        infos = self._run_per_node(
+            lambda node, _: self.clients[node].info(section) if section else self.clients[node].info(),
+            self._all_nodes()
+        )
+        
+        merged = {}
+        for info in infos:
+            for field, value in info.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and field in merged:
+                    if field in ShardRouter.MIN_INFO_FIELDS:
+                        merged[field] = min(merged[field], value)
+                    else:
+                        merged[field] += value
+                else:
+                    merged.setdefault(field, value)
+        
+        if 'used_memory' in merged:
+            merged['used_memory_human'] = f"{merged['used_memory'] / 1048576:.2f}M"
+        
+        return merged
+    
+    def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None, **kwargs):
+        """Iterate keys of every node"""
+        for node in list(self.clients):
+            yield from self.clients[node].scan_iter(match=match, count=count, **kwargs)
+    
+    def publish(self, channel: str, message: Any) -> int:
+        """Publish on the pub/sub node"""
+        return self._get_pubsub_client().publish(channel, message)
+    
+    def pubsub(self, **kwargs):
+        """Create pub/sub on the pub/sub node"""
+        return self._get_pubsub_client().pubsub(**kwargs)
+    
+    def close(self):
+        """Close every node client"""
+        for client in self.clients.values():
+            client.close()
+        self.executor.shutdown(wait=False)
+    
+    # Rebalancing
+    def add_node(self, name: str, client: redis.Redis, rebalance: bool = True) -> Dict:
+        """Add node to the ring and move the keys it now owns"""
+        self.clients[name] = client
+        self.ring.add_node(name)
+        self._resize_executor()
+        
+        self.logger.info(f"Shard node {name} added ({len(self.clients)} nodes)")
+        return self.rebalance() if rebalance else {}
+    
+    def remove_node(self, name: str) -> Dict:
+        """Remove node from the ring after moving its keys to their new owners"""
+        if name not in self.clients:
+            return {}
+        
+        self.ring.remove_node(name)
+        stats = self.rebalance(source_nodes=[name])
+        
+        self.clients.pop(name).close()
+        self.pop_scripts.pop(name, None)
+        
+        self.logger.info(f"Shard node {name} removed ({len(self.clients)} nodes)")
+        return stats
+    
+    def rebalance(self, source_nodes: Optional[List[str]] = None, match: Optional[str] = None,
+                  dry_run: bool = False) -> Dict:
+        """Move keys that live on a node other than their ring owner.
+        
+        Keys are copied with DUMP/RESTORE (TTL preserved) and then unlinked from
+        the source. Reads are routed to the new owner as soon as the ring changes,
+        so a key being moved is briefly invisible; run during low traffic.
+        """
+        stats = {'scanned': 0, 'moved': 0, 'moves': {}, 'dry_run': dry_run}
+        batch_size = self.config['rebalance_batch_size']
+        
+        for source in source_nodes or list(self.clients):
+            batch = []
+            for key in self.clients[source].scan_iter(match=match, count=batch_size):
+                stats['scanned'] += 1
+                target = self.ring.get_node(key)
+                if target != source:
+                    batch.append((key, target))
+                
+                if len(batch) >= batch_size:
+                    self._migrate_batch(source, batch, stats, dry_run)
+                    batch = []
+            
+            if batch:
+                self._migrate_batch(source, batch, stats, dry_run)
+        
+        if not dry_run:
+            self.metrics['rebalances'] += 1
+            self.metrics['keys_migrated'] += stats['moved']
+        
+        self.logger.info(f"Rebalance {'planned' if dry_run else 'complete'}: {stats['moved']} of {stats['scanned']} keys moved")
+        return stats
+    
+    # Helper Methods
+    def _group_keys(self, keys) -> Dict[str, List[str]]:
+        """Group keys by owning node, keeping first-seen node order"""
+        groups = {}
+        for key in keys:
+            groups.setdefault(self.ring.get_node(key), []).append(key)
+        return groups
+    
+    def _get_streams_node(self, streams: Dict) -> str:
+        """Node owning every stream of a read (blocking reads cannot span nodes)"""
+        nodes = {self.ring.get_node(stream) for stream in streams}
+        if len(nodes) > 1:
+            raise ValueError(f"Streams span several shard nodes, use a {{hash-tag}}: {list(streams)}")
+        return nodes.pop()
+    
+    def _all_nodes(self) -> Dict[str, List]:
+        """Node map covering every node"""
+        return {node: [] for node in self.clients}
+    
+    def _run_per_node(self, func: Callable, groups: Dict) -> List:
+        """Run func(node, items) for every node group, concurrently when several"""
+        if len(groups) == 1:
+            node, items = next(iter(groups.items()))
+            return [func(node, items)]
+        
+        futures = [self.executor.submit(func, node, items) for node, items in groups.items()]
+        return [future.result() for future in futures]
+    
+    def _summed_command(self, name: str, keys) -> int:
+        """Run a multi-key command per node and sum the results"""
+        if not keys:
+            return 0
+        
+        groups = self._group_keys(keys)
+        if len(groups) > 1:
+            self.metrics['split_commands'] += 1
+        
+        return sum(self._run_per_node(lambda node, node_keys: getattr(self.clients[node], name)(*node_keys), groups))
+    
+    def _blocking_pop(self, command: str, keys, timeout: float) -> Optional[tuple]:
+        """Pop from the first non-empty list, waiting across nodes if needed"""
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        groups = self._group_keys(keys)
+        
+        if len(groups) == 1:
+            return getattr(self.clients[next(iter(groups))], command)(keys, timeout)
+        
+        # Lists span nodes: sweep each node atomically in key order, backing off when empty
+        self.metrics['split_commands'] += 1
+        pop = 'lpop' if command == 'blpop' else 'rpop'
+        deadline = time.time() + timeout if timeout else None
+        wait = 0.005
+        
+        while True:
+            for node, node_keys in groups.items():
+                result = self._get_pop_script(node)(keys=node_keys, args=[pop])
+                if result:
+                    return tuple(result)
+            
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                wait = min(wait, remaining)
+            
+            time.sleep(wait)
+            wait = min(wait * 2, self.config['blocking_poll_interval'])
+    
+    def _get_pop_script(self, node: str):
+        """Get first-non-empty pop script registered on a node"""
+        if node not in self.pop_scripts:
+            self.pop_scripts[node] = self.clients[node].register_script(POP_FIRST_SCRIPT)
+        return self.pop_scripts[node]
+    
+    def _get_pubsub_client(self) -> redis.Redis:
+        """Get client of the pub/sub node"""
+        node = self.config['pubsub_node'] or next(iter(self.clients))
+        return self.clients[node]
+    
+    def _resize_executor(self):
+        """Grow the fan-out pool with the node count"""
+        if self.executor._max_workers < len(self.clients):
+            old_executor = self.executor
+            self.executor = ThreadPoolExecutor(max_workers=len(self.clients), thread_name_prefix='shard-router')
+            old_executor.shutdown(wait=False)
+    
+    def _get_raw_client(self, node: str) -> redis.Redis:
+        """Get binary-safe client for DUMP/RESTORE payloads"""
+        pool = self.clients[node].connection_pool
+        connection_kwargs = {**pool.connection_kwargs, 'decode_responses': False}
+        return redis.Redis(connection_pool=redis.ConnectionPool(connection_class=pool.connection_class, **connection_kwargs))
+    
+    def _migrate_batch(self, source: str, moves: List[tuple], stats: Dict, dry_run: bool):
+        """Copy a batch of keys to their owners and unlink them from the source"""
+        for _, target in moves:
+            route = f"{source}->{target}"
+            stats['moves'][route] = stats['moves'].get(route, 0) + 1
+        
+        if dry_run:
+            stats['moved'] += len(moves)
+            return
+        
+        source_client = self._get_raw_client(source)
+        pipe = source_client.pipeline(transaction=False)
+        for key, _ in moves:
+            pipe.dump(key)
+            pipe.pttl(key)
+        results = pipe.execute()
+        
+        by_target = {}
+        for i, (key, target) in enumerate(moves):
+            payload, ttl = results[2 * i], results[2 * i + 1]
+            
+            # Key expired or was deleted since the scan
+            if payload is None or ttl == -2:
+                continue
+            by_target.setdefault(target, []).append((key, payload, max(ttl, 0)))
+        
+        migrated = []
+        for target, entries in by_target.items():
+            target_client = self._get_raw_client(target)
+            pipe = target_client.pipeline(transaction=False)
+            for key, payload, ttl in entries:
+                pipe.restore(key, ttl, payload, replace=True)
+            pipe.execute()
+            target_client.close()
+            migrated.extend(key for key, _, _ in entries)
+        
+        if migrated:
+            source_client.unlink(*migrated)
+        source_client.close()
+        
+        stats['moved'] += len(migrated)
+
+class ShardedPipeline:
+    """Pipeline buffering commands and executing one pipeline per node"""
+    
+    def __init__(self, router: ShardRouter, transaction: bool = True):
+        self.router = router
+        self.transaction = transaction
+        self.commands = []  # (node, command name or node Script, args, kwargs)
+        self.results_map = []  # (command indexes, merge function) per queued call
+    
+    def __getattr__(self, name: str) -> Callable:
+        """Queue single-key or summed multi-key command"""
+        if name in ShardRouter.SINGLE_KEY_COMMANDS or name in ShardRouter.CO_LOCATED_MULTI_KEY_COMMANDS:
+            def queue(key, *args, **kwargs):
+                self._queue([(self.router.get_node(key), name, (key,) + args, kwargs)], None)
+                return self
+            return queue
+        
+        if name in ShardRouter.SUMMED_MULTI_KEY_COMMANDS:
+            def queue(*keys):
+                groups = self.router._group_keys(keys)
+                self._queue([(node, name, tuple(node_keys), {}) for node, node_keys in groups.items()],
+                            lambda results: sum(result for result in results if isinstance(result, int)))
+                return self
+            return queue
+        
+        raise AttributeError(f"'{type(self).__name__}' does not route command '{name}'")
+    
+    def execute(self, raise_on_error: bool = True) -> List:
+        """Execute buffered commands per node and merge results in call order"""
+        try:
+            by_node = {}
+            for index, (node, _, _, _) in enumerate(self.commands):
+                by_node.setdefault(node, []).append(index)
+            
+            if len(by_node) > 1:
+                self.router.metrics['split_pipelines'] += 1
+            
+            results = [None] * len(self.commands)
+            for indexes, node_results in self.router._run_per_node(
+                    lambda node, indexes: (indexes, self._execute_node(node, indexes, raise_on_error)), by_node):
+                for index, result in zip(indexes, node_results):
+                    results[index] = result
+            
+            return [
+                results[indexes[0]] if merge is None else merge([results[index] for index in indexes])
+                for indexes, merge in self.results_map
+            ]
+        
+        finally:
+            self.reset()
+    
+    def reset(self):
+        """Discard buffered commands"""
+        self.commands = []
+        self.results_map = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.reset()
+    
+    def __len__(self):
+        return len(self.results_map)
+    
+    def _queue(self, commands: List[tuple], merge: Optional[Callable]):
+        """Buffer node commands for one call"""
+        start = len(self.commands)
+        self.commands.extend(commands)
+        self.results_map.append((list(range(start, len(self.commands))), merge))
+    
+    def _execute_node(self, node: str, indexes: List[int], raise_on_error: bool) -> List:
+        """Execute one node's share of the pipeline"""
+        pipe = self.router.clients[node].pipeline(transaction=self.transaction)
+        for index in indexes:
+            _, name, args, kwargs = self.commands[index]
+            if isinstance(name, str):
+                getattr(pipe, name)(*args, **kwargs)
+            else:
+                # Node Script: queued as EVALSHA, loaded by the node pipeline if missing
+                name(client=pipe, **kwargs)
+        return pipe.execute(raise_on_error=raise_on_error)
+
+class ShardedScript:
+    """Lua script executed on the node owning all of its keys"""
+    
+    def __init__(self, router: ShardRouter, script: str):
+        self.router = router
+        self.script = script
+        self.node_scripts = {}
+    
+    def __call__(self, keys: Optional[List[str]] = None, args: Optional[List] = None, client: Any = None):
+        """Run on the owning node, or queue on a ShardedPipeline passed as client"""
+        keys = keys or []
+        nodes = {self.router.get_node(key) for key in keys}
+        
+        if len(nodes) > 1:
+            raise ValueError(f"Script keys span several shard nodes, use a {{hash-tag}}: {keys}")
+        
+        node = nodes.pop() if nodes else next(iter(self.router.clients))
+        if node not in self.node_scripts:
+            self.node_scripts[node] = self.router.clients[node].register_script(self.script)
+        
+        if isinstance(client, ShardedPipeline):
+            client._queue([(node, self.node_scripts[node], (), {'keys': keys, 'args': args or []})], None)
+            return client
+        
+        return self.node_scripts[node](keys=keys, args=args or [])
+
+if __name__ == "__main__":
+    # Example usage and testing against local redis-server processes, e.g.
+    #   redis-server --port 6380 & redis-server --port 6381 & redis-server --port 6382 &
+    #   REDIS_NODES=localhost:6380,localhost:6381,localhost:6382 python shard_router.py
+    urls = os.getenv('REDIS_NODES', 'localhost:6380,localhost:6381,localhost:6382').split(',')
+    router = ShardRouter.from_urls(urls[:-1], {'decode_responses': True})
+    
+    for i in range(1000):
+        router.set(f"test:{i}", i)
+    router.set("loan:{42}:status", "approved")
+    router.set("loan:{42}:score", 710)
+    
+    print(f"Keys per node: { {node: client.dbsize() for node, client in router.clients.items()} }")
+    print(f"Hash-tagged keys co-located: {router.get_node('loan:{42}:status') == router.get_node('loan:{42}:score')}")
+    
+    pipe = router.pipeline(transaction=False)
+    for i in range(5):
+        pipe.get(f"test:{i}")
+    print(f"Pipeline results: {pipe.execute()}")
+    
+    extra = urls[-1].strip()
+    stats = router.add_node(extra, redis.Redis.from_url(f"redis://{extra}", decode_responses=True))
+    print(f"Rebalance moved {stats['moved']} of {stats['scanned']} keys")
+    print(f"Values intact: {all(int(router.get(f'test:{i}')) == i for i in range(1000))}")
+    
+    router.delete(*[f"test:{i}" for i in range(1000)], "loan:{42}:status", "loan:{42}:score")
+    router.close()
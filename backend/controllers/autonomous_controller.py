@@ -18,9 +18,12 @@ import threading
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 import json
 import requests
+from controllers.scheduler import Scheduler, IntervalTrigger, CronTrigger, SKIP, COALESCE
+from workers.job_worker import JobWorkerManager
 
 class AutonomousBusinessController:
     def __init__(self, ai_services, business_services, redis_manager, db_manager):
@@ -44,9 +47,15 @@ class AutonomousBusinessController:
             'content_generated': 0,
             'seo_tasks_completed': 0,
             'customer_interactions': 0,
-            'fraud_detections': 0
+            'fraud_detections': 0,
+            'decisions_event_driven': 0,
+            'decisions_reconciled': 0
         }
         
+        # Submission to decision latency samples (seconds)
+        self.decision_latencies = deque(maxlen=1000)
+        self.decision_latency_lock = threading.Lock()
+        
         # Configuration
         self.config = {
             'max_daily_leads': 100,
@@ -54,48 +63,64 @@ class AutonomousBusinessController:
             'content_generation_frequency': 3600,  # 1 hour
             'seo_optimization_frequency': 7200,    # 2 hours
             'risk_assessment_threshold': 0.7,
-            'fraud_detection_sensitivity': 0.8
+            'fraud_detection_sensitivity': 0.8,
+            'decision_queue': 'ai_processing_queue',
+            'decision_consumers': 2,  # Jobs decided at once
+            'decision_marker_ttl': 86400,  # decided application markers (dedupe)
+            'decision_latency_target': 2.0,  # p95 seconds from submission to decision
+            'reconciliation_interval': 1800,  # slow sweep for applications missed by the queue
+            'scheduler_workers': 4,  # Engine cycles running at once
+            'pricing_optimization_interval': 3600,
+            'default_term_months': 36,  # Offer term when the application does not request one
+            'default_interest_rate': 0.125,  # Offer rate without a pricing optimizer
+            'daily_operations_cron': '0 6 * * *'
         }
+        
+        # Engine cycles run from one scheduler instead of one sleeping thread each
+        self.scheduler = Scheduler(redis_manager, {'max_workers': self.config['scheduler_workers']})
+        
+        # Loan processing jobs are consumed by the job worker runtime, in process so handlers share these services
+        self.decision_workers = JobWorkerManager(redis_manager, {
+            'queues': [self.config['decision_queue']],
+            'processes': 1,
+            'concurrency': self.config['decision_consumers'],
+            'prefetch': self.config['decision_consumers'],
+            'start_method': 'thread'
+        })
+        self.decision_workers.register_handler('loan_processing', self.process_loan_processing_job)
     
     def start(self):
         """Start the autonomous business controller"""
         self.logger.info("Starting Autonomous Business Controller...")
         self.running = True
         
-        # Start main processing loop
-        self.main_loop_thread = threading.Thread(target=self._main_processing_loop)
-        self.main_loop_thread.daemon = True
-        self.main_loop_thread.start()
-        
-        # Start customer acquisition engine
-        self.acquisition_thread = threading.Thread(target=self._customer_acquisition_loop)
-        self.acquisition_thread.daemon = True
-        self.acquisition_thread.start()
-        
-        # Start loan processing engine
-        self.loan_processing_thread = threading.Thread(target=self._loan_processing_loop)
-        self.loan_processing_thread.daemon = True
-        self.loan_processing_thread.start()
-        
-        # Start content generation engine
-        self.content_thread = threading.Thread(target=self._content_generation_loop)
-        self.content_thread.daemon = True
-        self.content_thread.start()
-        
-        # Start SEO optimization engine
-        self.seo_thread = threading.Thread(target=self._seo_optimization_loop)
-        self.seo_thread.daemon = True
-        self.seo_thread.start()
-        
-        # Start customer service engine
-        self.service_thread = threading.Thread(target=self._customer_service_loop)
-        self.service_thread.daemon = True
-        self.service_thread.start()
-        
-        # Start risk management engine
-        self.risk_thread = threading.Thread(target=self._risk_management_loop)
-        self.risk_thread.daemon = True
-        self.risk_thread.start()
+        # Start loan processing engine (retries, dead letters and orphan recovery come with the worker runtime)
+        self.decision_workers.start()
+        
+        # Periodic engines; error delays replace the regular period after a failed cycle
+        self.scheduler.add_job('main_processing', self._main_processing_cycle, IntervalTrigger(30),
+                               missed=SKIP, error_delay=60)
+        self.scheduler.add_job('customer_acquisition', self._customer_acquisition_cycle, IntervalTrigger(14400),
+                               jitter=300, error_delay=3600)
+        self.scheduler.add_job('loan_reconciliation', self._loan_processing_cycle,
+                               IntervalTrigger(self.config['reconciliation_interval']), jitter=60, error_delay=600)
+        self.scheduler.add_job('content_generation', self._content_generation_cycle,
+                               IntervalTrigger(self.config['content_generation_frequency']), jitter=120, error_delay=1800)
+        self.scheduler.add_job('seo_optimization', self._seo_optimization_cycle,
+                               IntervalTrigger(self.config['seo_optimization_frequency']), jitter=120, error_delay=3600)
+        self.scheduler.add_job('customer_service', self._customer_service_cycle, IntervalTrigger(180),
+                               jitter=10, error_delay=300)
+        self.scheduler.add_job('risk_management', self._risk_management_cycle, IntervalTrigger(600),
+                               jitter=30, error_delay=900)
+        # Approvals are priced from the last run, so the first run happens at start
+        self.scheduler.add_job('pricing_optimization', self._pricing_optimization_cycle,
+                               IntervalTrigger(self.config['pricing_optimization_interval']), jitter=60)
+        
+        # Last run is persisted, so a 06:00 missed while stopped or busy runs once on the next start
+        self.scheduler.add_job('daily_operations', self.run_daily_operations, CronTrigger(self.config['daily_operations_cron']),
+                               missed=COALESCE, misfire_grace=3600, persist=True)
+        
+        self.scheduler.start()
         
         self.logger.info("All autonomous engines started successfully")
     
@@ -104,267 +129,254 @@ class AutonomousBusinessController:
         self.logger.info("Stopping Autonomous Business Controller...")
         self.running = False
         
-        # Wait for threads to finish
-        if hasattr(self, 'main_loop_thread'):
-            self.main_loop_thread.join(timeout=5)
+        # Stop scheduling engine cycles and wait briefly for running ones
+        self.scheduler.stop()
+        
+        # Finish in-flight decisions; unstarted jobs go back to the queue
+        self.decision_workers.stop()
         
         self.task_executor.shutdown(wait=True)
         self.logger.info("Autonomous Business Controller stopped")
     
-    def _main_processing_loop(self):
-        """Main processing loop for handling queued tasks"""
-        while self.running:
-            try:
-                # Process pending tasks
-                self._process_pending_tasks()
-                
-                # Update system metrics
-                self._update_system_metrics()
-                
-                # Check for admin interventions
-                self._check_admin_interventions()
-                
-                time.sleep(30)  # Process every 30 seconds
-                
-            except Exception as e:
-                self.logger.error(f"Main processing loop error: {str(e)}")
-                time.sleep(60)
+    def _main_processing_cycle(self):
+        """Handle queued tasks, metrics and admin interventions"""
+        # Process pending tasks
+        self._process_pending_tasks()
+        
+        # Update system metrics
+        self._update_system_metrics()
+        
+        # Check for admin interventions
+        self._check_admin_interventions()
     
-    def _customer_acquisition_loop(self):
+    def _customer_acquisition_cycle(self):
         """Automated customer acquisition and lead generation"""
-        while self.running:
-            try:
-                self.logger.info("Running customer acquisition cycle...")
-                
-                # Generate leads through various channels
-                leads_generated = 0
-                
-                # 1. SEO-driven organic leads
-                organic_leads = self._generate_organic_leads()
-                leads_generated += organic_leads
-                
-                # 2. Social media automation
-                social_leads = self._generate_social_media_leads()
-                leads_generated += social_leads
-                
-                # 3. Email marketing campaigns
-                email_leads = self._run_email_campaigns()
-                leads_generated += email_leads
-                
-                # 4. Content marketing
-                content_leads = self._generate_content_marketing_leads()
-                leads_generated += content_leads
-                
-                # 5. Referral program automation
-                referral_leads = self._process_referral_program()
-                leads_generated += referral_leads
-                
-                self.metrics['leads_generated'] += leads_generated
-                
-                # Store daily metrics
-                self._store_daily_metrics('leads_generated', leads_generated)
-                
-                self.logger.info(f"Customer acquisition cycle completed. Generated {leads_generated} leads")
-                
-                # Wait before next cycle (4 hours)
-                time.sleep(14400)
-                
-            except Exception as e:
-                self.logger.error(f"Customer acquisition error: {str(e)}")
-                time.sleep(3600)  # Wait 1 hour on error
+        self.logger.info("Running customer acquisition cycle...")
+        
+        # Generate leads through various channels
+        leads_generated = 0
+        
+        # 1. SEO-driven organic leads
+        organic_leads = self._generate_organic_leads()
+        leads_generated += organic_leads
+        
+        # 2. Social media automation
+        social_leads = self._generate_social_media_leads()
+        leads_generated += social_leads
+        
+        # 3. Email marketing campaigns
+        email_leads = self._run_email_campaigns()
+        leads_generated += email_leads
+        
+        # 4. Content marketing
+        content_leads = self._generate_content_marketing_leads()
+        leads_generated += content_leads
+        
+        # 5. Referral program automation
+        referral_leads = self._process_referral_program()
+        leads_generated += referral_leads
+        
+        self.metrics['leads_generated'] += leads_generated
+        
+        # Store daily metrics
+        self._store_daily_metrics('leads_generated', leads_generated)
+        
+        self.logger.info(f"Customer acquisition cycle completed. Generated {leads_generated} leads")
+    
+    def process_loan_processing_job(self, job: Dict):
+        """Decide the application of a loan_processing job (raises so the worker retries it)"""
+        task = job.get('data') or {}
+        application = self._get_application(task['application_id'])
+        if not application:
+            # Reconciliation sweep picks it up once the row is visible
+            self.logger.warning(f"Application {task['application_id']} not found for decision")
+            return
+        
+        if self._process_application(application):
+            self.metrics['decisions_event_driven'] += 1
     
-    def _loan_processing_loop(self):
-        """Automated loan application processing and decision making"""
-        while self.running:
+    def _loan_processing_cycle(self):
+        """Reconciliation sweep for pending applications the decision queue missed"""
+        # Get pending applications
+        pending_applications = self._get_pending_applications()
+        
+        # Score the whole backlog with one model call per model
+        scores = self.ai_services.score_batch(pending_applications) if pending_applications else []
+        
+        for application, score in zip(pending_applications, scores):
             try:
-                # Get pending applications
-                pending_applications = self._get_pending_applications()
-                
-                for application in pending_applications:
-                    self.logger.info(f"Processing application ID: {application['id']}")
-                    
-                    # AI-powered risk assessment
-                    risk_score = self.ai_services.assess_loan_risk(application)
-                    
-                    # Fraud detection
-                    fraud_score = self.ai_services.detect_fraud(application)
-                    
-                    # Credit scoring
-                    credit_score = self.ai_services.calculate_credit_score(application)
-                    
-                    # Make automated decision
-                    decision = self._make_loan_decision(risk_score, fraud_score, credit_score)
-                    
-                    # Process decision
-                    if decision['approved']:
-                        self._approve_loan(application, decision)
-                        self.metrics['loans_approved'] += 1
-                    else:
-                        self._reject_loan(application, decision)
-                    
-                    self.metrics['applications_processed'] += 1
-                    
-                    # Generate automated communication
-                    self._send_decision_notification(application, decision)
-                
-                time.sleep(300)  # Check every 5 minutes
-                
+                if self._process_application(application, scores=score):
+                    self.metrics['decisions_reconciled'] += 1
             except Exception as e:
-                self.logger.error(f"Loan processing error: {str(e)}")
-                time.sleep(600)
+                # Left pending for the next sweep
+                self.logger.error(f"Reconciliation decision error for application {application['id']}: {str(e)}")
+    
+    def _process_application(self, application: Dict, scores: Optional[Dict] = None) -> bool:
+        """Run automated decision for an application exactly once (raises when the decision is not stored)"""
+        if application.get('status', 'pending') != 'pending' or application.get('automated_processing') == 0:
+            return False
+        
+        # Queue consumers and the sweep may both see an application
+        handle = self.redis_manager.acquire_lock(f"loan_decision:{application['id']}", timeout=60, blocking_timeout=0)
+        if handle is None:
+            return False
+        
+        try:
+            marker_key = f"loan_decided:{application['id']}"
+            if self.redis_manager.exists(marker_key):
+                return False
+            
+            self.logger.info(f"Processing application ID: {application['id']}")
+            
+            # AI-powered risk, fraud and credit scoring
+            if scores is None:
+                scores = self.ai_services.score_batch([application])[0]
+            
+            # Make automated decision
+            decision = self._make_loan_decision(scores['risk_score'], scores['fraud_score'], scores['credit_score'])
+            
+            # Process decision; a failed status update raises before the marker is written
+            documents = []
+            if decision['approved']:
+                self._price_offer(application, decision)
+                documents = self._approve_loan(application, decision)
+                self.metrics['loans_approved'] += 1
+            else:
+                self._reject_loan(application, decision)
+            
+            self.redis_manager.set(marker_key, decision, self.config['decision_marker_ttl'])
+            self.metrics['applications_processed'] += 1
+            
+            self._record_decision_latency(application)
+            self._publish_decision_event(application, decision)
+            
+            # Generate automated communication
+            self._send_decision_notification(application, decision, documents)
+            
+            return True
+            
+        finally:
+            self.redis_manager.release_lock(handle)
     
-    def _content_generation_loop(self):
+    def _content_generation_cycle(self):
         """Automated content generation for marketing and SEO"""
-        while self.running:
-            try:
-                self.logger.info("Running content generation cycle...")
-                
-                # Generate blog posts
-                blog_posts = self.ai_services.generate_blog_content()
-                for post in blog_posts:
-                    self._publish_blog_post(post)
-                
-                # Generate social media content
-                social_content = self.ai_services.generate_social_content()
-                self._schedule_social_posts(social_content)
-                
-                # Generate email templates
-                email_templates = self.ai_services.generate_email_templates()
-                self._update_email_templates(email_templates)
-                
-                # Generate landing page content
-                landing_pages = self.ai_services.generate_landing_pages()
-                self._update_landing_pages(landing_pages)
-                
-                # Generate FAQ content
-                faq_content = self.ai_services.generate_faq_content()
-                self._update_faq_section(faq_content)
-                
-                self.metrics['content_generated'] += len(blog_posts) + len(social_content) + len(email_templates)
-                
-                self.logger.info("Content generation cycle completed")
-                
-                # Wait for next cycle (1 hour)
-                time.sleep(self.config['content_generation_frequency'])
-                
-            except Exception as e:
-                self.logger.error(f"Content generation error: {str(e)}")
-                time.sleep(1800)  # Wait 30 minutes on error
+        self.logger.info("Running content generation cycle...")
+        
+        # Generate blog posts
+        blog_posts = self.ai_services.generate_blog_content()
+        for post in blog_posts:
+            self._publish_blog_post(post)
+        
+        # Generate social media content
+        social_content = self.ai_services.generate_social_content()
+        self._schedule_social_posts(social_content)
+        
+        # Generate email templates
+        email_templates = self.ai_services.generate_email_templates()
+        self._update_email_templates(email_templates)
+        
+        # Generate landing page content
+        landing_pages = self.ai_services.generate_landing_pages()
+        self._update_landing_pages(landing_pages)
+        
+        # Generate FAQ content
+        faq_content = self.ai_services.generate_faq_content()
+        self._update_faq_section(faq_content)
+        
+        self.metrics['content_generated'] += len(blog_posts) + len(social_content) + len(email_templates)
+        
+        self.logger.info("Content generation cycle completed")
     
-    def _seo_optimization_loop(self):
+    def _seo_optimization_cycle(self):
         """Automated SEO optimization and monitoring"""
-        while self.running:
-            try:
-                self.logger.info("Running SEO optimization cycle...")
-                
-                # Keyword research and optimization
-                keywords = self.ai_services.research_keywords()
-                self._optimize_for_keywords(keywords)
-                
-                # Technical SEO audit
-                seo_issues = self.ai_services.audit_technical_seo()
-                self._fix_seo_issues(seo_issues)
-                
-                # Backlink generation
-                backlinks = self.ai_services.generate_backlinks()
-                self._create_backlinks(backlinks)
-                
-                # Content optimization
-                content_optimizations = self.ai_services.optimize_existing_content()
-                self._apply_content_optimizations(content_optimizations)
-                
-                # Competitor analysis
-                competitor_insights = self.ai_services.analyze_competitors()
-                self._implement_competitor_strategies(competitor_insights)
-                
-                # Performance monitoring
-                seo_metrics = self.ai_services.monitor_seo_performance()
-                self._update_seo_metrics(seo_metrics)
-                
-                self.metrics['seo_tasks_completed'] += len(keywords) + len(seo_issues) + len(backlinks)
-                
-                self.logger.info("SEO optimization cycle completed")
-                
-                # Wait for next cycle (2 hours)
-                time.sleep(self.config['seo_optimization_frequency'])
-                
-            except Exception as e:
-                self.logger.error(f"SEO optimization error: {str(e)}")
-                time.sleep(3600)  # Wait 1 hour on error
+        self.logger.info("Running SEO optimization cycle...")
+        
+        # Keyword research and optimization
+        keywords = self.ai_services.research_keywords()
+        self._optimize_for_keywords(keywords)
+        
+        # Technical SEO audit
+        seo_issues = self.ai_services.audit_technical_seo()
+        self._fix_seo_issues(seo_issues)
+        
+        # Backlink generation
+        backlinks = self.ai_services.generate_backlinks()
+        self._create_backlinks(backlinks)
+        
+        # Content optimization
+        content_optimizations = self.ai_services.optimize_existing_content()
+        self._apply_content_optimizations(content_optimizations)
+        
+        # Competitor analysis
+        competitor_insights = self.ai_services.analyze_competitors()
+        self._implement_competitor_strategies(competitor_insights)
+        
+        # Performance monitoring
+        seo_metrics = self.ai_services.monitor_seo_performance()
+        self._update_seo_metrics(seo_metrics)
+        
+        self.metrics['seo_tasks_completed'] += len(keywords) + len(seo_issues) + len(backlinks)
+        
+        self.logger.info("SEO optimization cycle completed")
     
-    def _customer_service_loop(self):
+    def _customer_service_cycle(self):
         """Automated customer service and support"""
-        while self.running:
-            try:
-                # Process customer inquiries
-                inquiries = self._get_pending_inquiries()
-                
-                for inquiry in inquiries:
-                    # AI-powered response generation
-                    response = self.ai_services.generate_customer_response(inquiry)
-                    
-                    # Sentiment analysis
-                    sentiment = self.ai_services.analyze_sentiment(inquiry['message'])
-                    
-                    # Priority classification
-                    priority = self.ai_services.classify_inquiry_priority(inquiry)
-                    
-                    # Auto-respond or escalate
-                    if priority == 'low' and sentiment['confidence'] > 0.8:
-                        self._send_automated_response(inquiry, response)
-                    else:
-                        self._escalate_to_human(inquiry, priority, sentiment)
-                    
-                    self.metrics['customer_interactions'] += 1
-                
-                # Process chat conversations
-                self._process_chat_conversations()
-                
-                # Update knowledge base
-                self._update_knowledge_base()
-                
-                time.sleep(180)  # Check every 3 minutes
-                
-            except Exception as e:
-                self.logger.error(f"Customer service error: {str(e)}")
-                time.sleep(300)
+        # Process customer inquiries
+        inquiries = self._get_pending_inquiries()
+        
+        # Sentiment, priority and matched terms for the whole backlog in one pass
+        classifications = self.ai_services.classify_batch(inquiries)
+        
+        for inquiry, classification in zip(inquiries, classifications):
+            # Auto-respond or escalate (responses are only generated when sent)
+            if classification['priority'] == 'low' and classification['confidence'] > 0.8:
+                response = self.ai_services.generate_customer_response(inquiry)
+                self._send_automated_response(inquiry, response)
+            else:
+                self._escalate_to_human(inquiry, classification['priority'], classification)
+            
+            self.metrics['customer_interactions'] += 1
+        
+        # Process chat conversations
+        self._process_chat_conversations()
+        
+        # Update knowledge base
+        self._update_knowledge_base()
     
-    def _risk_management_loop(self):
+    def _risk_management_cycle(self):
         """Automated risk management and fraud detection"""
-        while self.running:
-            try:
-                # Monitor for fraudulent activities
-                suspicious_activities = self.ai_services.detect_suspicious_activities()
-                
-                for activity in suspicious_activities:
-                    # Analyze risk level
-                    risk_level = self.ai_services.assess_activity_risk(activity)
-                    
-                    if risk_level > self.config['fraud_detection_sensitivity']:
-                        # Flag for review
-                        self._flag_suspicious_activity(activity, risk_level)
-                        
-                        # Take automated protective measures
-                        self._implement_protective_measures(activity)
-                        
-                        self.metrics['fraud_detections'] += 1
-                
-                # Portfolio risk assessment
-                portfolio_risk = self.ai_services.assess_portfolio_risk()
-                self._update_risk_metrics(portfolio_risk)
-                
-                # Compliance monitoring
-                compliance_issues = self.ai_services.monitor_compliance()
-                self._address_compliance_issues(compliance_issues)
+        # Monitor for fraudulent activities
+        suspicious_activities = self.ai_services.detect_suspicious_activities()
+        
+        for activity in suspicious_activities:
+            # Analyze risk level
+            risk_level = self.ai_services.assess_activity_risk(activity)
+            
+            if risk_level > self.config['fraud_detection_sensitivity']:
+                # Flag for review
+                self._flag_suspicious_activity(activity, risk_level)
                 
-                time.sleep(600)  # Check every 10 minutes
+                # Take automated protective measures
+                self._implement_protective_measures(activity)
                 
-            except Exception as e:
-                self.logger.error(f"Risk management error: {str(e)}")
-                time.sleep(900)  # Wait 15 minutes on error
+                self.metrics['fraud_detections'] += 1
+        
+        # Portfolio risk assessment
+        portfolio_risk = self.ai_services.assess_portfolio_risk()
+        self._update_risk_metrics(portfolio_risk)
+        
+        # Compliance monitoring
+        compliance_issues = self.ai_services.monitor_compliance()
+        self._address_compliance_issues(compliance_issues)
+    
+    def _pricing_optimization_cycle(self):
+        """Re-optimize risk-based rates on the recent applicant pool"""
+        pricing_updates = self.ai_services.optimize_pricing()
+        priced = [update for update in pricing_updates if update.get('optimized_rate')]
+        self.logger.info(f"Pricing optimization completed for {len(priced)} of {len(pricing_updates)} risk bands")
     
     def run_daily_operations(self):
-        """Run comprehensive daily business operations"""
+        """Run comprehensive daily business operations (raises so the scheduler does not record a failed run)"""
         self.logger.info("Starting daily operations...")
         
         try:
@@ -394,6 +406,7 @@ class AutonomousBusinessController:
             
         except Exception as e:
             self.logger.error(f"Daily operations error: {str(e)}")
+            raise
     
     # Helper methods for business operations
     def _generate_organic_leads(self) -> int:
@@ -435,6 +448,16 @@ class AutonomousBusinessController:
             self.logger.error(f"Error getting pending applications: {str(e)}")
             return []
     
+    def _get_application(self, application_id: str) -> Optional[Dict]:
+        """Get loan application from database"""
+        try:
+            query = "SELECT * FROM loan_applications WHERE id = %s"
+            result = self.db_manager.execute_query(query, (application_id,))
+            return result[0] if result else None
+        except Exception as e:
+            self.logger.error(f"Error getting application {application_id}: {str(e)}")
+            return None
+    
     def _make_loan_decision(self, risk_score: float, fraud_score: float, credit_score: float) -> Dict:
         """Make automated loan decision based on AI analysis"""
         # Combine scores with weighted algorithm
@@ -452,46 +475,165 @@ class AutonomousBusinessController:
         
         return decision
     
-    def _approve_loan(self, application: Dict, decision: Dict):
-        """Process loan approval"""
+    def _price_offer(self, application: Dict, decision: Dict):
+        """Add offer terms at the optimized rate for the applicant's band and requested term"""
+        term_months = int(application.get('loan_term_months') or self.config['default_term_months'])
+        rate = self.ai_services.get_offer_rate(application.get('credit_score'), term_months)
+        decision['pricing'] = 'optimized'
+        
+        # Bands and terms without a feasible optimized offer are priced at the band's market rate
+        if rate is None:
+            rate = self.ai_services.get_market_rate(application.get('credit_score'))
+            decision['pricing'] = 'market'
+        if rate is None:
+            rate = self.config['default_interest_rate']
+            decision['pricing'] = 'default'
+        
+        amount = float(application.get('loan_amount') or 0.0)
+        monthly_rate = rate / 12
+        payment = amount * monthly_rate / (1 - (1 + monthly_rate) ** -term_months) if monthly_rate > 0 else amount / term_months
+        
+        decision.update({
+            'approved_amount': amount,
+            'interest_rate': rate,
+            'term_months': term_months,
+            'monthly_payment': round(payment, 2)
+        })
+    
+    def _approve_loan(self, application: Dict, decision: Dict) -> List[Dict]:
+        """Process loan approval, returning its documents (raises when the status update fails)"""
+        # Update application status
+        query = """
+            UPDATE loan_applications 
+            SET status = 'approved', 
+                decision_score = %s,
+                interest_rate = %s,
+                loan_term_months = %s,
+                monthly_payment = %s,
+                approved_date = NOW(),
+                automated_decision = 1
+            WHERE id = %s
+        """
+        # The column holds a percentage, offer rates are fractions
+        params = (decision['score'], round(decision['interest_rate'] * 100, 2), decision['term_months'],
+                  decision['monthly_payment'], application['id'])
+        self.db_manager.execute_query(query, params, fetch=False)
+        if self.business_services.fraud_ring_detector:
+            self.business_services.fraud_ring_detector.record_decision(application['id'], 'approved')
+        
+        self.logger.info(f"Loan approved for application {application['id']}")
+        
         try:
-            # Update application status
-            query = """
-                UPDATE loan_applications 
-                SET status = 'approved', 
-                    decision_score = %s,
-                    approved_date = NOW(),
-                    automated_decision = 1
-                WHERE id = %s
-            """
-            self.db_manager.execute_query(query, (decision['score'], application['id']))
-            
             # Generate loan documents
-            self.business_services.generate_loan_documents(application, decision)
-            
-            self.logger.info(f"Loan approved for application {application['id']}")
+            return self.business_services.generate_loan_documents(application, decision)
             
         except Exception as e:
-            self.logger.error(f"Error approving loan: {str(e)}")
+            # The approval stands; documents can be regenerated
+            self.logger.error(f"Loan document generation error: {str(e)}")
+            return []
     
     def _reject_loan(self, application: Dict, decision: Dict):
-        """Process loan rejection"""
+        """Process loan rejection (raises when the status update fails)"""
+        # Update application status
+        query = """
+            UPDATE loan_applications 
+            SET status = 'rejected', 
+                decision_score = %s,
+                rejected_date = NOW(),
+                automated_decision = 1
+            WHERE id = %s
+        """
+        self.db_manager.execute_query(query, (decision['score'], application['id']), fetch=False)
+        if self.business_services.fraud_ring_detector:
+            self.business_services.fraud_ring_detector.record_decision(application['id'], 'rejected')
+        
+        self.logger.info(f"Loan rejected for application {application['id']}")
+    
+    def _send_decision_notification(self, application: Dict, decision: Dict, documents: List[Dict]):
+        """Notify the applicant of an automated decision"""
         try:
-            # Update application status
-            query = """
-                UPDATE loan_applications 
-                SET status = 'rejected', 
-                    decision_score = %s,
-                    rejected_date = NOW(),
-                    automated_decision = 1
-                WHERE id = %s
-            """
-            self.db_manager.execute_query(query, (decision['score'], application['id']))
+            customer_name = f"{application.get('first_name', '')} {application.get('last_name', '')}".strip()
+            if decision['approved']:
+                notification_data = {
+                    'type': 'loan_approval',
+                    'recipient': application['email'],
+                    'data': {
+                        'customer_name': customer_name,
+                        'loan_amount': decision['approved_amount'],
+                        'interest_rate': decision['interest_rate'],
+                        'monthly_payment': decision['monthly_payment'],
+                        'documents': documents
+                    }
+                }
+            else:
+                notification_data = {
+                    'type': 'loan_rejection',
+                    'recipient': application['email'],
+                    'data': {
+                        'customer_name': customer_name,
+                        'reason': 'Application did not meet our current lending criteria'
+                    }
+                }
             
-            self.logger.info(f"Loan rejected for application {application['id']}")
+            self.business_services.send_notification(notification_data)
             
         except Exception as e:
-            self.logger.error(f"Error rejecting loan: {str(e)}")
+            # The decision stands; a failed notification must not fail the job
+            self.logger.error(f"Decision notification error for application {application['id']}: {str(e)}")
+    
+    def _record_decision_latency(self, application: Dict):
+        """Record time from application submission (its created_at) to decision"""
+        try:
+            # Measured from the row, not the job, so intake work before enqueueing counts too
+            created_at = application.get('created_at')
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at)
+            if not isinstance(created_at, datetime):
+                return
+            
+            latency = max(0.0, time.time() - created_at.timestamp())
+            with self.decision_latency_lock:
+                self.decision_latencies.append(latency)
+            
+            if latency > self.config['decision_latency_target']:
+                self.logger.warning(f"Decision for application {application['id']} took {latency:.2f}s")
+                
+        except Exception as e:
+            self.logger.error(f"Decision latency recording error: {str(e)}")
+    
+    def _publish_decision_event(self, application: Dict, decision: Dict):
+        """Publish application decided event"""
+        try:
+            event_bus = getattr(self.business_services, 'event_bus', None)
+            if event_bus:
+                event_bus.publish('application.decided', {
+                    'application_id': application['id'],
+                    'decision': 'approved' if decision['approved'] else 'rejected',
+                    'score': decision['score'],
+                    'interest_rate': decision.get('interest_rate')
+                })
+                
+        except Exception as e:
+            self.logger.error(f"Decision event publish error: {str(e)}")
+    
+    def get_decision_latency_metrics(self) -> Dict:
+        """Get submission to decision latency statistics"""
+        with self.decision_latency_lock:
+            latencies = sorted(self.decision_latencies)
+        
+        if not latencies:
+            return {'samples': 0, 'target_p95': self.config['decision_latency_target']}
+        
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return {
+            'samples': len(latencies),
+            'avg_latency': round(sum(latencies) / len(latencies), 3),
+            'p50_latency': round(latencies[len(latencies) // 2], 3),
+            'p95_latency': round(p95, 3),
+            'max_latency': round(latencies[-1], 3),
+            'target_p95': self.config['decision_latency_target'],
+            'within_target': p95 <= self.config['decision_latency_target']
+        }
     
     def get_active_task_count(self) -> int:
         """Get number of active tasks"""
@@ -505,6 +647,10 @@ class AutonomousBusinessController:
         """Get current system metrics"""
         return {
             'metrics': self.metrics,
+            'decision_latency': self.get_decision_latency_metrics(),
+            'customer_responses': self.ai_services.get_customer_response_metrics(),
+            'scheduler': self.scheduler.get_metrics(),
+            'decision_workers': self.decision_workers.get_metrics(),
             'active_tasks': self.get_active_task_count(),
             'queue_size': self.get_queue_size(),
             'uptime': self._get_uptime(),
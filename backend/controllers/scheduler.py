@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Job Scheduler
+LoanFlow Personal Loan Management System
+
+This module runs periodic controller work from one dispatcher including:
+- Min-heap of next run times served by a single dispatcher thread
+- Interval and cron (minute hour day month weekday) triggers with jitter
+- Overlap prevention (a job never runs concurrently with itself)
+- Missed-run policies: catch up, skip or coalesce
+- Error backoff per job and last-run persistence across restarts
+- Bounded executor and per-job timing metrics
+"""
+
+import logging
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Any, Callable
+from datetime import datetime, timedelta
+
+# Missed-run policies
+CATCH_UP = 'catch_up'  # Run once for every missed fire (up to max_catch_up)
+SKIP = 'skip'  # Drop fires that are later than the grace time
+COALESCE = 'coalesce'  # Run once however many fires were missed
+
+class IntervalTrigger:
+    """Fire every N seconds (first fire at start unless delayed)"""
+    
+    def __init__(self, seconds: float, initial_delay: float = 0.0):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = float(seconds)
+        self.initial_delay = float(initial_delay)
+    
+    def first_fire(self, now: float) -> float:
+        """First fire time after scheduler start"""
+        return now + self.initial_delay
+    
+    def next_fire(self, previous: float) -> float:
+        """Fire time following a previous fire time"""
+        return previous + self.seconds
+    
+    def __repr__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+class CronTrigger:
+    """Fire on a five-field cron expression (minute hour day-of-month month day-of-week, local time)"""
+    
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+    
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse_field(value, low, high) for value, (low, high) in zip(fields, self.FIELD_RANGES)
+        ]
+        # Like cron, a restricted day-of-month or day-of-week matches either one
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+    
+    def first_fire(self, now: float) -> float:
+        """First fire time after scheduler start"""
+        return self.next_fire(now)
+    
+    def next_fire(self, previous: float) -> float:
+        """First matching minute strictly after previous"""
+        moment = datetime.fromtimestamp(previous).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        
+        # Jump whole months, days and hours instead of scanning minutes (bounded for impossible dates)
+        for _ in range(5000):
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            if moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+                continue
+            return moment.timestamp()
+        
+        raise ValueError(f"Cron expression never fires: '{self.expression}'")
+    
+    def __repr__(self) -> str:
+        return f"cron '{self.expression}'"
+    
+    def _day_matches(self, moment: datetime) -> bool:
+        """Day-of-month and day-of-week check (Sunday is 0)"""
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day and self.any_weekday:
+            return True
+        if self.any_day:
+            return weekday
+        if self.any_weekday:
+            return day
+        return day or weekday
+    
+    def _parse_field(self, value: str, low: int, high: int) -> frozenset:
+        """Values of one field ('*', 'a-b', 'a,b', '*/n', 'a-b/n')"""
+        values = set()
+        for part in value.split(','):
+            span, _, step = part.partition('/')
+            if span == '*':
+                start, end = low, high
+            elif '-' in span:
+                start, end = (int(bound) for bound in span.split('-', 1))
+            else:
+                start = end = int(span)
+                if step:
+                    end = high
+            
+            if high == 6 and end == 7:
+                values.add(0)  # 7 is also Sunday
+                if start == 7:
+                    continue
+                end = 6
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field '{value}' out of range {low}-{high}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return frozenset(values)
+
+@dataclass
+class ScheduledJob:
+    """Registered job and its run state"""
+    name: str
+    func: Callable
+    trigger: Any
+    jitter: float = 0.0  # Up to this many seconds added to every fire
+    missed: str = COALESCE
+    misfire_grace: float = 60.0  # Seconds late a fire may start before it counts as missed
+    max_catch_up: int = 3
+    error_delay: Optional[float] = None  # Retry this long after a failure instead of the next fire
+    persist: bool = False  # Remember the last run so fires missed while stopped are handled on start
+    next_run: float = 0.0  # Next fire time (jitter not included)
+    due_at: float = 0.0  # next_run plus this fire's jitter
+    running: bool = False
+    pending: int = 0  # Runs owed by catch-up or coalesced overlaps
+    metrics: Dict[str, Any] = field(default_factory=lambda: {
+        'runs': 0,
+        'failures': 0,
+        'overlaps': 0,
+        'missed': 0,
+        'caught_up': 0,
+        'total_duration': 0.0,
+        'max_duration': 0.0,
+        'last_duration': 0.0,
+        'total_lag': 0.0,
+        'last_run': None,
+        'last_error': None
+    })
+
+class Scheduler:
+    """Heap-based scheduler dispatching jobs to a bounded thread pool"""
+    
+    def __init__(self, state_store=None, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.state_store = state_store  # Anything with get/set (RedisManager), for persisted jobs
+        
+        self.config = {
+            'max_workers': 4,
+            'state_key_prefix': 'scheduler:last_run',
+            'state_ttl': 30 * 86400,  # seconds; outlives the longest cron gap (monthly)
+            'stop_timeout': 10  # seconds to wait for running jobs on stop
+        }
+        if config:
+            self.config.update(config)
+        
+        self.jobs = {}
+        self.heap = []  # (due_at, sequence, job name); stale entries are skipped
+        self.sequence = 0
+        self.condition = threading.Condition()
+        self.running = False
+        self.dispatcher_thread = None
+        self.executor = None
+        self.futures = set()
+        self.started_at = None
+    
+    def add_job(self, name: str, func: Callable, trigger, jitter: float = 0.0, missed: str = COALESCE,
+                misfire_grace: float = 60.0, max_catch_up: int = 3, error_delay: Optional[float] = None,
+                persist: bool = False) -> ScheduledJob:
+        """Register a job (can be called before or after start)"""
+        if missed not in (CATCH_UP, SKIP, COALESCE):
+            raise ValueError(f"Unknown missed-run policy '{missed}'")
+        
+        job = ScheduledJob(name=name, func=func, trigger=trigger, jitter=jitter, missed=missed,
+                           misfire_grace=misfire_grace, max_catch_up=max_catch_up, error_delay=error_delay,
+                           persist=persist)
+        
+        with self.condition:
+            if name in self.jobs:
+                raise ValueError(f"Job '{name}' already registered")
+            self.jobs[name] = job
+            if self.running:
+                self._schedule_first(job, time.time())
+        
+        self.logger.info(f"Scheduled job '{name}' ({trigger}, missed runs: {missed})")
+        return job
+    
+    def remove_job(self, name: str):
+        """Unregister a job (a running instance finishes)"""
+        with self.condition:
+            self.jobs.pop(name, None)
+    
+    def start(self):
+        """Start the dispatcher and executor"""
+        with self.condition:
+            if self.running:
+                return
+            
+            self.running = True
+            self.started_at = time.time()
+            self.executor = ThreadPoolExecutor(max_workers=self.config['max_workers'], thread_name_prefix='scheduler')
+            for job in self.jobs.values():
+                self._schedule_first(job, self.started_at)
+        
+        self.dispatcher_thread = threading.Thread(target=self._dispatch_loop, daemon=True, name='scheduler-dispatcher')
+        self.dispatcher_thread.start()
+        self.logger.info(f"Scheduler started with {len(self.jobs)} jobs and {self.config['max_workers']} workers")
+    
+    def stop(self):
+        """Stop dispatching, cancel queued runs and wait briefly for running ones"""
+        with self.condition:
+            if not self.running:
+                return
+            self.running = False
+            self.condition.notify_all()
+            futures = list(self.futures)
+        
+        if self.dispatcher_thread:
+            self.dispatcher_thread.join(timeout=5)
+        
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        done, not_done = wait(futures, timeout=self.config['stop_timeout'])
+        if not_done:
+            self.logger.warning(f"{len(not_done)} scheduled jobs still running at shutdown")
+        self.logger.info("Scheduler stopped")
+    
+    def run_now(self, name: str) -> bool:
+        """Run a job as soon as a worker is free (subject to overlap prevention)"""
+        with self.condition:
+            job = self.jobs.get(name)
+            if not job or not self.running:
+                return False
+            if job.running:
+                job.metrics['overlaps'] += 1
+                return False
+            self._submit(job, time.time())
+            return True
+    
+    def get_metrics(self) -> Dict:
+        """Per-job timing and outcome metrics"""
+        with self.condition:
+            jobs = {}
+            for name, job in self.jobs.items():
+                runs = job.metrics['runs']
+                jobs[name] = {
+                    'trigger': repr(job.trigger),
+                    'missed_policy': job.missed,
+                    'running': job.running,
+                    'pending': job.pending,
+                    'next_run': datetime.fromtimestamp(job.due_at).isoformat() if job.due_at else None,
+                    **{key: value for key, value in job.metrics.items() if not key.startswith('total_')},
+                    'max_duration': round(job.metrics['max_duration'], 3),
+                    'avg_duration': round(job.metrics['total_duration'] / runs, 3) if runs else 0.0,
+                    'avg_lag': round(job.metrics['total_lag'] / runs, 3) if runs else 0.0
+                }
+            
+            return {
+                'running': self.running,
+                'jobs': jobs,
+                'active_runs': sum(1 for job in self.jobs.values() if job.running),
+                'max_workers': self.config['max_workers'],
+                'last_updated': datetime.now().isoformat()
+            }
+    
+    # Dispatching
+    def _dispatch_loop(self):
+        """Sleep until the earliest due job, then dispatch every due job"""
+        with self.condition:
+            while self.running:
+                now = time.time()
+                while self.heap and self.heap[0][0] <= now:
+                    due_at, _, name = heapq.heappop(self.heap)
+                    job = self.jobs.get(name)
+                    if job and job.due_at == due_at:
+                        self._fire(job, now)
+                
+                timeout = self.heap[0][0] - now if self.heap else None
+                self.condition.wait(timeout)
+    
+    def _fire(self, job: ScheduledJob, now: float):
+        """Apply overlap and missed-run policies to a due job, then schedule its next fire"""
+        # Fires owed since next_run: this one plus any that passed while it waited
+        fires = 1
+        fire_time = job.trigger.next_fire(job.next_run)
+        while fire_time <= now and fires <= job.max_catch_up:
+            fires += 1
+            fire_time = job.trigger.next_fire(fire_time)
+        while fire_time <= now:
+            job.metrics['missed'] += 1
+            fire_time = job.trigger.next_fire(fire_time)
+        
+        late = now - job.due_at > job.misfire_grace
+        runs = fires if job.missed == CATCH_UP else 1
+        if job.missed == SKIP and late:
+            runs = 0
+        if late or fires > 1:
+            job.metrics['missed'] += fires - runs
+        
+        if job.running:
+            # Never concurrent with itself: owed runs wait for the current one
+            job.metrics['overlaps'] += 1
+            if job.missed == CATCH_UP:
+                job.pending = min(job.max_catch_up, job.pending + runs)
+            elif job.missed == COALESCE:
+                job.pending = 1
+        elif runs:
+            job.pending = runs - 1
+            job.metrics['caught_up'] += runs - 1
+            self._submit(job, job.due_at)
+        
+        self._schedule(job, fire_time)
+    
+    def _submit(self, job: ScheduledJob, scheduled_for: float):
+        """Hand a run to the executor"""
+        job.running = True
+        future = self.executor.submit(self._run, job, scheduled_for)
+        self.futures.add(future)
+        future.add_done_callback(self.futures.discard)
+    
+    def _run(self, job: ScheduledJob, scheduled_for: float):
+        """Execute a job and record its timing (executor thread)"""
+        start = time.time()
+        error = None
+        try:
+            job.func()
+        except Exception as e:
+            error = e
+            self.logger.error(f"Scheduled job '{job.name}' error: {str(e)}")
+        
+        duration = time.time() - start
+        with self.condition:
+            job.running = False
+            metrics = job.metrics
+            metrics['runs'] += 1
+            metrics['total_duration'] += duration
+            metrics['max_duration'] = max(metrics['max_duration'], duration)
+            metrics['last_duration'] = round(duration, 3)
+            metrics['total_lag'] += max(0.0, start - scheduled_for)
+            metrics['last_run'] = datetime.fromtimestamp(start).isoformat()
+            
+            if error is not None:
+                metrics['failures'] += 1
+                metrics['last_error'] = str(error)
+                job.pending = 0
+                # Back off from the failure instead of the regular cadence
+                if job.error_delay is not None and self.running and job.name in self.jobs:
+                    self._schedule(job, time.time() + job.error_delay, jitter=False)
+            elif job.pending and self.running and job.name in self.jobs:
+                job.pending -= 1
+                self._submit(job, time.time())
+        
+        if job.persist and error is None:
+            self._save_last_run(job, start)
+    
+    # Helper Methods
+    def _schedule_first(self, job: ScheduledJob, now: float):
+        """First fire, treating fires missed while stopped per the job's policy"""
+        last_run = self._load_last_run(job) if job.persist else None
+        if last_run is not None:
+            missed_fire = job.trigger.next_fire(last_run)
+            if missed_fire <= now:
+                # Due immediately; _fire counts the rest and applies the policy
+                job.next_run = missed_fire
+                job.due_at = missed_fire
+                self._push(job)
+                return
+        
+        self._schedule(job, job.trigger.first_fire(now))
+    
+    def _schedule(self, job: ScheduledJob, run_at: float, jitter: bool = True):
+        """Set a job's next fire (callers hold the condition)"""
+        job.next_run = run_at
+        job.due_at = run_at + (random.uniform(0, job.jitter) if jitter and job.jitter else 0.0)
+        self._push(job)
+    
+    def _push(self, job: ScheduledJob):
+        """Add the job's due time to the heap and wake the dispatcher"""
+        self.sequence += 1
+        heapq.heappush(self.heap, (job.due_at, self.sequence, job.name))
+        self.condition.notify()
+    
+    def _load_last_run(self, job: ScheduledJob) -> Optional[float]:
+        """Persisted last run time"""
+        if not self.state_store:
+            return None
+        try:
+            value = self.state_store.get(f"{self.config['state_key_prefix']}:{job.name}")
+            return float(value) if value is not None else None
+        except Exception as e:
+            self.logger.error(f"Scheduler state load error for '{job.name}': {str(e)}")
+            return None
+    
+    def _save_last_run(self, job: ScheduledJob, started: float):
+        """Persist last run time"""
+        if not self.state_store:
+            return
+        try:
+            self.state_store.set(f"{self.config['state_key_prefix']}:{job.name}", started, self.config['state_ttl'])
+        except Exception as e:
+            self.logger.error(f"Scheduler state save error for '{job.name}': {str(e)}")
+
+if __name__ == "__main__":
+    # Example usage and testing
+    logging.basicConfig(level=logging.INFO)
+    
+    scheduler = Scheduler(config={'max_workers': 2})
+    scheduler.add_job('fast', lambda: time.sleep(0.05), IntervalTrigger(0.2), jitter=0.05)
+    scheduler.add_job('slow', lambda: time.sleep(0.7), IntervalTrigger(0.25), missed=COALESCE)
+    scheduler.add_job('flaky', lambda: 1 / 0, IntervalTrigger(0.3), error_delay=0.5)
+    
+    trigger = CronTrigger('0 6 * * *')
+    print(f"Next 06:00 after now: {datetime.fromtimestamp(trigger.next_fire(time.time()))}")
+    print(f"Next weekday 9:30: {datetime.fromtimestamp(CronTrigger('30 9 * * 1-5').next_fire(time.time()))}")
+    
+    scheduler.start()
+    time.sleep(2)
+    scheduler.stop()
+    
+    for name, metrics in scheduler.get_metrics()['jobs'].items():
+        print(name, metrics)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Async Database Manager
+LoanFlow Personal Loan Management System
+
+This module provides asyncio access to the database including:
+- Bounded executor offload of blocking MySQL calls
+- Query result caching shared with DatabaseManager
+- Transactions run on a single pooled connection
+- Concurrency and wait time metrics
+
+No async MySQL driver is part of the stack, so queries run on a thread pool
+sized to the connection pool. Callers beyond that limit wait on the event
+loop instead of piling up threads or pool checkouts.
+"""
+
+import logging
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple, Callable
+from datetime import datetime
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.database_manager import DatabaseManager
+
+class AsyncDatabaseManager:
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, max_concurrency: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.status = 'initializing'
+        
+        # Sync manager owns the connection pool, query cache and metrics
+        self.db_manager = db_manager or DatabaseManager()
+        self.max_concurrency = max_concurrency or self.db_manager.config['pool_size']
+        
+        self.executor = None
+        self.semaphore = None
+        
+        # Async specific metrics
+        self.async_metrics = {
+            'queries_in_flight': 0,
+            'queries_waiting': 0,
+            'max_queries_waiting': 0,
+            'cache_hits': 0,
+            'avg_wait_time': 0
+        }
+    
+    async def initialize(self):
+        """Initialize executor and the underlying database manager"""
+        try:
+            self.logger.info("Initializing Async Database Manager...")
+            
+            self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='async-db')
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+            
+            if self.db_manager.connection_pool is None:
+                await self._run(self.db_manager.initialize)
+            
+            self.status = 'healthy'
+            self.logger.info(f"Async Database Manager initialized ({self.max_concurrency} concurrent queries)")
+            
+        except Exception as e:
+            self.logger.error(f"Async Database Manager initialization failed: {str(e)}")
+            self.status = 'error'
+            raise
+    
+    async def shutdown(self):
+        """Shutdown executor (the database manager is shut down by its owner)"""
+        try:
+            self.logger.info("Shutting down Async Database Manager...")
+            
+            if self.executor:
+                self.executor.shutdown(wait=True)
+            
+            self.status = 'stopped'
+            self.logger.info("Async Database Manager shutdown complete")
+            
+        except Exception as e:
+            self.logger.error(f"Async database shutdown error: {str(e)}")
+    
+    def get_status(self) -> str:
+        """Get async database manager status"""
+        return self.status
+    
+    def get_metrics(self) -> Dict:
+        """Get database metrics including async concurrency"""
+        return {
+            **self.db_manager.get_metrics(),
+            **self.async_metrics,
+            'max_concurrency': self.max_concurrency,
+            'async_status': self.status,
+            'last_updated': datetime.now().isoformat()
+        }
+    
+    # Query Execution
+    async def execute_query(self, query: str, params: Tuple = None, fetch: bool = True) -> Optional[List[Dict]]:
+        """Execute database query without blocking the event loop"""
+        # Cached SELECT results are served on the loop without a thread hop
+        if fetch and params and query.strip().upper().startswith('SELECT'):
+            cached_result = self.db_manager._get_cached_result(self.db_manager._generate_cache_key(query, params))
+            if cached_result is not None:
+                self.async_metrics['cache_hits'] += 1
+                return cached_result
+        
+        return await self._run(self.db_manager.execute_query, query, params, fetch)
+    
+    async def execute_many(self, query: str, params_list: List[Tuple]) -> bool:
+        """Execute query with multiple parameter sets"""
+        return await self._run(self.db_manager.execute_many, query, params_list)
+    
+    async def fetch_one(self, query: str, params: Tuple = None) -> Optional[Dict]:
+        """Execute query and return the first row"""
+        result = await self.execute_query(query, params)
+        return result[0] if result else None
+    
+    async def run_in_transaction(self, func: Callable, *args) -> Any:
+        """Run func(connection, *args) inside a transaction on a worker thread"""
+        def transaction_call():
+            with self.db_manager.transaction() as connection:
+                return func(connection, *args)
+        
+        return await self._run(transaction_call)
+    
+    async def health_check(self) -> Dict:
+        """Run database health check"""
+        return await self._run(self.db_manager.health_check)
+    
+    # Helper Methods
+    async def _run(self, func: Callable, *args) -> Any:
+        """Run blocking call on the bounded executor"""
+        wait_start = time.time()
+        self.async_metrics['queries_waiting'] += 1
+        self.async_metrics['max_queries_waiting'] = max(
+            self.async_metrics['max_queries_waiting'], self.async_metrics['queries_waiting']
+        )
+        
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.async_metrics['queries_waiting'] -= 1
+        
+        self._update_wait_metrics(time.time() - wait_start)
+        self.async_metrics['queries_in_flight'] += 1
+        
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+            
+        finally:
+            self.async_metrics['queries_in_flight'] -= 1
+            self.semaphore.release()
+    
+    def _update_wait_metrics(self, wait_time: float):
+        """Update average executor wait time (moving average)"""
+        if self.async_metrics['avg_wait_time'] == 0:
+            self.async_metrics['avg_wait_time'] = wait_time
+        else:
+            self.async_metrics['avg_wait_time'] = self.async_metrics['avg_wait_time'] * 0.9 + wait_time * 0.1
+
+if __name__ == "__main__":
+    # Example usage and testing
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    async def main():
+        async_db = AsyncDatabaseManager()
+        await async_db.initialize()
+        
+        # Many concurrent queries bounded by the connection pool size
+        results = await asyncio.gather(*[
+            async_db.execute_query("SELECT COUNT(*) as user_count FROM users WHERE id > %s", (i,))
+            for i in range(100)
+        ])
+        print(f"Ran {len(results)} queries")
+        print(f"Metrics: {async_db.get_metrics()}")
+        
+        await async_db.shutdown()
+        async_db.db_manager.shutdown()
+    
+    asyncio.run(main())
@@ -363,6 +363,9 @@ class DatabaseManager:
                 loan_purpose VARCHAR(100),
                 credit_score INT,
                 existing_debts DECIMAL(12,2),
+                interest_rate DECIMAL(5,2),
+                loan_term_months INT,
+                monthly_payment DECIMAL(12,2),
                 bank_account_verified BOOLEAN DEFAULT FALSE,
                 identity_verified BOOLEAN DEFAULT FALSE,
                 income_verified BOOLEAN DEFAULT FALSE,
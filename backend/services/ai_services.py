@@ -13,23 +13,51 @@ This module provides comprehensive AI services for:
 """
 
 import logging
+import hashlib
 import json
+import threading
+import time
 import requests
-import openai
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterator
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.preprocessing import StandardScaler
 import joblib
 import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.model_registry import ModelRegistry
+from services.llm_engine import LLMEngine, LLMStreamInterrupted, format_sse
+from services.llm_response_cache import LLMResponseCache
+from services.knowledge_base import KnowledgeBase
+from services.keyword_matcher import KeywordMatcher
+from services.velocity_features import VelocityFeatureService
+from services.duplicate_detector import DuplicateDetector
+from services.fraud_ring_detector import get_fraud_ring_detector
+from services.portfolio_risk import PortfolioRiskEngine
+from services.pricing_optimizer import PricingOptimizer
 
 class AIServiceManager:
+    SCORED_MODELS = ['risk_model', 'fraud_model', 'credit_model']
+    
+    # Customer message keyword groups (matched as word prefixes, so 'thank' covers 'thanks')
+    SENTIMENT_KEYWORDS = {
+        'positive': ['great', 'excellent', 'good', 'happy', 'satisfied', 'thank', 'appreciate'],
+        'negative': ['bad', 'terrible', 'awful', 'angry', 'frustrated', 'disappointed', 'complaint']
+    }
+    PRIORITY_KEYWORDS = {
+        'high': ['urgent', 'emergency', 'complaint', 'fraud', 'dispute', 'legal'],
+        'medium': ['payment', 'repayment', 'due', 'overdue', 'late', 'problem', 'issue', 'help']
+    }
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.models = {}
-        self.scalers = {}
         self.status = 'initializing'
+        self.redis_manager = None
+        self.db_manager = None
         
         # AI Configuration
         self.config = {
@@ -39,18 +67,82 @@ class AIServiceManager:
             'temperature': 0.7,
             'risk_model_path': 'models/risk_assessment.joblib',
             'fraud_model_path': 'models/fraud_detection.joblib',
-            'credit_model_path': 'models/credit_scoring.joblib'
+            'credit_model_path': 'models/credit_scoring.joblib',
+            'model_registry_dir': os.getenv('MODEL_REGISTRY_DIR', 'models/registry'),
+            'score_cache_size': 10000,  # Local entries (LRU)
+            'score_cache_ttl': 86400,  # Redis entry lifetime in seconds
+            'knowledge_base_min_confidence': 0.6,  # Share of an inquiry's terms a local answer must cover
+            'duplicate_weight': 0.5,  # Fraud risk contributed by a verified duplicate (times its similarity)
+            'ring_weight': 0.6,  # Fraud risk contributed by a shared-identifier ring (times its ring risk)
+            'portfolio_loss_rate_warning': 0.05,  # Expected loss share of exposure that needs attention
+            'portfolio_loss_rate_critical': 0.08
+        }
+        
+        # Versioned scoring models (fitted model plus preprocessing)
+        self.model_registry = ModelRegistry({'registry_dir': self.config['model_registry_dir']})
+        
+        # Score memoization keyed by model versions and feature hash
+        self.score_cache = OrderedDict()
+        self.score_cache_signature = None
+        self.score_cache_lock = threading.Lock()
+        self.score_cache_metrics = {
+            'local_hits': 0,
+            'redis_hits': 0,
+            'misses': 0
+        }
+        
+        # Concurrent, rate limited content generation (OpenAI-compatible API)
+        self.llm_engine = LLMEngine({
+            'api_key': self.config['openai_api_key'],
+            'model': self.config['model_version'],
+            'max_tokens': self.config['max_tokens'],
+            'temperature': self.config['temperature']
+        })
+        
+        # Generated content keyed by its inputs (disk until Redis is attached)
+        self.response_cache = LLMResponseCache()
+        
+        # Local retrieval of FAQ-shaped answers before falling back to the LLM
+        self.knowledge_base = KnowledgeBase({'min_confidence': self.config['knowledge_base_min_confidence']})
+        self.customer_response_lock = threading.Lock()
+        self.customer_response_metrics = {
+            'local': {'count': 0, 'total_latency': 0.0, 'streams': 0, 'total_time_to_first_chunk': 0.0},
+            'llm': {'count': 0, 'total_latency': 0.0, 'streams': 0, 'total_time_to_first_chunk': 0.0}
         }
+        self.keyword_matcher = None
+        
+        # Application velocity per identifier and near-duplicate identities (need Redis)
+        self.velocity_features = None
+        self.duplicate_detector = None
+        
+        # Monte Carlo loss distribution of the active book (needs the database)
+        self.portfolio_risk_engine = None
+        self.last_portfolio_risk = None
         
-        # Initialize OpenAI
-        if self.config['openai_api_key']:
-            openai.api_key = self.config['openai_api_key']
+        # Risk-based rates from the recent applicant pool (needs the database)
+        self.pricing_optimizer = None
     
-    def initialize(self):
+    def initialize(self, redis_manager=None, db_manager=None):
         """Initialize AI services and load models"""
         try:
             self.logger.info("Initializing AI Services...")
             
+            # Shared score cache across processes (local cache only without Redis)
+            self.redis_manager = redis_manager
+            if redis_manager:
+                self.velocity_features = VelocityFeatureService(redis_manager)
+                self.duplicate_detector = DuplicateDetector(redis_manager)
+            
+            self.db_manager = db_manager
+            if db_manager:
+                self.portfolio_risk_engine = PortfolioRiskEngine(db_manager)
+                self.pricing_optimizer = PricingOptimizer(db_manager)
+            
+            # Response cache persists in Redis when available, refreshes pinned content
+            if redis_manager:
+                self.response_cache = LLMResponseCache(redis_manager)
+            self.response_cache.start(self.llm_engine.generate_batch)
+            
             # Load or create ML models
             self._load_ml_models()
             
@@ -73,6 +165,8 @@ class AIServiceManager:
     def shutdown(self):
         """Shutdown AI services"""
         self.logger.info("Shutting down AI Services...")
+        self.model_registry.stop()
+        self.response_cache.stop()
         self.status = 'stopped'
     
     def get_status(self) -> str:
@@ -86,15 +180,10 @@ class AIServiceManager:
             # Extract features from application
             features = self._extract_risk_features(application)
             
-            # Scale features
-            if 'risk_scaler' in self.scalers:
-                features_scaled = self.scalers['risk_scaler'].transform([features])
-            else:
-                features_scaled = [features]
-            
             # Predict risk score
-            if 'risk_model' in self.models:
-                risk_score = self.models['risk_model'].predict_proba(features_scaled)[0][1]
+            model = self.model_registry.get('risk_model')
+            if model is not None:
+                risk_score = model.predict_proba(features)[0][1]
             else:
                 # Fallback calculation
                 risk_score = self._calculate_basic_risk_score(application)
@@ -112,19 +201,16 @@ class AIServiceManager:
             # Extract fraud detection features
             features = self._extract_fraud_features(application)
             
-            # Scale features
-            if 'fraud_scaler' in self.scalers:
-                features_scaled = self.scalers['fraud_scaler'].transform([features])
-            else:
-                features_scaled = [features]
-            
             # Predict fraud probability
-            if 'fraud_model' in self.models:
-                fraud_score = self.models['fraud_model'].predict_proba(features_scaled)[0][1]
+            model = self.model_registry.get('fraud_model')
+            if model is not None:
+                fraud_score = model.predict_proba(features)[0][1]
             else:
                 # Fallback fraud detection
                 fraud_score = self._calculate_basic_fraud_score(application)
             
+            fraud_score = self._apply_fraud_signals([application], [{'fraud_score': float(fraud_score)}])[0]['fraud_score']
+            
             self.logger.info(f"Fraud detection completed for application {application.get('id', 'unknown')}: {fraud_score}")
             return float(fraud_score)
             
@@ -138,15 +224,10 @@ class AIServiceManager:
             # Extract credit scoring features
             features = self._extract_credit_features(application)
             
-            # Scale features
-            if 'credit_scaler' in self.scalers:
-                features_scaled = self.scalers['credit_scaler'].transform([features])
-            else:
-                features_scaled = [features]
-            
             # Predict credit score
-            if 'credit_model' in self.models:
-                credit_score = self.models['credit_model'].predict(features_scaled)[0]
+            model = self.model_registry.get('credit_model')
+            if model is not None:
+                credit_score = model.predict(features)[0]
             else:
                 # Fallback credit scoring
                 credit_score = self._calculate_basic_credit_score(application)
@@ -161,6 +242,104 @@ class AIServiceManager:
             self.logger.error(f"Credit scoring error: {str(e)}")
             return 0.6  # Default medium credit score
     
+    def score_batch(self, applications: List[Dict]) -> List[Dict]:
+        """Score risk, fraud and credit for many applications with one call per model"""
+        records = self._score_batch_models(applications)
+        return self._apply_fraud_signals(applications, records)
+    
+    def _score_batch_models(self, applications: List[Dict]) -> List[Dict]:
+        """Model scores for many applications (memoized by model versions and features)"""
+        records = [{
+            'application_id': application.get('id'),
+            'risk_score': 0.5,  # Defaults match the single-application methods
+            'fraud_score': 0.1,
+            'credit_score': 0.6
+        } for application in applications]
+        
+        if not applications:
+            return records
+        
+        try:
+            # Build all three feature matrices in one pass over the applications
+            rows = {'risk': [], 'fraud': [], 'credit': []}
+            valid = []
+            cache_keys = []
+            signature = self._get_model_signature()
+            for i, application in enumerate(applications):
+                try:
+                    features = (
+                        self._extract_risk_features(application),
+                        self._extract_fraud_features(application),
+                        self._extract_credit_features(application)
+                    )
+                except Exception as e:
+                    self.logger.error(f"Feature extraction error for application {application.get('id', 'unknown')}: {str(e)}")
+                    continue
+                
+                rows['risk'].append(features[0])
+                rows['fraud'].append(features[1])
+                rows['credit'].append(features[2])
+                valid.append(i)
+                cache_keys.append(self._get_score_cache_key(signature, features))
+            
+            if not valid:
+                return records
+            
+            # Re-evaluated applications with unchanged features skip the models
+            cached_scores = self._get_cached_scores(signature, cache_keys)
+            pending = [j for j, key in enumerate(cache_keys) if key not in cached_scores]
+            
+            for j, i in enumerate(valid):
+                if cache_keys[j] in cached_scores:
+                    records[i].update(cached_scores[cache_keys[j]])
+            
+            if not pending:
+                return records
+            
+            pending_applications = [applications[valid[j]] for j in pending]
+            
+            risk_scores = self._predict_batch('risk', np.asarray([rows['risk'][j] for j in pending], dtype=np.float64), pending_applications)
+            fraud_scores = self._predict_batch('fraud', np.asarray([rows['fraud'][j] for j in pending], dtype=np.float64), pending_applications)
+            credit_scores = self._predict_batch('credit', np.asarray([rows['credit'][j] for j in pending], dtype=np.float64), pending_applications)
+            
+            for k, j in enumerate(pending):
+                record = records[valid[j]]
+                if risk_scores is not None:
+                    record['risk_score'] = float(risk_scores[k])
+                if fraud_scores is not None:
+                    record['fraud_score'] = float(fraud_scores[k])
+                if credit_scores is not None:
+                    record['credit_score'] = float(credit_scores[k])
+            
+            # Only cache complete model outputs, never error defaults
+            if risk_scores is not None and fraud_scores is not None and credit_scores is not None:
+                self._store_cached_scores({
+                    cache_keys[j]: {
+                        'risk_score': records[valid[j]]['risk_score'],
+                        'fraud_score': records[valid[j]]['fraud_score'],
+                        'credit_score': records[valid[j]]['credit_score']
+                    }
+                    for j in pending
+                })
+            
+            self.logger.info(f"Batch scoring completed for {len(pending)} of {len(applications)} applications ({len(valid) - len(pending)} cached)")
+            return records
+            
+        except Exception as e:
+            self.logger.error(f"Batch scoring error: {str(e)}")
+            return records
+    
+    def get_score_cache_metrics(self) -> Dict:
+        """Get score cache hit rates"""
+        with self.score_cache_lock:
+            metrics = self.score_cache_metrics.copy()
+            metrics['local_entries'] = len(self.score_cache)
+        
+        lookups = metrics['local_hits'] + metrics['redis_hits'] + metrics['misses']
+        metrics['hit_rate'] = round((metrics['local_hits'] + metrics['redis_hits']) / lookups, 4) if lookups else 0.0
+        metrics['model_versions'] = self.score_cache_signature
+        return metrics
+    
     # Content Generation
     def generate_blog_content(self) -> List[Dict]:
         """Generate AI-powered blog content"""
@@ -173,13 +352,14 @@ class AIServiceManager:
                 "Building Credit History with Personal Loans"
             ]
             
+            topics = blog_topics[:2]  # Generate 2 posts per cycle
+            contents = self._generate_ai_contents([{
+                'prompt': f"Write a comprehensive 800-word blog post about '{topic}' for a personal loan company. Include SEO-optimized headings, practical tips, and a call-to-action.",
+                'content_type': "blog_post"
+            } for topic in topics])
+            
             blog_posts = []
-            for topic in blog_topics[:2]:  # Generate 2 posts per cycle
-                content = self._generate_ai_content(
-                    prompt=f"Write a comprehensive 800-word blog post about '{topic}' for a personal loan company. Include SEO-optimized headings, practical tips, and a call-to-action.",
-                    content_type="blog_post"
-                )
-                
+            for topic, content in zip(topics, contents):
                 blog_posts.append({
                     'title': topic,
                     'content': content,
@@ -204,13 +384,13 @@ class AIServiceManager:
                 "Create a LinkedIn post about responsible borrowing practices"
             ]
             
+            contents = self._generate_ai_contents([{
+                'prompt': prompt + ". Keep it engaging and include relevant hashtags.",
+                'content_type': "social_media"
+            } for prompt in social_prompts])
+            
             social_posts = []
-            for prompt in social_prompts:
-                content = self._generate_ai_content(
-                    prompt=prompt + ". Keep it engaging and include relevant hashtags.",
-                    content_type="social_media"
-                )
-                
+            for prompt, content in zip(social_prompts, contents):
                 platform = self._detect_social_platform(prompt)
                 social_posts.append({
                     'platform': platform,
@@ -237,13 +417,14 @@ class AIServiceManager:
                 "Referral program invitation email"
             ]
             
+            selected_types = email_types[:3]  # Generate 3 templates per cycle
+            contents = self._generate_ai_contents([{
+                'prompt': f"Create a professional and engaging {email_type} for a personal loan company. Include personalization placeholders and a clear call-to-action.",
+                'content_type': "email_template"
+            } for email_type in selected_types])
+            
             email_templates = []
-            for email_type in email_types[:3]:  # Generate 3 templates per cycle
-                content = self._generate_ai_content(
-                    prompt=f"Create a professional and engaging {email_type} for a personal loan company. Include personalization placeholders and a clear call-to-action.",
-                    content_type="email_template"
-                )
-                
+            for email_type, content in zip(selected_types, contents):
                 email_templates.append({
                     'type': email_type,
                     'subject': self._generate_email_subject(email_type),
@@ -268,13 +449,14 @@ class AIServiceManager:
                 "Business Loan Options Page"
             ]
             
+            page_types = landing_page_types[:2]  # Generate 2 pages per cycle
+            contents = self._generate_ai_contents([{
+                'prompt': f"Create compelling landing page content for '{page_type}'. Include headline, benefits, features, testimonials section, and strong call-to-action buttons.",
+                'content_type': "landing_page"
+            } for page_type in page_types])
+            
             landing_pages = []
-            for page_type in landing_page_types[:2]:  # Generate 2 pages per cycle
-                content = self._generate_ai_content(
-                    prompt=f"Create compelling landing page content for '{page_type}'. Include headline, benefits, features, testimonials section, and strong call-to-action buttons.",
-                    content_type="landing_page"
-                )
-                
+            for page_type, content in zip(page_types, contents):
                 landing_pages.append({
                     'type': page_type,
                     'content': content,
@@ -301,13 +483,13 @@ class AIServiceManager:
                 "What happens if I miss a payment?"
             ]
             
+            answers = self._generate_ai_contents([{
+                'prompt': f"Provide a comprehensive and helpful answer to this FAQ: '{question}'. Make it clear, accurate, and customer-friendly.",
+                'content_type': "faq_answer"
+            } for question in faq_topics])
+            
             faq_items = []
-            for question in faq_topics:
-                answer = self._generate_ai_content(
-                    prompt=f"Provide a comprehensive and helpful answer to this FAQ: '{question}'. Make it clear, accurate, and customer-friendly.",
-                    content_type="faq_answer"
-                )
-                
+            for question, answer in zip(faq_topics, answers):
                 faq_items.append({
                     'question': question,
                     'answer': answer,
@@ -316,6 +498,16 @@ class AIServiceManager:
                     'created_at': datetime.now().isoformat()
                 })
             
+            # Generic fallback answers are not worth serving locally
+            fallback = self._generate_fallback_content('faq_answer')
+            self.knowledge_base.add_documents([{
+                'id': f"faq:{item['question']}",
+                'source': 'faq',
+                'question': item['question'],
+                'answer': item['answer'],
+                'category': item['category']
+            } for item in faq_items if item['answer'] != fallback])
+            
             return faq_items
             
         except Exception as e:
@@ -510,56 +702,115 @@ class AIServiceManager:
     
     # Customer Service AI
     def generate_customer_response(self, inquiry: Dict) -> str:
-        """Generate AI-powered customer service response"""
+        """Answer from the knowledge base when confident, otherwise generate with the LLM"""
+        start_time = time.perf_counter()
         try:
-            prompt = f"""
-            Customer Inquiry: {inquiry.get('message', '')}
-            Customer Type: {inquiry.get('customer_type', 'prospect')}
-            Inquiry Category: {inquiry.get('category', 'general')}
-            
-            Generate a helpful, professional, and empathetic response for this customer inquiry. 
-            Include relevant information about our loan products and services when appropriate.
-            Keep the tone friendly but professional.
-            """
+            match = self.knowledge_base.answer(inquiry.get('message', ''))
+            if match:
+                self._record_customer_response('local', start_time)
+                return match['answer']
             
             response = self._generate_ai_content(
-                prompt=prompt,
+                prompt=self._build_customer_response_prompt(inquiry),
                 content_type="customer_response"
             )
             
+            self._record_customer_response('llm', start_time)
             return response
             
         except Exception as e:
             self.logger.error(f"Customer response generation error: {str(e)}")
             return "Thank you for your inquiry. Our team will get back to you shortly."
     
-    def analyze_sentiment(self, message: str) -> Dict:
-        """Analyze sentiment of customer message"""
+    def stream_customer_response(self, inquiry: Dict) -> Iterator[str]:
+        """Yield the customer response in chunks as they are generated"""
+        start_time = time.perf_counter()
         try:
-            # Simple sentiment analysis (in production, use more sophisticated models)
-            positive_words = ['great', 'excellent', 'good', 'happy', 'satisfied', 'thank', 'appreciate']
-            negative_words = ['bad', 'terrible', 'awful', 'angry', 'frustrated', 'disappointed', 'complaint']
-            
-            message_lower = message.lower()
-            positive_count = sum(1 for word in positive_words if word in message_lower)
-            negative_count = sum(1 for word in negative_words if word in message_lower)
-            
-            if positive_count > negative_count:
-                sentiment = 'positive'
-                confidence = min(0.9, 0.6 + (positive_count - negative_count) * 0.1)
-            elif negative_count > positive_count:
-                sentiment = 'negative'
-                confidence = min(0.9, 0.6 + (negative_count - positive_count) * 0.1)
+            match = self.knowledge_base.answer(inquiry.get('message', ''))
+            if match:
+                self._record_customer_response('local', start_time, time.perf_counter())
+                yield match['answer']
+                return
+            
+            request = self._build_generation_request(self._build_customer_response_prompt(inquiry), 'customer_response')
+            
+            cached = self.response_cache.get(request) if self.llm_engine.is_configured() else None
+            if cached is not None:
+                self._record_customer_response('llm', start_time, time.perf_counter())
+                yield cached
+                return
+            
+            chunks = []
+            if self.llm_engine.is_configured():
+                try:
+                    for chunk in self.llm_engine.stream(request):
+                        if not chunks:
+                            first_chunk_time = time.perf_counter()
+                        chunks.append(chunk)
+                        yield chunk
+                        
+                except LLMStreamInterrupted as e:
+                    # Partial text already reached the customer; it must not be cached as an answer
+                    self.logger.error(f"Customer response stream interrupted: {str(e)}")
+                    self._record_customer_response('llm', start_time, first_chunk_time)
+                    return
+            
+            if chunks:
+                self.response_cache.set(request, ''.join(chunks).strip())
+                self._record_customer_response('llm', start_time, first_chunk_time)
             else:
-                sentiment = 'neutral'
-                confidence = 0.5
-            
-            return {
-                'sentiment': sentiment,
-                'confidence': confidence,
-                'positive_score': positive_count,
-                'negative_score': negative_count
+                self._record_customer_response('llm', start_time)
+                yield self._generate_fallback_content('customer_response')
+            
+        except Exception as e:
+            self.logger.error(f"Customer response streaming error: {str(e)}")
+            yield "Thank you for your inquiry. Our team will get back to you shortly."
+    
+    def stream_customer_response_events(self, inquiry: Dict) -> Iterator[str]:
+        """Server-sent event frames for the chatbot endpoint (chunk events, then done)"""
+        for chunk in self.stream_customer_response(inquiry):
+            yield format_sse({'content': chunk}, event='chunk')
+        yield format_sse({'inquiry_id': inquiry.get('id')}, event='done')
+    
+    def add_resolved_answer(self, inquiry: Dict, answer: str) -> bool:
+        """Index a resolved inquiry so similar questions are answered locally"""
+        try:
+            if not inquiry.get('message') or not answer:
+                return False
+            
+            self.knowledge_base.add_documents([{
+                'id': f"resolved:{inquiry.get('id', hashlib.sha1(inquiry['message'].encode()).hexdigest())}",
+                'source': 'resolved',
+                'question': inquiry['message'],
+                'answer': answer,
+                'category': inquiry.get('category', 'general')
+            }])
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Resolved answer indexing error: {str(e)}")
+            return False
+    
+    def get_customer_response_metrics(self) -> Dict:
+        """Get knowledge base hit rate and latency per response path"""
+        with self.customer_response_lock:
+            paths = {path: stats.copy() for path, stats in self.customer_response_metrics.items()}
+        
+        total = sum(stats['count'] for stats in paths.values())
+        metrics = {'hit_rate': round(paths['local']['count'] / total, 4) if total else 0.0}
+        for path, stats in paths.items():
+            metrics[path] = {
+                'count': stats['count'],
+                'avg_latency_ms': round(stats['total_latency'] * 1000 / stats['count'], 3) if stats['count'] else 0.0,
+                'avg_time_to_first_chunk_ms': round(stats['total_time_to_first_chunk'] * 1000 / stats['streams'], 3) if stats['streams'] else 0.0
             }
+        metrics['knowledge_base'] = self.knowledge_base.get_metrics()
+        return metrics
+    
+    def analyze_sentiment(self, message: str) -> Dict:
+        """Analyze sentiment of customer message"""
+        try:
+            return self._score_sentiment(self._get_keyword_matcher().match(message))
             
         except Exception as e:
             self.logger.error(f"Sentiment analysis error: {str(e)}")
@@ -568,46 +819,51 @@ class AIServiceManager:
     def classify_inquiry_priority(self, inquiry: Dict) -> str:
         """Classify inquiry priority level"""
         try:
-            message = inquiry.get('message', '').lower()
-            
-            # High priority keywords
-            high_priority_keywords = ['urgent', 'emergency', 'complaint', 'fraud', 'dispute', 'legal']
-            
-            # Medium priority keywords
-            medium_priority_keywords = ['payment', 'due', 'late', 'problem', 'issue', 'help']
-            
-            if any(keyword in message for keyword in high_priority_keywords):
-                return 'high'
-            elif any(keyword in message for keyword in medium_priority_keywords):
-                return 'medium'
-            else:
-                return 'low'
+            return self._score_priority(self._get_keyword_matcher().match(inquiry.get('message', '')))
                 
         except Exception as e:
             self.logger.error(f"Priority classification error: {str(e)}")
             return 'medium'
     
+    def classify_batch(self, inquiries: List[Dict]) -> List[Dict]:
+        """Sentiment, priority and matched terms for many inquiries (one scan per message)"""
+        try:
+            results = []
+            for matches in self._get_keyword_matcher().match_batch([inquiry.get('message', '') for inquiry in inquiries]):
+                results.append({
+                    **self._score_sentiment(matches),
+                    'priority': self._score_priority(matches),
+                    'escalate': bool(matches['escalation']),
+                    'matched_terms': {group: terms for group, terms in matches.items() if terms}
+                })
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Batch inquiry classification error: {str(e)}")
+            return [{'sentiment': 'neutral', 'confidence': 0.5, 'priority': 'medium', 'escalate': False,
+                     'matched_terms': {}} for _ in inquiries]
+    
     # Business Intelligence
     def detect_suspicious_activities(self) -> List[Dict]:
         """Detect suspicious activities for fraud prevention"""
         try:
-            # Simulate suspicious activity detection
-            suspicious_activities = [
-                {
+            if not self.velocity_features:
+                return []
+            
+            # Identifiers whose application velocity crossed a threshold
+            suspicious_activities = []
+            for flagged in self.velocity_features.get_flagged():
+                label = VelocityFeatureService.DIMENSION_LABELS[flagged['dimension']]
+                suspicious_activities.append({
                     'type': 'multiple_applications',
-                    'description': 'Same IP address submitted 5 applications in 1 hour',
-                    'risk_level': 0.85,
-                    'ip_address': '192.168.1.100',
+                    'description': f"Same {label} submitted {flagged['count']} applications in {flagged['window']}",
+                    'risk_level': self.velocity_features.calculate_velocity_risk({
+                        f"{flagged['dimension']}_count_{flagged['window']}": flagged['count']
+                    }),
+                    'dimension': flagged['dimension'],
+                    'identifier': flagged['value'],
                     'timestamp': datetime.now().isoformat()
-                },
-                {
-                    'type': 'identity_mismatch',
-                    'description': 'Document name does not match application name',
-                    'risk_level': 0.75,
-                    'application_id': 'APP123456',
-                    'timestamp': datetime.now().isoformat()
-                }
-            ]
+                })
             
             return suspicious_activities
             
@@ -639,23 +895,60 @@ class AIServiceManager:
             return 0.5
     
     def assess_portfolio_risk(self) -> Dict:
-        """Assess overall portfolio risk"""
+        """Assess overall portfolio risk from a Monte Carlo loss simulation of active loans"""
         try:
-            # Simulate portfolio risk assessment
+            if not self.portfolio_risk_engine:
+                return {}
+            
+            portfolio = self.portfolio_risk_engine.load_portfolio()
+            if portfolio is None or len(portfolio['exposure']) == 0:
+                return {}
+            
+            simulation = self.portfolio_risk_engine.simulate(portfolio)
+            loss_rate = simulation['expected_loss_rate']
+            
+            if loss_rate >= self.config['portfolio_loss_rate_critical']:
+                portfolio_health = 'critical'
+            elif loss_rate >= self.config['portfolio_loss_rate_warning']:
+                portfolio_health = 'warning'
+            else:
+                portfolio_health = 'good'
+            
+            # Trend against the previous run (5% relative change counts as movement)
+            risk_trend = 'stable'
+            if self.last_portfolio_risk and self.last_portfolio_risk['expected_loss_rate']:
+                change = loss_rate / self.last_portfolio_risk['expected_loss_rate'] - 1.0
+                if change > 0.05:
+                    risk_trend = 'increasing'
+                elif change < -0.05:
+                    risk_trend = 'decreasing'
+            
+            high_risk_grades = self.portfolio_risk_engine.config['high_risk_grades']
+            high_risk = [grade for grade in simulation['by_grade'] if grade['grade'] in high_risk_grades]
+            high_risk_loss = sum(grade['expected_loss'] for grade in high_risk)
+            
+            recommendations = []
+            if portfolio_health != 'good':
+                recommendations.append(f"Expected loss is {loss_rate:.1%} of exposure, consider tightening approval criteria")
+            if simulation['analytical_expected_loss'] and high_risk_loss > 0.5 * simulation['analytical_expected_loss']:
+                recommendations.append(f"Grades {', '.join(high_risk_grades)} carry over half of expected loss, monitor them more closely")
+            worst_tail = simulation['tail'][str(max(self.portfolio_risk_engine.config['confidence_levels']))]
+            if worst_tail['cvar_rate'] > 3 * loss_rate:
+                recommendations.append(f"Tail loss (CVaR {worst_tail['cvar_rate']:.1%}) is well above expected loss, hold capital for downturns")
+            
             portfolio_metrics = {
-                'total_loans': 1250,
-                'default_rate': 0.034,
-                'average_risk_score': 0.42,
-                'high_risk_loans': 89,
-                'portfolio_health': 'good',
-                'risk_trend': 'stable',
-                'recommendations': [
-                    'Monitor high-risk loans more closely',
-                    'Consider tightening approval criteria for scores below 0.6',
-                    'Implement additional verification for large loan amounts'
-                ]
+                'total_loans': simulation['total_loans'],
+                'default_rate': simulation['expected_default_rate'],
+                'high_risk_loans': sum(grade['loans'] for grade in high_risk),
+                'portfolio_health': portfolio_health,
+                'risk_trend': risk_trend,
+                'recommendations': recommendations,
+                **{key: simulation[key] for key in ('total_exposure', 'expected_loss', 'expected_loss_rate', 'loss_std',
+                                                    'tail', 'unexpected_loss', 'percentiles', 'by_grade', 'simulation')},
+                'calculated_at': simulation['calculated_at']
             }
             
+            self.last_portfolio_risk = portfolio_metrics
             return portfolio_metrics
             
         except Exception as e:
@@ -727,24 +1020,44 @@ class AIServiceManager:
             return []
     
     def optimize_pricing(self) -> List[Dict]:
-        """Optimize pricing strategies"""
+        """Optimize pricing strategies: margin-maximizing rate per risk band over the applicant pool"""
         try:
-            pricing_optimizations = [
-                {
+            if not self.pricing_optimizer:
+                return []
+            
+            previous = dict(self.pricing_optimizer.current_pricing)
+            results = self.pricing_optimizer.optimize()
+            
+            pricing_optimizations = []
+            for band, result in results.items():
+                best = result['best']
+                if not best:
+                    pricing_optimizations.append({
+                        'loan_type': 'personal_loan',
+                        'risk_band': band,
+                        'applicants': result['applicants'],
+                        'optimized_rate': None,
+                        'rationale': 'No rate meets the APR, default rate and volume constraints'
+                    })
+                    continue
+                
+                current_rate = previous[band]['rate'] if band in previous else result['market_rate']
+                margin_change = best['expected_margin'] / result['market_margin'] - 1.0 if result['market_margin'] else None
+                pricing_optimizations.append({
                     'loan_type': 'personal_loan',
-                    'current_rate': '12.5%',
-                    'optimized_rate': '11.8%',
-                    'rationale': 'Market analysis shows competitive advantage at lower rate',
-                    'expected_impact': '+15% applications'
-                },
-                {
-                    'loan_type': 'debt_consolidation',
-                    'current_rate': '14.2%',
-                    'optimized_rate': '13.9%',
-                    'rationale': 'Slight reduction to match top competitor',
-                    'expected_impact': '+8% conversions'
-                }
-            ]
+                    'risk_band': band,
+                    'applicants': result['applicants'],
+                    'current_rate': f"{current_rate:.2%}",
+                    'optimized_rate': f"{best['rate']:.2%}",
+                    'term_months': best['term_months'],
+                    'rates_by_term': best['rates_by_term'],
+                    'expected_take_up': best['take_up'],
+                    'expected_default_rate': best['lifetime_default_rate'],
+                    'expected_margin': best['expected_margin'],
+                    'rationale': f"Highest expected margin for band {band} at {best['approval_rate']:.0%} approval "
+                                 f"and {best['take_up']:.0%} take-up",
+                    'expected_impact': f"{margin_change:+.1%} margin vs market rate" if margin_change is not None else 'No feasible market-rate offer'
+                })
             
             return pricing_optimizations
             
@@ -752,6 +1065,18 @@ class AIServiceManager:
             self.logger.error(f"Pricing optimization error: {str(e)}")
             return []
     
+    def get_offer_rate(self, credit_score: Optional[float], term_months: int) -> Optional[float]:
+        """Optimized rate for an applicant's credit score and term (None without a feasible optimized offer)"""
+        if not self.pricing_optimizer:
+            return None
+        return self.pricing_optimizer.get_rate(credit_score, term_months)
+    
+    def get_market_rate(self, credit_score: Optional[float]) -> Optional[float]:
+        """Market rate of an applicant's risk band (None without a pricing optimizer)"""
+        if not self.pricing_optimizer:
+            return None
+        return self.pricing_optimizer.get_market_rate(credit_score)
+    
     def analyze_market_trends(self) -> Dict:
         """Analyze market trends and opportunities"""
         try:
@@ -841,9 +1166,9 @@ class AIServiceManager:
     
     # Helper Methods
     def _load_ml_models(self):
-        """Load or create machine learning models"""
+        """Load active model versions from the registry"""
         try:
-            # Try to load existing models
+            # Legacy standalone artifacts, imported once as a first registry version
             model_paths = {
                 'risk_model': self.config['risk_model_path'],
                 'fraud_model': self.config['fraud_model_path'],
@@ -851,30 +1176,30 @@ class AIServiceManager:
             }
             
             for model_name, path in model_paths.items():
-                if os.path.exists(path):
-                    self.models[model_name] = joblib.load(path)
-                    self.logger.info(f"Loaded {model_name} from {path}")
+                if self.model_registry.get_active_version(model_name) is None and os.path.exists(path):
+                    self.model_registry.register(model_name, joblib.load(path), metadata={'imported_from': path})
+                    self.logger.info(f"Imported {model_name} from {path}")
+            
+            loaded = self.model_registry.load_active(list(model_paths.keys()))
+            for model_name in model_paths:
+                if model_name in loaded:
+                    self.logger.info(f"Loaded {model_name} version {loaded[model_name]}")
                 else:
-                    # Create and train new model
-                    self.models[model_name] = self._create_default_model(model_name)
-                    self.logger.info(f"Created new {model_name}")
-            
-            # Create scalers
-            self.scalers = {
-                'risk_scaler': StandardScaler(),
-                'fraud_scaler': StandardScaler(),
-                'credit_scaler': StandardScaler()
-            }
+                    # No fitted model yet, scoring uses the rule-based fallback
+                    self.logger.warning(f"No registered version of {model_name}, using fallback scoring")
+            
+            self.model_registry.start()
             
         except Exception as e:
             self.logger.error(f"Model loading error: {str(e)}")
     
-    def _create_default_model(self, model_type: str):
-        """Create default ML model"""
-        if model_type in ['risk_model', 'fraud_model']:
-            return RandomForestClassifier(n_estimators=100, random_state=42)
-        else:  # credit_model
-            return GradientBoostingClassifier(n_estimators=100, random_state=42)
+    def activate_model(self, model_name: str, version: str) -> bool:
+        """Hot swap a model to another registered version"""
+        return self.model_registry.activate(model_name, version)
+    
+    def get_model_metrics(self) -> Dict:
+        """Get per-version model latency and score distribution metrics"""
+        return self.model_registry.get_metrics()
     
     def _extract_risk_features(self, application: Dict) -> List[float]:
         """Extract features for risk assessment"""
@@ -918,6 +1243,126 @@ class AIServiceManager:
         ]
         return features
     
+    def _predict_batch(self, model_type: str, features: np.ndarray, applications: List[Dict]) -> Optional[np.ndarray]:
+        """Run one model over a feature matrix (None keeps the default scores)"""
+        try:
+            model = self.model_registry.get(f"{model_type}_model")
+            if model_type == 'credit':
+                if model is not None:
+                    scores = np.asarray(model.predict(features), dtype=np.float64)
+                else:
+                    scores = np.array([self._calculate_basic_credit_score(a) for a in applications], dtype=np.float64)
+                
+                # Normalize to 0-1 range
+                return np.clip(scores / 850, 0, 1)
+            
+            if model is not None:
+                return model.predict_proba(features)[:, 1]
+            
+            if model_type == 'risk':
+                return np.array([self._calculate_basic_risk_score(a) for a in applications], dtype=np.float64)
+            return np.array([self._calculate_basic_fraud_score(a) for a in applications], dtype=np.float64)
+            
+        except Exception as e:
+            self.logger.error(f"Batch {model_type} scoring error: {str(e)}")
+            return None
+    
+    def _apply_fraud_signals(self, applications: List[Dict], records: List[Dict]) -> List[Dict]:
+        """Combine model fraud scores with signals that change between scorings (not memoized)"""
+        try:
+            if self.velocity_features:
+                for application, record, features in zip(applications, records,
+                                                         self.velocity_features.get_features_batch(applications)):
+                    velocity_risk = self.velocity_features.calculate_velocity_risk(features)
+                    record['velocity_risk'] = round(velocity_risk, 4)
+                    # Either signal alone can raise the score (noisy-or)
+                    record['fraud_score'] = 1.0 - (1.0 - record['fraud_score']) * (1.0 - velocity_risk)
+            
+            if self.duplicate_detector:
+                # Similarity to earlier applications, verified at intake
+                duplicate_scores = self.duplicate_detector.get_duplicate_scores([application.get('id') for application in applications])
+                for application, record in zip(applications, records):
+                    duplicate_score = duplicate_scores.get(str(application.get('id')), 0.0)
+                    record['duplicate_score'] = duplicate_score
+                    record['fraud_score'] = 1.0 - (1.0 - record['fraud_score']) * (1.0 - self.config['duplicate_weight'] * duplicate_score)
+            
+            # Ring size and outcomes of applications sharing identifiers (in memory, no I/O)
+            fraud_ring_detector = get_fraud_ring_detector()
+            for application, record in zip(applications, records):
+                ring = fraud_ring_detector.get_ring_stats(application.get('id'))
+                if not ring:
+                    continue
+                ring_risk = fraud_ring_detector.calculate_ring_risk(ring)
+                record['ring_size'] = ring['ring_size']
+                record['ring_risk'] = round(ring_risk, 4)
+                record['fraud_score'] = 1.0 - (1.0 - record['fraud_score']) * (1.0 - self.config['ring_weight'] * ring_risk)
+            
+            return records
+            
+        except Exception as e:
+            self.logger.error(f"Fraud signal error: {str(e)}")
+            return records
+    
+    def _get_model_signature(self) -> str:
+        """Active model versions, part of every score cache key"""
+        versions = []
+        for model_name in self.SCORED_MODELS:
+            loaded = self.model_registry.get(model_name)
+            versions.append(f"{model_name}={loaded.version if loaded else 'fallback'}")
+        return ','.join(versions)
+    
+    def _get_score_cache_key(self, signature: str, features: tuple) -> str:
+        """Cache key from model versions and the exact feature vector"""
+        vector = np.asarray([value for group in features for value in group], dtype=np.float64)
+        digest = hashlib.blake2b(signature.encode() + vector.tobytes(), digest_size=16).hexdigest()
+        return digest
+    
+    def _get_cached_scores(self, signature: str, cache_keys: List[str]) -> Dict[str, Dict]:
+        """Look up scores locally, then in Redis for the remaining keys"""
+        found = {}
+        
+        with self.score_cache_lock:
+            # A model swap makes every local entry unreachable, drop them
+            if signature != self.score_cache_signature:
+                self.score_cache.clear()
+                self.score_cache_signature = signature
+            
+            for key in cache_keys:
+                if key in self.score_cache:
+                    self.score_cache.move_to_end(key)
+                    found[key] = self.score_cache[key]
+            self.score_cache_metrics['local_hits'] += len(found)
+        
+        missing = [key for key in dict.fromkeys(cache_keys) if key not in found]
+        remote = {}
+        if missing and self.redis_manager:
+            remote = self.redis_manager.cache_get_many('scores', missing)
+            found.update(remote)
+            self._store_local_scores(remote)
+        
+        with self.score_cache_lock:
+            self.score_cache_metrics['redis_hits'] += len(remote)
+            self.score_cache_metrics['misses'] += len(missing) - len(remote)
+        
+        return found
+    
+    def _store_cached_scores(self, scores: Dict[str, Dict]):
+        """Write fresh scores to the local and Redis caches"""
+        self._store_local_scores(scores)
+        
+        if self.redis_manager:
+            self.redis_manager.cache_set_many('scores', scores, self.config['score_cache_ttl'])
+    
+    def _store_local_scores(self, scores: Dict[str, Dict]):
+        """Insert scores into the local LRU cache"""
+        with self.score_cache_lock:
+            for key, value in scores.items():
+                self.score_cache[key] = value
+                self.score_cache.move_to_end(key)
+            
+            while len(self.score_cache) > self.config['score_cache_size']:
+                self.score_cache.popitem(last=False)
+    
     def _calculate_basic_risk_score(self, application: Dict) -> float:
         """Calculate basic risk score as fallback"""
         # Simple risk calculation
@@ -966,25 +1411,110 @@ class AIServiceManager:
     
     def _generate_ai_content(self, prompt: str, content_type: str) -> str:
         """Generate AI content using OpenAI API"""
+        return self._generate_ai_contents([{'prompt': prompt, 'content_type': content_type}])[0]
+    
+    def _generate_ai_contents(self, requests: List[Dict]) -> List[str]:
+        """Generate AI content for many prompts concurrently, in request order"""
         try:
-            if self.config['openai_api_key']:
-                response = openai.ChatCompletion.create(
-                    model=self.config['model_version'],
-                    messages=[
-                        {"role": "system", "content": f"You are a professional content writer for a personal loan company. Create {content_type} content that is engaging, accurate, and compliant with financial regulations."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=self.config['max_tokens'],
-                    temperature=self.config['temperature']
-                )
-                return response.choices[0].message.content.strip()
-            else:
+            if not self.llm_engine.is_configured():
                 # Fallback content generation
-                return self._generate_fallback_content(content_type)
-                
+                return [self._generate_fallback_content(request['content_type']) for request in requests]
+            
+            generation_requests = [self._build_generation_request(request['prompt'], request['content_type'])
+                                   for request in requests]
+            
+            # Only pay for generations whose inputs changed
+            results = [self.response_cache.get(request) for request in generation_requests]
+            missing = [i for i, result in enumerate(results) if result is None]
+            
+            if missing:
+                generated = self.llm_engine.generate_batch([generation_requests[i] for i in missing])
+                for i, content in zip(missing, generated):
+                    if content:
+                        self.response_cache.set(generation_requests[i], content)
+                    results[i] = content
+            
+            return [result if result else self._generate_fallback_content(request['content_type'])
+                    for request, result in zip(requests, results)]
+            
         except Exception as e:
             self.logger.error(f"AI content generation error: {str(e)}")
-            return self._generate_fallback_content(content_type)
+            return [self._generate_fallback_content(request['content_type']) for request in requests]
+    
+    def _get_keyword_matcher(self) -> KeywordMatcher:
+        """Compiled matcher over sentiment, priority and escalation keywords"""
+        if self.keyword_matcher is None:
+            escalation_triggers = getattr(self, 'customer_service', {}).get('escalation_triggers', [])
+            self.keyword_matcher = KeywordMatcher({
+                **self.SENTIMENT_KEYWORDS,
+                **self.PRIORITY_KEYWORDS,
+                'escalation': escalation_triggers
+            })
+        return self.keyword_matcher
+    
+    def _score_sentiment(self, matches: Dict[str, List[str]]) -> Dict:
+        """Sentiment from matched keyword groups"""
+        positive_count = len(matches['positive'])
+        negative_count = len(matches['negative'])
+        
+        if positive_count > negative_count:
+            sentiment = 'positive'
+            confidence = min(0.9, 0.6 + (positive_count - negative_count) * 0.1)
+        elif negative_count > positive_count:
+            sentiment = 'negative'
+            confidence = min(0.9, 0.6 + (negative_count - positive_count) * 0.1)
+        else:
+            sentiment = 'neutral'
+            confidence = 0.5
+        
+        return {
+            'sentiment': sentiment,
+            'confidence': confidence,
+            'positive_score': positive_count,
+            'negative_score': negative_count
+        }
+    
+    def _score_priority(self, matches: Dict[str, List[str]]) -> str:
+        """Priority from matched keyword groups (escalation triggers count as high)"""
+        if matches['high'] or matches['escalation']:
+            return 'high'
+        elif matches['medium']:
+            return 'medium'
+        else:
+            return 'low'
+    
+    def _build_customer_response_prompt(self, inquiry: Dict) -> str:
+        """LLM prompt for a customer inquiry"""
+        return f"""
+            Customer Inquiry: {inquiry.get('message', '')}
+            Customer Type: {inquiry.get('customer_type', 'prospect')}
+            Inquiry Category: {inquiry.get('category', 'general')}
+            
+            Generate a helpful, professional, and empathetic response for this customer inquiry. 
+            Include relevant information about our loan products and services when appropriate.
+            Keep the tone friendly but professional.
+            """
+    
+    def _record_customer_response(self, path: str, start_time: float, first_chunk_time: Optional[float] = None):
+        """Update per-path customer response metrics"""
+        with self.customer_response_lock:
+            stats = self.customer_response_metrics[path]
+            stats['count'] += 1
+            stats['total_latency'] += time.perf_counter() - start_time
+            if first_chunk_time is not None:
+                stats['streams'] += 1
+                stats['total_time_to_first_chunk'] += first_chunk_time - start_time
+    
+    def _build_generation_request(self, prompt: str, content_type: str) -> Dict:
+        """Full generation request (also the response cache key material)"""
+        return {
+            'model': self.config['model_version'],
+            'system': f"You are a professional content writer for a personal loan company. Create {content_type} content that is engaging, accurate, and compliant with financial regulations.",
+            'prompt': prompt,
+            'temperature': self.config['temperature'],
+            'max_tokens': self.config['max_tokens'],
+            'content_type': content_type
+        }
     
     def _generate_fallback_content(self, content_type: str) -> str:
         """Generate fallback content when AI is unavailable"""
@@ -1039,6 +1569,8 @@ class AIServiceManager:
                 'complaint', 'legal', 'fraud', 'dispute', 'manager'
             ]
         }
+        self.keyword_matcher = None  # Rebuilt with the escalation triggers on next use
+        # The canned templates are greetings, not answers, so they stay out of the knowledge base
     
     # Additional helper methods for content generation
     def _extract_seo_keywords(self, topic: str) -> List[str]:
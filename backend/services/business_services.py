@@ -28,11 +28,20 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 import io
 
+from cache.event_bus import get_event_bus
+from services.velocity_features import VelocityFeatureService
+from services.duplicate_detector import DuplicateDetector
+from services.fraud_ring_detector import get_fraud_ring_detector
+
 class BusinessServiceManager:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.db_manager = None
         self.redis_manager = None
+        self.event_bus = None
+        self.velocity_features = None
+        self.duplicate_detector = None
+        self.fraud_ring_detector = None
         self.status = 'initializing'
         
         # Business configuration
@@ -67,6 +76,14 @@ class BusinessServiceManager:
             
             self.db_manager = db_manager
             self.redis_manager = redis_manager
+            # Publish only: nothing here subscribes, so the listener is not started
+            self.event_bus = get_event_bus(redis_manager)
+            self.velocity_features = VelocityFeatureService(redis_manager)
+            self.duplicate_detector = DuplicateDetector(redis_manager)
+            
+            # Shared-identifier clusters, rebuilt from loan_applications periodically
+            self.fraud_ring_detector = get_fraud_ring_detector(db_manager)
+            self.fraud_ring_detector.start()
             
             # Initialize email service
             self._initialize_email_service()
@@ -90,6 +107,8 @@ class BusinessServiceManager:
     def shutdown(self):
         """Shutdown business services"""
         self.logger.info("Shutting down Business Services...")
+        if self.fraud_ring_detector:
+            self.fraud_ring_detector.stop()
         self.status = 'stopped'
     
     def get_status(self) -> str:
@@ -125,12 +144,35 @@ class BusinessServiceManager:
             
             self._store_application(application_record)
             
+            # Count against IP, device, email and phone velocity before it is scored
+            if self.velocity_features:
+                self.velocity_features.record(application_record)
+            
+            # Near-duplicates of earlier applications (score is read again at fraud scoring)
+            if self.duplicate_detector:
+                duplicates = self.duplicate_detector.check_and_add(application_record)
+                if duplicates['matches']:
+                    self.logger.warning(f"Application {application_id} resembles {[match['application_id'] for match in duplicates['matches']]} "
+                                        f"(similarity {duplicates['duplicate_score']})")
+            
+            # Link to earlier applications sharing a phone, device, IP or bank account
+            if self.fraud_ring_detector:
+                ring = self.fraud_ring_detector.add_application(application_record)
+                if ring['ring_size'] >= self.fraud_ring_detector.config['min_ring_size']:
+                    self.logger.warning(f"Application {application_id} joins a ring of {ring['ring_size']} applications "
+                                        f"(approval rate {ring['approval_rate']})")
+            
             # Send confirmation email
             self._send_application_confirmation(application_record)
             
             # Queue for AI processing
             self._queue_for_ai_processing(application_id)
             
+            self._publish_event('application.submitted', {
+                'application_id': application_id,
+                'loan_amount': application_data.get('loan_amount')
+            })
+            
             self.metrics['loans_processed'] += 1
             
             return {
@@ -160,6 +202,8 @@ class BusinessServiceManager:
             
             # Update application status
             self._update_application_status(application_id, 'approved', approval_data)
+            if self.fraud_ring_detector:
+                self.fraud_ring_detector.record_decision(application_id, 'approved')
             
             # Generate loan documents
             documents = self.generate_loan_documents(application, approval_data)
@@ -173,6 +217,8 @@ class BusinessServiceManager:
             # Setup payment schedule
             self._setup_payment_schedule(loan_record)
             
+            self._publish_event('loan.approved', {'application_id': application_id, 'loan_id': loan_record['id']})
+            
             return {
                 'success': True,
                 'loan_id': loan_record['id'],
@@ -196,10 +242,14 @@ class BusinessServiceManager:
             
             # Update application status
             self._update_application_status(application_id, 'rejected', rejection_data)
+            if self.fraud_ring_detector:
+                self.fraud_ring_detector.record_decision(application_id, 'rejected')
             
             # Send rejection notification
             self._send_rejection_notification(application, rejection_data)
             
+            self._publish_event('loan.rejected', {'application_id': application_id})
+            
             return {
                 'success': True,
                 'message': 'Application rejected'
@@ -285,6 +335,8 @@ class BusinessServiceManager:
             # Create customer profile
             self._create_customer_profile(customer_id, customer_data)
             
+            self._publish_event('customer.onboarded', {'customer_id': customer_id})
+            
             self.metrics['customers_onboarded'] += 1
             
             return {
@@ -350,6 +402,12 @@ class BusinessServiceManager:
             # Check if loan is paid off
             self._check_loan_payoff(payment_data['loan_id'])
             
+            self._publish_event('payment.posted', {
+                'loan_id': payment_data['loan_id'],
+                'payment_id': payment_record['id'],
+                'amount': payment_data['amount']
+            })
+            
             self.metrics['payments_processed'] += 1
             
             return {
@@ -634,12 +692,21 @@ class BusinessServiceManager:
                 'created_at': datetime.now().isoformat()
             }
             
-            # Add to Redis queue
-            self.redis_manager.lpush('ai_processing_queue', json.dumps(task_data))
+            # Add to Redis job queue (consumed by the job worker runtime)
+            self.redis_manager.enqueue_job('ai_processing_queue', task_data, task_data['priority'])
             
         except Exception as e:
             self.logger.error(f"AI queue error: {str(e)}")
     
+    def _publish_event(self, event_type: str, data: Dict):
+        """Publish domain event (delivery problems never fail the business operation)"""
+        try:
+            if self.event_bus:
+                self.event_bus.publish(event_type, data)
+                
+        except Exception as e:
+            self.logger.error(f"Event publish error for '{event_type}': {str(e)}")
+    
     def _get_application(self, application_id: str) -> Optional[Dict]:
         """Get application from database"""
         try:
@@ -1160,6 +1227,7 @@ class BusinessServiceManager:
             if loan and loan.get('current_balance', 0) <= 0:
                 # Mark loan as paid off
                 self._mark_loan_paid_off(loan_id)
+                self._publish_event('loan.paid_off', {'loan_id': loan_id})
                 
                 # Send payoff notification
                 self._send_payoff_notification(loan)
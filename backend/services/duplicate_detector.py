@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+Duplicate Application Detector
+LoanFlow Personal Loan Management System
+
+This module finds near-duplicate loan applications including:
+- Character shingles over name, address and contact fields
+- MinHash signatures computed with vectorized universal hashing
+- Banded LSH index in Redis, or in memory with disk snapshots without Redis
+- Exact per-field Jaccard verification of LSH candidates
+- Duplicate scores per application for fraud scoring
+- Retention matching the result TTL (key expiry plus periodic pruning of band buckets)
+"""
+
+import logging
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+import numpy as np
+
+class DuplicateDetector:
+    """Incremental MinHash/LSH index of application identities"""
+    
+    MERSENNE_PRIME = (1 << 31) - 1
+    
+    # Field -> share of the verified similarity
+    FIELD_WEIGHTS = {
+        'name': 0.4,
+        'address': 0.3,
+        'contact': 0.3
+    }
+    
+    def __init__(self, redis_manager=None, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.redis_manager = redis_manager
+        
+        self.config = {
+            'num_perm': 64,
+            'bands': 16,  # 16 bands of 4 rows: candidates from about 0.5 Jaccard upwards
+            'shingle_size': 3,
+            'min_similarity': 0.6,  # Verified similarity reported as a duplicate
+            'max_candidates': 50,  # Candidates verified per query (largest band overlap first)
+            'max_bucket_size': 500,  # Larger band buckets come from common shingles and are not read
+            'result_ttl': 30 * 86400,  # Also how long an application stays in the index
+            'prune_grace': 7 * 86400,  # Identities outlive the TTL this long so pruning can find their bands
+            'prune_every': 1000,  # Prune expired applications after this many additions
+            'prune_batch': 1000,
+            'snapshot_path': os.getenv('DUPLICATE_INDEX_PATH', 'data/duplicate_index.json'),
+            'snapshot_every': 100,  # Local mode: snapshot after this many additions
+            'seed': 1
+        }
+        if config:
+            self.config.update(config)
+        
+        if self.config['num_perm'] % self.config['bands']:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.rows = self.config['num_perm'] // self.config['bands']
+        
+        # Universal hash functions h(x) = (a * x + b) mod p, one per permutation
+        rng = np.random.default_rng(self.config['seed'])
+        self.hash_a = rng.integers(1, self.MERSENNE_PRIME, self.config['num_perm'], dtype=np.uint64)
+        self.hash_b = rng.integers(0, self.MERSENNE_PRIME, self.config['num_perm'], dtype=np.uint64)
+        
+        # Local mode index (Redis holds these otherwise)
+        self.band_buckets = {}  # band key -> set of application ids
+        self.identities = {}  # application id -> normalized fields
+        self.indexed_at = {}  # application id -> index time
+        self.results = {}  # application id -> duplicate result
+        self.lock = threading.Lock()
+        self.unsaved = 0
+        self.unpruned = 0
+        
+        self.metrics = {
+            'indexed': 0,
+            'queries': 0,
+            'candidates_verified': 0,
+            'duplicates_found': 0,
+            'pruned': 0,
+            'avg_query_ms': 0.0
+        }
+        
+        if not self.redis_manager:
+            self._load_snapshot()
+    
+    # Index Operations
+    def check_and_add(self, application: Dict) -> Dict:
+        """Find duplicates of an application, then index it (returns the duplicate result)"""
+        result = self.find_duplicates(application)
+        self.add(application)
+        
+        if application.get('id') is not None:
+            self._store_result(str(application['id']), result)
+        return result
+    
+    def add(self, application: Dict) -> bool:
+        """Index an application's identity"""
+        try:
+            application_id = str(application['id'])
+            fields = self._get_fields(application)
+            band_keys = self._get_band_keys(self._get_signature(fields))
+            
+            if self.redis_manager:
+                # Buckets nobody writes to expire on their own; active ones are pruned
+                ttl = self.config['result_ttl'] + self.config['prune_grace']
+                pipe = self.redis_manager.redis_client.pipeline(transaction=False)
+                for band_key in band_keys:
+                    pipe.sadd(self._build_key(f"band:{band_key}"), application_id)
+                    pipe.expire(self._build_key(f"band:{band_key}"), ttl)
+                pipe.setex(self._build_key(f"identity:{application_id}"), ttl, json.dumps(fields))
+                pipe.zadd(self._build_key('indexed'), {application_id: time.time()})
+                pipe.execute()
+            else:
+                with self.lock:
+                    for band_key in band_keys:
+                        self.band_buckets.setdefault(band_key, set()).add(application_id)
+                    self.identities[application_id] = fields
+                    self.indexed_at[application_id] = time.time()
+                    self.unsaved += 1
+                    snapshot_due = self.unsaved >= self.config['snapshot_every']
+                if snapshot_due:
+                    self.save_snapshot()
+            
+            self.metrics['indexed'] += 1
+            
+            with self.lock:
+                self.unpruned += 1
+                prune_due = self.unpruned >= self.config['prune_every']
+                if prune_due:
+                    self.unpruned = 0
+            if prune_due:
+                self.prune()
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Duplicate index add error: {str(e)}")
+            return False
+    
+    def find_duplicates(self, application: Dict) -> Dict:
+        """Verified near-duplicates of an application, most similar first"""
+        start_time = time.perf_counter()
+        try:
+            application_id = str(application.get('id'))
+            fields = self._get_fields(application)
+            band_keys = self._get_band_keys(self._get_signature(fields))
+            
+            # Applications sharing more bands are more likely to be similar, verify those first
+            overlap = {}
+            for members in self._get_band_members(band_keys):
+                for candidate_id in members:
+                    if candidate_id != application_id:
+                        overlap[candidate_id] = overlap.get(candidate_id, 0) + 1
+            
+            candidate_ids = sorted(overlap, key=overlap.get, reverse=True)[:self.config['max_candidates']]
+            identities = self._get_identities(candidate_ids)
+            
+            matches = []
+            for candidate_id in candidate_ids:
+                candidate_fields = identities.get(candidate_id)
+                if not candidate_fields:
+                    continue
+                
+                similarities = {
+                    field: round(self._jaccard(self._shingle(fields.get(field, '')),
+                                               self._shingle(candidate_fields.get(field, ''))), 4)
+                    for field in self.FIELD_WEIGHTS
+                }
+                similarity = sum(self.FIELD_WEIGHTS[field] * value for field, value in similarities.items())
+                
+                if similarity >= self.config['min_similarity']:
+                    matches.append({
+                        'application_id': candidate_id,
+                        'similarity': round(similarity, 4),
+                        'field_similarity': similarities
+                    })
+            
+            matches.sort(key=lambda match: match['similarity'], reverse=True)
+            
+            self.metrics['candidates_verified'] += len(candidate_ids)
+            self.metrics['duplicates_found'] += len(matches)
+            return {
+                'duplicate_score': matches[0]['similarity'] if matches else 0.0,
+                'matches': matches,
+                'candidates': len(candidate_ids)
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Duplicate search error: {str(e)}")
+            return {'duplicate_score': 0.0, 'matches': [], 'candidates': 0}
+        
+        finally:
+            self._record_query(time.perf_counter() - start_time)
+    
+    def get_duplicate_scores(self, application_ids: List[Any]) -> Dict[str, float]:
+        """Duplicate scores recorded at intake, by application id (missing ids are skipped)"""
+        try:
+            ids = [str(application_id) for application_id in application_ids if application_id is not None]
+            if not ids:
+                return {}
+            
+            if self.redis_manager:
+                values = self.redis_manager.redis_client.mget([self._build_key(f"result:{i}") for i in ids])
+                results = {i: json.loads(value) for i, value in zip(ids, values) if value}
+            else:
+                with self.lock:
+                    results = {i: self.results[i] for i in ids if i in self.results}
+            
+            return {i: result['duplicate_score'] for i, result in results.items()}
+            
+        except Exception as e:
+            self.logger.error(f"Duplicate score read error: {str(e)}")
+            return {}
+    
+    def prune(self) -> int:
+        """Remove applications indexed longer ago than the result TTL (returns how many)"""
+        try:
+            cutoff = time.time() - self.config['result_ttl']
+            
+            if self.redis_manager:
+                client = self.redis_manager.redis_client
+                expired = client.zrangebyscore(self._build_key('indexed'), '-inf', cutoff,
+                                               start=0, num=self.config['prune_batch'])
+                if not expired:
+                    return 0
+                
+                identities = self._get_identities(expired)
+                pipe = client.pipeline(transaction=False)
+                for application_id in expired:
+                    # Band keys are recomputed from the identity kept through the grace period
+                    if application_id in identities:
+                        for band_key in self._get_band_keys(self._get_signature(identities[application_id])):
+                            pipe.srem(self._build_key(f"band:{band_key}"), application_id)
+                    pipe.delete(self._build_key(f"identity:{application_id}"))
+                pipe.zrem(self._build_key('indexed'), *expired)
+                pipe.execute()
+            else:
+                with self.lock:
+                    expired = [i for i, indexed_at in self.indexed_at.items() if indexed_at < cutoff]
+                    expired = expired[:self.config['prune_batch']]
+                    for application_id in expired:
+                        fields = self.identities.pop(application_id, None)
+                        if fields is not None:
+                            for band_key in self._get_band_keys(self._get_signature(fields)):
+                                members = self.band_buckets.get(band_key)
+                                if members is not None:
+                                    members.discard(application_id)
+                                    if not members:
+                                        del self.band_buckets[band_key]
+                        del self.indexed_at[application_id]
+                        self.results.pop(application_id, None)
+                    self.unsaved += len(expired)
+            
+            self.metrics['pruned'] += len(expired)
+            return len(expired)
+            
+        except Exception as e:
+            self.logger.error(f"Duplicate index prune error: {str(e)}")
+            return 0
+    
+    def save_snapshot(self) -> bool:
+        """Write the local index to disk (no-op with Redis)"""
+        if self.redis_manager:
+            return True
+        
+        try:
+            with self.lock:
+                snapshot = {
+                    'config': {key: self.config[key] for key in ('num_perm', 'bands', 'shingle_size', 'seed')},
+                    'band_buckets': {key: sorted(members) for key, members in self.band_buckets.items()},
+                    'identities': self.identities,
+                    'indexed_at': self.indexed_at,
+                    'results': self.results,
+                    'saved_at': datetime.now().isoformat()
+                }
+                self.unsaved = 0
+            
+            path = self.config['snapshot_path']
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, path)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Duplicate index snapshot error: {str(e)}")
+            return False
+    
+    def get_metrics(self) -> Dict:
+        """Get detector metrics"""
+        metrics = self.metrics.copy()
+        metrics['avg_query_ms'] = round(metrics['avg_query_ms'], 3)
+        metrics['backend'] = 'redis' if self.redis_manager else 'local'
+        metrics['last_updated'] = datetime.now().isoformat()
+        return metrics
+    
+    # Helper Methods
+    def _get_fields(self, application: Dict) -> Dict[str, str]:
+        """Normalized identity fields"""
+        def normalize(*values) -> str:
+            text = ' '.join(str(value) for value in values if value)
+            return ' '.join(''.join(char if char.isalnum() else ' ' for char in text.lower()).split())
+        
+        email = str(application.get('email') or '').lower()
+        phone = ''.join(char for char in str(application.get('phone') or '') if char.isdigit())[-10:]
+        
+        return {
+            'name': normalize(application.get('first_name'), application.get('last_name')),
+            # City and state are implied by the zip code and would make every neighbour a candidate
+            'address': normalize(application.get('address'), application.get('zip_code')),
+            # Provider domains are shared by everyone, only the mailbox name identifies
+            'contact': normalize(email.split('@')[0], phone)
+        }
+    
+    def _shingle(self, text: str) -> set:
+        """Character shingles of a field (whole text when shorter than a shingle)"""
+        size = self.config['shingle_size']
+        if len(text) <= size:
+            return {text} if text else set()
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+    
+    def _get_signature(self, fields: Dict[str, str]) -> np.ndarray:
+        """MinHash signature over the shingles of every field"""
+        shingles = [f"{field}:{shingle}" for field, text in fields.items() for shingle in self._shingle(text)]
+        signature = np.full(self.config['num_perm'], self.MERSENNE_PRIME, dtype=np.uint64)
+        if not shingles:
+            return signature
+        
+        values = np.array([
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), 'big') % self.MERSENNE_PRIME
+            for shingle in shingles
+        ], dtype=np.uint64)
+        
+        # All permutations of all shingles at once: (num_perm, shingles), products stay below 2^62
+        hashed = (np.outer(self.hash_a, values) + self.hash_b[:, None]) % np.uint64(self.MERSENNE_PRIME)
+        return hashed.min(axis=1)
+    
+    def _get_band_keys(self, signature: np.ndarray) -> List[str]:
+        """One bucket key per LSH band"""
+        return [
+            f"{band}:{hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).hexdigest()}"
+            for band in range(self.config['bands'])
+        ]
+    
+    def _get_band_members(self, band_keys: List[str]) -> List[set]:
+        """Application ids in each band bucket (oversized buckets skipped)"""
+        max_size = self.config['max_bucket_size']
+        
+        if self.redis_manager:
+            pipe = self.redis_manager.redis_client.pipeline(transaction=False)
+            for band_key in band_keys:
+                pipe.scard(self._build_key(f"band:{band_key}"))
+            sizes = pipe.execute()
+            
+            readable = [band_key for band_key, size in zip(band_keys, sizes) if 0 < size <= max_size]
+            for band_key in readable:
+                pipe.smembers(self._build_key(f"band:{band_key}"))
+            return [{member.decode() if isinstance(member, bytes) else member for member in members}
+                    for members in pipe.execute()]
+        
+        with self.lock:
+            buckets = [self.band_buckets.get(band_key, ()) for band_key in band_keys]
+            return [set(members) for members in buckets if len(members) <= max_size]
+    
+    def _get_identities(self, application_ids: List[str]) -> Dict[str, Dict]:
+        """Stored normalized fields of candidates"""
+        if not application_ids:
+            return {}
+        
+        if self.redis_manager:
+            values = self.redis_manager.redis_client.mget([self._build_key(f"identity:{i}") for i in application_ids])
+            return {i: json.loads(value) for i, value in zip(application_ids, values) if value}
+        
+        with self.lock:
+            return {i: self.identities[i] for i in application_ids if i in self.identities}
+    
+    def _store_result(self, application_id: str, result: Dict):
+        """Keep the intake result for fraud scoring"""
+        try:
+            if self.redis_manager:
+                self.redis_manager.redis_client.setex(self._build_key(f"result:{application_id}"),
+                                                      self.config['result_ttl'], json.dumps(result))
+            else:
+                with self.lock:
+                    self.results[application_id] = result
+                    
+        except Exception as e:
+            self.logger.error(f"Duplicate result storage error: {str(e)}")
+    
+    def _jaccard(self, left: set, right: set) -> float:
+        """Exact Jaccard similarity (0 when both are empty)"""
+        if not left and not right:
+            return 0.0
+        return len(left & right) / len(left | right)
+    
+    def _load_snapshot(self):
+        """Restore the local index from disk if a compatible snapshot exists"""
+        path = self.config['snapshot_path']
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            self.logger.error(f"Duplicate index snapshot load error: {str(e)}")
+            return
+        
+        if snapshot.get('config') != {key: self.config[key] for key in ('num_perm', 'bands', 'shingle_size', 'seed')}:
+            self.logger.warning("Duplicate index snapshot built with different settings, starting empty")
+            return
+        
+        self.band_buckets = {key: set(members) for key, members in snapshot['band_buckets'].items()}
+        self.identities = snapshot['identities']
+        self.results = snapshot.get('results', {})
+        # Snapshots from before retention start their clock at load time
+        now = time.time()
+        self.indexed_at = {i: snapshot.get('indexed_at', {}).get(i, now) for i in self.identities}
+        self.logger.info(f"Loaded duplicate index snapshot with {len(self.identities)} applications")
+    
+    def _record_query(self, elapsed: float):
+        """Update query metrics"""
+        self.metrics['queries'] += 1
+        elapsed_ms = elapsed * 1000
+        if self.metrics['avg_query_ms'] == 0:
+            self.metrics['avg_query_ms'] = elapsed_ms
+        else:
+            self.metrics['avg_query_ms'] = self.metrics['avg_query_ms'] * 0.9 + elapsed_ms * 0.1
+    
+    def _build_key(self, key: str) -> str:
+        """Full Redis key"""
+        return self.redis_manager._build_key(f"duplicates:{key}")
+
+if __name__ == "__main__":
+    # Example usage and testing
+    import random
+    import tempfile
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    detector = DuplicateDetector(config={'snapshot_path': os.path.join(tempfile.mkdtemp(), 'index.json')})
+    
+    random.seed(7)
+    first_names = ['james', 'maria', 'robert', 'linda', 'michael', 'sarah', 'david', 'karen']
+    last_names = ['smith', 'garcia', 'johnson', 'brown', 'miller', 'davis', 'wilson', 'moore']
+    streets = ['oak st', 'maple ave', 'pine rd', 'cedar ln', 'elm st', 'lake dr']
+    
+    for i in range(20000):
+        first, last = random.choice(first_names), random.choice(last_names)
+        detector.add({
+            'id': i, 'first_name': first, 'last_name': last,
+            'email': f"{first}.{last}{random.randint(1, 99999)}@example.com",
+            'phone': f"555{random.randint(0, 9999999):07d}",
+            'address': f"{random.randint(1, 9999)} {random.choice(streets)}", 'city': 'Springfield',
+            'zip_code': f"627{random.randint(0, 99):02d}"
+        })
+    
+    original = {'id': 'new', 'first_name': 'Jon', 'last_name': 'Smithe', 'email': 'jon.smith@example.com',
+                'phone': '(555) 123-4567', 'address': '742 Evergreen Terrace', 'city': 'Springfield', 'zip_code': '62701'}
+    detector.add({**original, 'id': 'original'})
+    
+    synthetic = {**original, 'first_name': 'John', 'last_name': 'Smith', 'email': 'jon.smith1@example.com'}
+    start = time.perf_counter()
+    result = detector.check_and_add(synthetic)
+    print(f"Query over {detector.metrics['indexed']} applications took {(time.perf_counter() - start) * 1000:.3f}ms")
+    print(result)
+    print(detector.get_metrics())
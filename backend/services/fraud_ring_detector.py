@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Fraud Ring Detector
+LoanFlow Personal Loan Management System
+
+This module links applications that share identifiers including:
+- Disjoint-set (union-find) over applications with path compression and union by size
+- Links through phones, devices, IPs, bank accounts, SSN hashes and email addresses
+- Per-ring aggregates (size, approvals, rejections, loan volume) kept at the ring root
+- Ring statistics for scoring in near-constant time
+- Periodic compaction: rebuild from loan_applications and snapshot to disk
+"""
+
+import logging
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+
+class FraudRingDetector:
+    """Incrementally maintained clusters of applications sharing identifiers"""
+    
+    # Identifier type -> application fields that carry it
+    IDENTIFIER_FIELDS = {
+        'phone': ['phone'],
+        'device': ['device_id', 'device_fingerprint'],
+        'ip': ['ip_address'],
+        'bank_account': ['bank_account_number', 'bank_account_hash'],
+        'ssn': ['ssn_hash'],
+        'email': ['email']
+    }
+    
+    def __init__(self, db_manager=None, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.db_manager = db_manager
+        self.status = 'stopped'
+        
+        self.config = {
+            'snapshot_path': os.getenv('FRAUD_RING_SNAPSHOT_PATH', 'data/fraud_rings.json'),
+            'rebuild_interval': 6 * 3600,  # seconds between rebuilds from the database
+            'lookback_days': 365,  # Applications older than this drop out on rebuild
+            'page_size': 5000,
+            'min_ring_size': 3,  # Smaller clusters are households and repeat applicants
+            'max_ring_size': 20  # Ring size at which ring risk saturates
+        }
+        if config:
+            self.config.update(config)
+        
+        self.lock = threading.RLock()
+        self._reset()
+        
+        self.stop_event = threading.Event()
+        self.rebuild_thread = None
+        
+        self.metrics = {
+            'applications': 0,
+            'rings': 0,
+            'largest_ring': 0,
+            'rebuilds': 0,
+            'last_rebuild': None,
+            'last_rebuild_seconds': 0.0
+        }
+        
+        self._load_snapshot()
+    
+    def start(self):
+        """Start periodic rebuilds from the database"""
+        if self.status == 'running' or not self.db_manager:
+            return
+        
+        self.stop_event.clear()
+        self.rebuild_thread = threading.Thread(target=self._rebuild_loop, daemon=True, name='fraud-ring-rebuild')
+        self.rebuild_thread.start()
+        self.status = 'running'
+    
+    def stop(self):
+        """Stop rebuilds and write a final snapshot"""
+        self.stop_event.set()
+        if self.rebuild_thread:
+            self.rebuild_thread.join(timeout=5)
+        self.save_snapshot()
+        self.status = 'stopped'
+    
+    # Incremental Updates
+    def add_application(self, application: Dict) -> Dict:
+        """Link an application to every earlier application sharing an identifier, returns its ring stats"""
+        with self.lock:
+            node = self._add(application)
+            return self._get_stats(self._find(node))
+    
+    def record_decision(self, application_id: Any, status: str):
+        """Move an application's decision between its ring's counters"""
+        with self.lock:
+            node = self.index.get(str(application_id))
+            if node is None:
+                return
+            
+            root = self._find(node)
+            self._count_status(root, self.statuses[node], -1)
+            self.statuses[node] = status
+            self._count_status(root, status, 1)
+    
+    # Scoring
+    def get_ring_stats(self, application_id: Any) -> Optional[Dict]:
+        """Ring size and outcomes for an application's cluster (None if unknown)"""
+        with self.lock:
+            node = self.index.get(str(application_id))
+            if node is None:
+                return None
+            return self._get_stats(self._find(node))
+    
+    def calculate_ring_risk(self, stats: Optional[Dict]) -> float:
+        """Risk in [0, 1] from ring size, raised when the ring's decided applications are mostly rejected"""
+        if not stats or stats['ring_size'] < self.config['min_ring_size']:
+            return 0.0
+        
+        span = max(1, self.config['max_ring_size'] - self.config['min_ring_size'] + 1)
+        size_risk = 0.5 + 0.5 * min(1.0, (stats['ring_size'] - self.config['min_ring_size'] + 1) / span)
+        if stats['decided'] == 0:
+            return size_risk
+        return min(1.0, size_risk * (0.75 + 0.5 * stats['rejection_rate']))
+    
+    # Compaction
+    def rebuild(self) -> bool:
+        """Rebuild from loan_applications within the lookback window, then swap it in and snapshot"""
+        if not self.db_manager:
+            return False
+        
+        start_time = time.time()
+        try:
+            cutoff = datetime.now().timestamp() - self.config['lookback_days'] * 86400
+            fresh = FraudRingDetector(config={**self.config, 'snapshot_path': os.devnull})
+            
+            # Keyset pagination keeps every page an index range scan
+            last_id = ''
+            while True:
+                rows = self.db_manager.execute_query(
+                    "SELECT * FROM loan_applications WHERE id > %s AND created_at >= FROM_UNIXTIME(%s) ORDER BY id LIMIT %s",
+                    (last_id, int(cutoff), self.config['page_size'])
+                ) or []
+                
+                for row in rows:
+                    fresh._add(row)
+                if len(rows) < self.config['page_size']:
+                    break
+                last_id = rows[-1]['id']
+            
+            # Device, IP and bank identifiers exist only in memory (loan_applications has no columns
+            # for them), so they are carried over for every surviving application; applications added
+            # since the last rebuild are kept even if the query did not see them yet
+            with self.lock:
+                for application_id, node in self.index.items():
+                    fresh_node = fresh.index.get(application_id)
+                    if fresh_node is not None:
+                        fresh._link(fresh_node, self.node_identifiers[node])
+                    elif node >= self.rebuild_watermark:
+                        fresh._add(self._get_application_record(node))
+                
+                self._adopt(fresh)
+                self.rebuild_watermark = len(self.parent)
+            
+            elapsed = time.time() - start_time
+            self.metrics['rebuilds'] += 1
+            self.metrics['last_rebuild'] = datetime.now().isoformat()
+            self.metrics['last_rebuild_seconds'] = round(elapsed, 3)
+            self.logger.info(f"Fraud ring index rebuilt with {len(self.parent)} applications in {elapsed:.2f}s")
+            
+            self.save_snapshot()
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Fraud ring rebuild error: {str(e)}")
+            return False
+    
+    def save_snapshot(self) -> bool:
+        """Write the structure to disk (atomic replace)"""
+        try:
+            with self.lock:
+                snapshot = {
+                    'application_ids': self.application_ids,
+                    'parent': [self._find(node) for node in range(len(self.parent))],
+                    'statuses': self.statuses,
+                    'amounts': self.amounts,
+                    'identifiers': self.identifiers,
+                    'node_identifiers': self.node_identifiers,
+                    'saved_at': datetime.now().isoformat()
+                }
+            
+            path = self.config['snapshot_path']
+            if path == os.devnull:
+                return True
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, path)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Fraud ring snapshot error: {str(e)}")
+            return False
+    
+    def get_metrics(self) -> Dict:
+        """Get ring metrics"""
+        with self.lock:
+            roots = [node for node in range(len(self.parent)) if self.parent[node] == node]
+            rings = [root for root in roots if self.size[root] >= self.config['min_ring_size']]
+            self.metrics['applications'] = len(self.parent)
+            self.metrics['rings'] = len(rings)
+            self.metrics['largest_ring'] = max((self.size[root] for root in roots), default=0)
+            return self.metrics.copy()
+    
+    # Helper Methods
+    def _reset(self):
+        """Empty structure"""
+        self.application_ids = []  # node -> application id
+        self.index = {}  # application id -> node
+        self.parent = []
+        self.size = []  # Ring size (valid at roots)
+        self.approved = []  # Approved applications (valid at roots)
+        self.rejected = []  # Rejected applications (valid at roots)
+        self.volume = []  # Requested loan volume (valid at roots)
+        self.statuses = []  # node -> current status
+        self.amounts = []  # node -> requested amount
+        self.identifiers = {}  # 'type:value' -> first node carrying it
+        self.node_identifiers = []  # node -> identifiers it carries
+        self.rebuild_watermark = 0  # Nodes at or above this were added after the last rebuild started
+    
+    def _adopt(self, other: 'FraudRingDetector'):
+        """Take over another detector's structure"""
+        for name in ('application_ids', 'index', 'parent', 'size', 'approved', 'rejected', 'volume',
+                     'statuses', 'amounts', 'identifiers', 'node_identifiers'):
+            setattr(self, name, getattr(other, name))
+    
+    def _add(self, application: Dict) -> int:
+        """Insert or refresh an application and union it through its identifiers"""
+        application_id = str(application.get('id'))
+        status = str(application.get('status') or 'pending')
+        amount = float(application.get('loan_amount') or 0.0)
+        keys = self._get_identifier_keys(application)
+        
+        node = self.index.get(application_id)
+        if node is None:
+            node = len(self.parent)
+            self.index[application_id] = node
+            self.application_ids.append(application_id)
+            self.parent.append(node)
+            self.size.append(1)
+            self.approved.append(0)
+            self.rejected.append(0)
+            self.volume.append(amount)
+            self.statuses.append('pending')
+            self.amounts.append(amount)
+            self.node_identifiers.append([])
+            self._count_status(node, status, 1)
+            self.statuses[node] = status
+        else:
+            root = self._find(node)
+            self._count_status(root, self.statuses[node], -1)
+            self._count_status(root, status, 1)
+            self.statuses[node] = status
+        
+        self._link(node, keys)
+        return node
+    
+    def _link(self, node: int, keys: List[str]):
+        """Record identifiers on a node and union it with the first node carrying each"""
+        for key in keys:
+            if key in self.node_identifiers[node]:
+                continue
+            self.node_identifiers[node].append(key)
+            first = self.identifiers.setdefault(key, node)
+            if first != node:
+                self._union(node, first)
+    
+    def _find(self, node: int) -> int:
+        """Root of a node's set, compressing the path behind it"""
+        root = node
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[node] != root:
+            self.parent[node], node = root, self.parent[node]
+        return root
+    
+    def _union(self, left: int, right: int) -> int:
+        """Merge two sets (smaller under larger) and their aggregates"""
+        left, right = self._find(left), self._find(right)
+        if left == right:
+            return left
+        if self.size[left] < self.size[right]:
+            left, right = right, left
+        
+        self.parent[right] = left
+        self.size[left] += self.size[right]
+        self.approved[left] += self.approved[right]
+        self.rejected[left] += self.rejected[right]
+        self.volume[left] += self.volume[right]
+        return left
+    
+    def _count_status(self, root: int, status: str, delta: int):
+        """Adjust a ring's decision counters"""
+        if status in ('approved', 'funded'):
+            self.approved[root] += delta
+        elif status == 'rejected':
+            self.rejected[root] += delta
+    
+    def _get_stats(self, root: int) -> Dict:
+        """Aggregates of the ring rooted at root"""
+        decided = self.approved[root] + self.rejected[root]
+        return {
+            'ring_size': self.size[root],
+            'approved': self.approved[root],
+            'rejected': self.rejected[root],
+            'decided': decided,
+            'approval_rate': round(self.approved[root] / decided, 4) if decided else 0.0,
+            'rejection_rate': round(self.rejected[root] / decided, 4) if decided else 0.0,
+            'total_loan_amount': round(self.volume[root], 2),
+            'ring_id': self.application_ids[root]
+        }
+    
+    def _get_identifier_keys(self, application: Dict) -> List[str]:
+        """Normalized 'type:value' identifiers of an application"""
+        keys = []
+        for identifier_type, fields in self.IDENTIFIER_FIELDS.items():
+            for field in fields:
+                value = application.get(field)
+                if not value:
+                    continue
+                value = str(value).strip().lower()
+                if identifier_type == 'phone':
+                    value = ''.join(char for char in value if char.isdigit())[-10:]
+                if value:
+                    keys.append(f"{identifier_type}:{value}")
+                break
+        return keys
+    
+    def _get_application_record(self, node: int) -> Dict:
+        """Rebuild input for an application known only in memory"""
+        record = {'id': self.application_ids[node], 'status': self.statuses[node], 'loan_amount': self.amounts[node]}
+        for key in self.node_identifiers[node]:
+            identifier_type, value = key.split(':', 1)
+            record[self.IDENTIFIER_FIELDS[identifier_type][0]] = value
+        return record
+    
+    def _load_snapshot(self):
+        """Restore structure from the last snapshot"""
+        path = self.config['snapshot_path']
+        if path == os.devnull:
+            return
+        
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            self.logger.error(f"Fraud ring snapshot load error: {str(e)}")
+            return
+        
+        with self.lock:
+            self._reset()
+            self.application_ids = snapshot['application_ids']
+            self.index = {application_id: node for node, application_id in enumerate(self.application_ids)}
+            self.parent = snapshot['parent']
+            self.statuses = snapshot['statuses']
+            self.amounts = snapshot['amounts']
+            self.identifiers = snapshot['identifiers']
+            self.node_identifiers = snapshot['node_identifiers']
+            
+            # Aggregates are recomputed from the flattened parents
+            count = len(self.parent)
+            self.size, self.approved, self.rejected, self.volume = [0] * count, [0] * count, [0] * count, [0.0] * count
+            for node, root in enumerate(self.parent):
+                self.size[root] += 1
+                self.volume[root] += self.amounts[node]
+                self._count_status(root, self.statuses[node], 1)
+            self.rebuild_watermark = count
+        
+        self.logger.info(f"Loaded fraud ring snapshot with {len(self.parent)} applications")
+    
+    def _rebuild_loop(self):
+        """Periodic rebuild from the database"""
+        while not self.stop_event.wait(self.config['rebuild_interval']):
+            self.rebuild()
+
+_fraud_ring_detector = None
+_fraud_ring_detector_pid = None
+_fraud_ring_detector_lock = threading.Lock()
+
+def get_fraud_ring_detector(db_manager=None, config: Optional[Dict] = None) -> FraudRingDetector:
+    """Get the process-wide fraud ring detector (intake and scoring share it), creating it after fork if needed"""
+    global _fraud_ring_detector, _fraud_ring_detector_pid
+    
+    with _fraud_ring_detector_lock:
+        if _fraud_ring_detector is None or _fraud_ring_detector_pid != os.getpid():
+            _fraud_ring_detector = FraudRingDetector(db_manager, config)
+            _fraud_ring_detector_pid = os.getpid()
+        elif db_manager and not _fraud_ring_detector.db_manager:
+            _fraud_ring_detector.db_manager = db_manager
+        return _fraud_ring_detector
+
+if __name__ == "__main__":
+    # Example usage and testing
+    import random
+    import tempfile
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    detector = FraudRingDetector(config={'snapshot_path': os.path.join(tempfile.mkdtemp(), 'rings.json')})
+    
+    random.seed(3)
+    start = time.time()
+    for i in range(100000):
+        detector.add_application({
+            'id': f"APP{i}",
+            'phone': f"555{random.randint(0, 9999999):07d}",
+            'email': f"user{i}@example.com",
+            'ip_address': f"10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(0, 255)}",
+            'loan_amount': random.randint(1000, 50000),
+            'status': random.choice(['approved', 'rejected', 'pending'])
+        })
+    print(f"Indexed 100000 applications in {time.time() - start:.2f}s")
+    
+    # A ring reusing two phones and one device across many identities
+    for i in range(8):
+        detector.add_application({'id': f"RING{i}", 'phone': f"555000000{i % 2}", 'device_id': 'device-x' if i % 3 else None,
+                                  'email': f"ring{i}@example.com", 'loan_amount': 25000,
+                                  'status': 'rejected' if i < 3 else 'pending'})
+    
+    start = time.perf_counter()
+    stats = detector.get_ring_stats('RING7')
+    print(f"Lookup took {(time.perf_counter() - start) * 1e6:.1f}us: {stats}")
+    print(f"Ring risk: {detector.calculate_ring_risk(stats):.2f}")
+    
+    detector.save_snapshot()
+    restored = FraudRingDetector(config={'snapshot_path': detector.config['snapshot_path']})
+    print(f"Restored: {restored.get_ring_stats('RING7')}")
+    print(detector.get_metrics())
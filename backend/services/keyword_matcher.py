@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Keyword Matcher
+LoanFlow Personal Loan Management System
+
+This module finds keyword groups in customer messages including:
+- One compiled word-boundary regex over every keyword of every group
+- Keywords folded into a character trie so each position is tried once, not once per keyword
+- Keywords shared by several groups (e.g. complaint is negative and high priority)
+- Batch matching for inquiry backlogs
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional
+
+class KeywordMatcher:
+    """Match named keyword groups in text with one compiled pattern"""
+    
+    def __init__(self, groups: Dict[str, List[str]]):
+        self.logger = logging.getLogger(__name__)
+        self.groups = {name: list(keywords) for name, keywords in groups.items()}
+        
+        # Keyword -> every group it belongs to
+        self.keyword_groups = {}
+        for name, keywords in self.groups.items():
+            for keyword in keywords:
+                self.keyword_groups.setdefault(keyword.lower(), []).append(name)
+        
+        # Keyword at a word start, inflections (thanks, disputed) still match their keyword.
+        # Unlike substring search a keyword inside a word does not match (due in overdue,
+        # happy in unhappy), so such compounds must be listed as keywords of their own
+        self.pattern = re.compile(r"\b(" + self._build_trie_pattern(self.keyword_groups) + r")\w*")
+    
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """Distinct matched keywords per group (every group present, possibly empty)"""
+        matches = {name: [] for name in self.groups}
+        
+        for keyword in dict.fromkeys(self.pattern.findall(text.lower() if text else '')):
+            for name in self.keyword_groups[keyword]:
+                matches[name].append(keyword)
+        
+        return matches
+    
+    def match_batch(self, texts: List[Optional[str]]) -> List[Dict[str, List[str]]]:
+        """Match many texts, in input order"""
+        return [self.match(text) for text in texts]
+    
+    # Helper Methods
+    def _build_trie_pattern(self, keywords) -> str:
+        """Regex alternation shaped as a trie (longest keyword wins on shared prefixes)"""
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        
+        def build(node: Dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            # A keyword ending here makes the longer continuations optional
+            return f"(?:{body})?" if '' in node else body
+        
+        return build(trie) or '(?!)'
+
+if __name__ == "__main__":
+    # Example usage and testing
+    import time
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    matcher = KeywordMatcher({
+        'positive': ['great', 'thank', 'appreciate'],
+        'negative': ['terrible', 'frustrated', 'complaint'],
+        'high': ['urgent', 'complaint', 'fraud'],
+        'medium': ['payment', 'late', 'help']
+    })
+    
+    print(matcher.match("Thanks for the help, but my payment was late and I'm frustrated"))
+    
+    messages = ["I want to file a complaint about a fraudulent charge, this is urgent"] * 10000
+    start = time.time()
+    matcher.match_batch(messages)
+    print(f"Matched {len(messages)} messages in {time.time() - start:.3f}s")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Knowledge Base Retrieval
+LoanFlow Personal Loan Management System
+
+This module answers common customer inquiries locally including:
+- BM25 scoring over FAQ entries, response templates and resolved answers
+- Sparse document-term matrix with vectorized query scoring
+- Incremental upserts without re-tokenizing the existing corpus
+- Confidence estimate for deciding when a local answer is good enough
+"""
+
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+from datetime import datetime
+import numpy as np
+from scipy import sparse
+
+class KnowledgeBase:
+    """In-memory BM25 index of question and answer documents"""
+    
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+    
+    STOPWORDS = frozenset("""
+        a an and are as at be but by can do does for from have how i if in is it its me my of on or our
+        so that the their there this to was we what when where which who will with would you your
+    """.split())
+    
+    def __init__(self, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        
+        self.config = {
+            'k1': 1.5,
+            'b': 0.75,
+            'question_weight': 2,  # Question tokens count this many times against answer tokens
+            'min_confidence': 0.6,  # Share of query IDF mass matched by the best document
+            'min_margin': 1.1  # Best score must beat the runner-up by this ratio
+        }
+        if config:
+            self.config.update(config)
+        
+        self.documents = []  # Document dicts in index order
+        self.doc_index = {}  # Document id -> position
+        self.term_frequencies = []  # Per document {term_id: count}
+        self.doc_lengths = []
+        self.document_frequency = []  # Per term number of documents containing it
+        self.vocabulary = {}  # Term -> term id
+        
+        self.weights = None  # BM25 weight matrix (terms x documents, CSR)
+        self.idf = None
+        self.dirty = False
+        self.lock = threading.Lock()
+        
+        self.metrics = {
+            'documents': 0,
+            'rebuilds': 0,
+            'last_rebuild_ms': 0.0,
+            'searches': 0
+        }
+    
+    # Indexing
+    def add_documents(self, documents: List[Dict]) -> int:
+        """Insert or replace documents by id (id, question, answer, source)"""
+        with self.lock:
+            for document in documents:
+                tokens = self._tokenize(document.get('question', '')) * self.config['question_weight'] + \
+                         self._tokenize(document.get('answer', ''))
+                if not tokens:
+                    continue
+                
+                counts = {}
+                for token in tokens:
+                    term_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                    if term_id == len(self.document_frequency):
+                        self.document_frequency.append(0)
+                    counts[term_id] = counts.get(term_id, 0) + 1
+                
+                position = self.doc_index.get(document['id'])
+                if position is None:
+                    position = len(self.documents)
+                    self.doc_index[document['id']] = position
+                    self.documents.append(None)
+                    self.term_frequencies.append({})
+                    self.doc_lengths.append(0)
+                
+                # Replace an existing document's contribution to document frequency
+                for term_id in self.term_frequencies[position]:
+                    self.document_frequency[term_id] -= 1
+                for term_id in counts:
+                    self.document_frequency[term_id] += 1
+                
+                self.documents[position] = {**document, 'indexed_at': datetime.now().isoformat()}
+                self.term_frequencies[position] = counts
+                self.doc_lengths[position] = len(tokens)
+            
+            self.dirty = True
+            self.metrics['documents'] = len(self.documents)
+            return len(self.documents)
+    
+    # Retrieval
+    def search(self, query: str, limit: int = 3) -> List[Dict]:
+        """Rank documents for a query by BM25 score"""
+        with self.lock:
+            if self.dirty:
+                self._rebuild()
+            weights, idf, documents = self.weights, self.idf, self.documents
+        
+        self.metrics['searches'] += 1
+        if weights is None or not documents:
+            return []
+        
+        term_ids, query_idf = self._get_query_terms(query, idf)
+        if not term_ids:
+            return []
+        
+        # Query scoring is one sparse row slice and column sum
+        scores = np.asarray(weights[term_ids].sum(axis=0)).ravel()
+        top = np.argsort(scores)[::-1][:max(limit, 2)]
+        top = [i for i in top if scores[i] > 0]
+        
+        results = []
+        for rank, i in enumerate(top[:limit]):
+            matched = weights[term_ids, i].toarray().ravel() > 0
+            runner_up = scores[top[rank + 1]] if rank + 1 < len(top) else 0.0
+            results.append({
+                **documents[i],
+                'score': round(float(scores[i]), 4),
+                'confidence': round(float(idf[term_ids][matched].sum() / query_idf), 4),
+                'margin': round(float(scores[i] / runner_up), 4) if runner_up else None
+            })
+        
+        return results
+    
+    def answer(self, query: str) -> Optional[Dict]:
+        """Best document if it is a confident match, otherwise None"""
+        results = self.search(query, limit=2)
+        if not results:
+            return None
+        
+        best = results[0]
+        if best['confidence'] < self.config['min_confidence']:
+            return None
+        if best['margin'] is not None and best['margin'] < self.config['min_margin']:
+            return None
+        
+        return best
+    
+    def get_metrics(self) -> Dict:
+        """Get index metrics"""
+        return {
+            **self.metrics,
+            'vocabulary': len(self.vocabulary)
+        }
+    
+    # Helper Methods
+    def _tokenize(self, text: str) -> List[str]:
+        """Lowercase word tokens with stopwords removed and common suffixes folded"""
+        tokens = []
+        for token in self.TOKEN_PATTERN.findall((text or '').lower()):
+            if token in self.STOPWORDS:
+                continue
+            if len(token) > 4 and token.endswith('ies'):
+                token = token[:-3] + 'y'
+            elif len(token) > 5 and token.endswith('ing'):
+                token = token[:-3]
+            elif len(token) > 4 and token.endswith('ed'):
+                token = token[:-2]
+            elif len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+                token = token[:-1]
+            tokens.append(token)
+        return tokens
+    
+    def _get_query_terms(self, query: str, idf: np.ndarray) -> tuple:
+        """Known term ids of a query and the IDF mass of all its terms"""
+        term_ids = []
+        query_idf = 0.0
+        unknown_idf = float(idf.max()) if len(idf) else 1.0
+        
+        for token in dict.fromkeys(self._tokenize(query)):
+            term_id = self.vocabulary.get(token)
+            if term_id is None or term_id >= len(idf):
+                # Unseen words count against confidence like the rarest known word
+                query_idf += unknown_idf
+            else:
+                term_ids.append(term_id)
+                query_idf += float(idf[term_id])
+        
+        return term_ids, query_idf
+    
+    def _rebuild(self):
+        """Recompute BM25 weights from stored term frequencies (no re-tokenizing)"""
+        start_time = time.time()
+        
+        n_docs = len(self.documents)
+        lengths = np.asarray(self.doc_lengths, dtype=np.float64)
+        df = np.asarray(self.document_frequency, dtype=np.float64)
+        
+        rows, cols, tf = [], [], []
+        for doc_id, counts in enumerate(self.term_frequencies):
+            rows.extend(counts.keys())
+            cols.extend([doc_id] * len(counts))
+            tf.extend(counts.values())
+        
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        tf = np.asarray(tf, dtype=np.float64)
+        
+        k1, b = self.config['k1'], self.config['b']
+        idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        norm = k1 * (1.0 - b + b * lengths[cols] / lengths.mean())
+        values = idf[rows] * tf * (k1 + 1.0) / (tf + norm)
+        
+        self.weights = sparse.csr_matrix((values, (rows, cols)), shape=(len(self.vocabulary), n_docs))
+        self.idf = idf
+        self.dirty = False
+        
+        self.metrics['rebuilds'] += 1
+        self.metrics['last_rebuild_ms'] = round((time.time() - start_time) * 1000, 3)
+
+if __name__ == "__main__":
+    # Example usage and testing
+    logging.basicConfig(level=logging.INFO)
+    
+    kb = KnowledgeBase()
+    kb.add_documents([
+        {'id': 'faq-1', 'source': 'faq', 'question': "Can I pay off my loan early without penalties?",
+         'answer': "Yes. There are no prepayment penalties on our personal loans."},
+        {'id': 'faq-2', 'source': 'faq', 'question': "What documents do I need to apply for a loan?",
+         'answer': "A government ID, recent pay stubs and bank statements."},
+        {'id': 'faq-3', 'source': 'faq', 'question': "What happens if I miss a payment?",
+         'answer': "A late fee applies after a 10 day grace period. Contact us to set up a plan."}
+    ])
+    
+    for query in ["is there a penalty for paying my loan off early", "which documents are needed",
+                  "I want to dispute a charge on my card"]:
+        start = time.perf_counter()
+        result = kb.answer(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{query!r}: {result['id'] if result else 'no confident match'} ({elapsed:.2f}ms)")
+    
+    print(kb.get_metrics())
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+LLM Generation Engine
+LoanFlow Personal Loan Management System
+
+This module provides concurrent chat completion generation including:
+- Async HTTP calls to an OpenAI-compatible API (configurable base URL)
+- Bounded concurrency per generation batch
+- Token bucket pacing on requests and tokens per minute
+- Retries with jittered exponential backoff and Retry-After support
+- Per-call timeouts and results returned in request order
+- Streaming completions with time-to-first-token metrics and an SSE adapter
+"""
+
+import logging
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Iterator
+from datetime import datetime
+import httpx
+
+class LLMStreamInterrupted(Exception):
+    """Stream failed after text reached the caller, so the received text is incomplete"""
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate"""
+    
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait until amount tokens are available, returns seconds waited"""
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            
+            await asyncio.sleep(delay)
+            waited += delay
+    
+    def wait(self, amount: float = 1.0) -> float:
+        """Blocking acquire for synchronous callers, returns seconds waited"""
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            
+            time.sleep(delay)
+            waited += delay
+    
+    def refund(self, amount: float):
+        """Return unused tokens (estimate was higher than actual usage)"""
+        if amount <= 0:
+            return
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+    
+    # Helper Methods
+    def _refill(self):
+        """Add tokens for elapsed time"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+class LLMEngine:
+    """Concurrent, rate limited chat completion client"""
+    
+    RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+    
+    def __init__(self, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        
+        self.config = {
+            'api_key': os.getenv('OPENAI_API_KEY'),
+            'base_url': os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1'),
+            'model': 'gpt-4',
+            'max_tokens': 2000,
+            'temperature': 0.7,
+            'max_concurrency': int(os.getenv('LLM_MAX_CONCURRENCY', '8')),
+            'requests_per_minute': int(os.getenv('LLM_REQUESTS_PER_MINUTE', '500')),
+            'tokens_per_minute': int(os.getenv('LLM_TOKENS_PER_MINUTE', '40000')),
+            'timeout': float(os.getenv('LLM_TIMEOUT', '60')),  # seconds per call
+            'max_retries': 4,
+            'backoff_base': 0.5,  # seconds
+            'backoff_max': 20.0
+        }
+        if config:
+            self.config.update(config)
+        
+        self.request_bucket = TokenBucket(self.config['requests_per_minute'])
+        self.token_bucket = TokenBucket(self.config['tokens_per_minute'])
+        
+        self.metrics_lock = threading.Lock()
+        self.metrics = {
+            'requests': 0,
+            'completions': 0,
+            'failures': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'rate_limited': 0,  # 429 responses
+            'pacing_wait': 0.0,  # seconds spent waiting on the token buckets
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'avg_latency': 0.0,
+            'streams': 0,
+            'stream_failures': 0,
+            'avg_time_to_first_token': 0.0,
+            'avg_stream_time': 0.0
+        }
+    
+    def is_configured(self) -> bool:
+        """API key set, or a non-default endpoint such as a local stub"""
+        return bool(self.config['api_key']) or 'api.openai.com' not in self.config['base_url']
+    
+    def generate_batch(self, requests: List[Dict]) -> List[Optional[str]]:
+        """Generate completions from a synchronous caller, in request order (async callers await generate_many)"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.generate_many(requests))
+        
+        # asyncio.run cannot nest inside the caller's loop: run a private loop on a worker thread,
+        # which blocks the caller's loop until the batch is done
+        self.logger.warning("generate_batch called inside a running event loop, await generate_many instead")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.generate_many(requests)).result()
+    
+    async def generate_many(self, requests: List[Dict]) -> List[Optional[str]]:
+        """Generate completions concurrently, in request order (None on failure)"""
+        if not requests:
+            return []
+        
+        semaphore = asyncio.Semaphore(self.config['max_concurrency'])
+        limits = httpx.Limits(max_connections=self.config['max_concurrency'])
+        
+        async with httpx.AsyncClient(base_url=self.config['base_url'], headers=self._get_headers(),
+                                     timeout=self.config['timeout'], limits=limits) as client:
+            async def run(request: Dict) -> Optional[str]:
+                async with semaphore:
+                    return await self.generate(request, client)
+            
+            return await asyncio.gather(*[run(request) for request in requests])
+    
+    async def generate(self, request: Dict, client: Optional[httpx.AsyncClient] = None) -> Optional[str]:
+        """Generate one completion with pacing and retries (None on failure)"""
+        if client is None:
+            async with httpx.AsyncClient(base_url=self.config['base_url'], headers=self._get_headers(),
+                                         timeout=self.config['timeout']) as own_client:
+                return await self.generate(request, own_client)
+        
+        payload = self._build_payload(request)
+        estimated_tokens = self._estimate_tokens(payload)
+        
+        for attempt in range(self.config['max_retries'] + 1):
+            waited = await self.request_bucket.acquire(1)
+            waited += await self.token_bucket.acquire(estimated_tokens)
+            
+            start_time = time.time()
+            retry_after = None
+            
+            try:
+                self._record('requests', pacing_wait=waited)
+                response = await client.post('/chat/completions', json=payload)
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    usage = data.get('usage') or {}
+                    
+                    # Reserved max_tokens up front, give back what was not used
+                    if usage.get('total_tokens'):
+                        self.token_bucket.refund(estimated_tokens - usage['total_tokens'])
+                    
+                    self._record('completions', latency=time.time() - start_time, usage=usage)
+                    return data['choices'][0]['message']['content'].strip()
+                
+                if response.status_code not in self.RETRYABLE_STATUS:
+                    self.logger.error(f"LLM request rejected ({response.status_code}): {response.text[:200]}")
+                    break
+                
+                if response.status_code == 429:
+                    self._record('rate_limited')
+                retry_after = self._parse_retry_after(response.headers.get('retry-after'))
+                
+            except httpx.TimeoutException:
+                self._record('timeouts')
+                self.logger.warning(f"LLM request timed out after {self.config['timeout']}s")
+            except httpx.TransportError as e:
+                self.logger.warning(f"LLM transport error: {str(e)}")
+            except Exception as e:
+                self.logger.error(f"LLM request error: {str(e)}")
+                break
+            
+            if attempt < self.config['max_retries']:
+                self._record('retries')
+                await asyncio.sleep(retry_after if retry_after is not None else self._get_backoff(attempt))
+        
+        self._record('failures')
+        return None
+    
+    def stream(self, request: Dict) -> Iterator[str]:
+        """Yield completion text chunks as they arrive.
+        
+        Yields nothing when the request fails before the first chunk. Raises
+        LLMStreamInterrupted when it fails after text was yielded, including a
+        stream that ends without [DONE].
+        """
+        payload = {**self._build_payload(request), 'stream': True}
+        estimated_tokens = self._estimate_tokens(payload)
+        
+        with httpx.Client(base_url=self.config['base_url'], headers=self._get_headers(),
+                          timeout=self.config['timeout']) as client:
+            for attempt in range(self.config['max_retries'] + 1):
+                waited = self.request_bucket.wait(1)
+                waited += self.token_bucket.wait(estimated_tokens)
+                
+                start_time = time.time()
+                first_token_time = None
+                retry_after = None
+                
+                try:
+                    self._record('requests', pacing_wait=waited)
+                    with client.stream('POST', '/chat/completions', json=payload) as response:
+                        if response.status_code == 200:
+                            for chunk in self._iter_stream_chunks(response):
+                                if first_token_time is None:
+                                    first_token_time = time.time()
+                                yield chunk
+                            
+                            self._record_stream(first_token_time - start_time if first_token_time else None,
+                                                time.time() - start_time)
+                            return
+                        
+                        response.read()
+                        if response.status_code not in self.RETRYABLE_STATUS:
+                            self.logger.error(f"LLM stream rejected ({response.status_code}): {response.text[:200]}")
+                            break
+                        
+                        if response.status_code == 429:
+                            self._record('rate_limited')
+                        retry_after = self._parse_retry_after(response.headers.get('retry-after'))
+                    
+                except httpx.TimeoutException:
+                    self._record('timeouts')
+                    self.logger.warning(f"LLM stream timed out after {self.config['timeout']}s")
+                except httpx.TransportError as e:
+                    self.logger.warning(f"LLM stream transport error: {str(e)}")
+                except Exception as e:
+                    self.logger.error(f"LLM stream error: {str(e)}")
+                    break
+                
+                # Retrying after text reached the caller would repeat it
+                if first_token_time is not None:
+                    break
+                
+                if attempt < self.config['max_retries']:
+                    self._record('retries')
+                    time.sleep(retry_after if retry_after is not None else self._get_backoff(attempt))
+        
+        self._record('stream_failures')
+        if first_token_time is not None:
+            raise LLMStreamInterrupted("LLM stream ended before completion")
+    
+    def get_metrics(self) -> Dict:
+        """Get generation metrics"""
+        with self.metrics_lock:
+            metrics = self.metrics.copy()
+        
+        metrics['pacing_wait'] = round(metrics['pacing_wait'], 3)
+        metrics['avg_latency'] = round(metrics['avg_latency'], 3)
+        metrics['avg_time_to_first_token'] = round(metrics['avg_time_to_first_token'], 3)
+        metrics['avg_stream_time'] = round(metrics['avg_stream_time'], 3)
+        metrics['last_updated'] = datetime.now().isoformat()
+        return metrics
+    
+    # Helper Methods
+    def _build_payload(self, request: Dict) -> Dict:
+        """Build chat completion request body"""
+        messages = []
+        if request.get('system'):
+            messages.append({'role': 'system', 'content': request['system']})
+        messages.append({'role': 'user', 'content': request['prompt']})
+        
+        return {
+            'model': request.get('model', self.config['model']),
+            'messages': messages,
+            'max_tokens': request.get('max_tokens', self.config['max_tokens']),
+            'temperature': request.get('temperature', self.config['temperature'])
+        }
+    
+    def _iter_stream_chunks(self, response: httpx.Response) -> Iterator[str]:
+        """Text deltas from a server-sent events completion stream (raises if it ends before [DONE])"""
+        for line in response.iter_lines():
+            if not line.startswith('data:'):
+                continue
+            
+            data = line[5:].strip()
+            if data == '[DONE]':
+                return
+            
+            choices = json.loads(data).get('choices') or [{}]
+            content = (choices[0].get('delta') or {}).get('content')
+            if content:
+                yield content
+        
+        raise httpx.RemoteProtocolError("Stream closed before [DONE]")
+    
+    def _estimate_tokens(self, payload: Dict) -> int:
+        """Prompt tokens (about 4 characters each) plus the completion allowance"""
+        prompt_chars = sum(len(message['content']) for message in payload['messages'])
+        return prompt_chars // 4 + payload['max_tokens']
+    
+    def _get_headers(self) -> Dict:
+        """Request headers"""
+        headers = {'Content-Type': 'application/json'}
+        if self.config['api_key']:
+            headers['Authorization'] = f"Bearer {self.config['api_key']}"
+        return headers
+    
+    def _get_backoff(self, attempt: int) -> float:
+        """Full jitter exponential backoff"""
+        return random.uniform(0, min(self.config['backoff_max'], self.config['backoff_base'] * (2 ** attempt)))
+    
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        """Seconds from a Retry-After header (capped by backoff_max)"""
+        try:
+            return min(float(value), self.config['backoff_max']) if value else None
+        except ValueError:
+            return None
+    
+    def _record(self, counter: str, latency: Optional[float] = None, usage: Optional[Dict] = None, pacing_wait: float = 0.0):
+        """Update metrics"""
+        with self.metrics_lock:
+            self.metrics[counter] += 1
+            self.metrics['pacing_wait'] += pacing_wait
+            
+            if usage:
+                self.metrics['prompt_tokens'] += usage.get('prompt_tokens', 0)
+                self.metrics['completion_tokens'] += usage.get('completion_tokens', 0)
+            
+            if latency is not None:
+                if self.metrics['avg_latency'] == 0:
+                    self.metrics['avg_latency'] = latency
+                else:
+                    self.metrics['avg_latency'] = self.metrics['avg_latency'] * 0.9 + latency * 0.1
+    
+    def _record_stream(self, time_to_first_token: Optional[float], total_time: float):
+        """Update streaming metrics (moving averages)"""
+        with self.metrics_lock:
+            self.metrics['streams'] += 1
+            
+            for key, value in (('avg_time_to_first_token', time_to_first_token), ('avg_stream_time', total_time)):
+                if value is None:
+                    continue
+                if self.metrics[key] == 0:
+                    self.metrics[key] = value
+                else:
+                    self.metrics[key] = self.metrics[key] * 0.9 + value * 0.1
+
+def format_sse(data: Any, event: Optional[str] = None) -> str:
+    """Encode one server-sent event frame (JSON data)"""
+    frame = f"event: {event}\n" if event else ''
+    return f"{frame}data: {json.dumps(data)}\n\n"
+
+if __name__ == "__main__":
+    # Example usage and testing against a local stub of the chat completions API
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    class StubHandler(BaseHTTPRequestHandler):
+        calls = 0
+        
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            StubHandler.calls += 1
+            
+            if body.get('stream'):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                for word in f"streamed answer to {body['messages'][-1]['content']}".split():
+                    time.sleep(0.1)
+                    delta = {'choices': [{'delta': {'content': word + ' '}}]}
+                    self.wfile.write(f"data: {json.dumps(delta)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                return
+            
+            # Every fifth call is rate limited to exercise retries
+            if StubHandler.calls % 5 == 0:
+                self.send_response(429)
+                self.send_header('Retry-After', '0.2')
+                self.end_headers()
+                return
+            
+            time.sleep(0.5)
+            content = f"echo: {body['messages'][-1]['content']}"
+            payload = json.dumps({
+                'choices': [{'message': {'role': 'assistant', 'content': content}}],
+                'usage': {'prompt_tokens': 10, 'completion_tokens': 20, 'total_tokens': 30}
+            }).encode()
+            
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    engine = LLMEngine({'base_url': f"http://127.0.0.1:{server.server_port}/v1", 'max_concurrency': 4, 'max_tokens': 100})
+    
+    start = time.time()
+    results = engine.generate_batch([{'prompt': f"topic {i}"} for i in range(12)])
+    print(f"12 completions in {time.time() - start:.2f}s (sequential would take ~6s)")
+    print(results)
+    
+    start = time.time()
+    for chunk in engine.stream({'prompt': 'how do I apply?'}):
+        print(f"{time.time() - start:.2f}s {chunk!r}")
+    print(engine.get_metrics())
+    
+    server.shutdown()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache
+LoanFlow Personal Loan Management System
+
+This module caches generated LLM content including:
+- Content-addressed keys over model, prompts and sampling settings
+- Time to live per content type
+- Redis persistence, or local disk when Redis is unavailable
+- Pinned entries served while stale and refreshed in the background
+- Hit rate metrics
+"""
+
+import logging
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Callable
+from datetime import datetime
+
+class LLMResponseCache:
+    """Cache of generated content keyed by a hash of the generation inputs"""
+    
+    def __init__(self, redis_manager=None, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.redis_manager = redis_manager
+        self.status = 'stopped'
+        
+        self.config = {
+            'cache_dir': os.getenv('LLM_CACHE_DIR', 'data/llm_responses'),
+            'namespace': 'llm_responses',
+            'default_ttl': 86400,
+            'ttl_by_content_type': {
+                'blog_post': 7 * 86400,
+                'landing_page': 7 * 86400,
+                'email_template': 7 * 86400,
+                'faq_answer': 30 * 86400,
+                'social_media': 86400,
+                'customer_response': 86400
+            },
+            # Pinned content types never miss, stale entries refresh in the background
+            'pinned_content_types': [t for t in os.getenv('LLM_CACHE_PINNED_TYPES', '').split(',') if t],
+            'pinned_retention': 90 * 86400,  # How long a pinned entry survives without refresh
+            'refresh_interval': 300  # seconds between background refresh passes
+        }
+        if config:
+            self.config.update(config)
+        
+        self.pinned = {}  # key -> request, for background refresh
+        self.pinned_lock = threading.Lock()
+        self.refresh_func = None
+        self.stop_event = threading.Event()
+        self.refresh_thread = None
+        
+        self.metrics_lock = threading.Lock()
+        self.metrics = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'refreshes': 0,
+            'refresh_failures': 0
+        }
+    
+    def start(self, refresh_func: Callable[[List[Dict]], List[Optional[str]]]):
+        """Start background refresh of pinned entries using refresh_func(requests)"""
+        self.refresh_func = refresh_func
+        if self.status == 'running':
+            return
+        
+        self.stop_event.clear()
+        self.refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True, name='llm-cache-refresh')
+        self.refresh_thread.start()
+        self.status = 'running'
+    
+    def stop(self):
+        """Stop background refresh"""
+        self.stop_event.set()
+        if self.refresh_thread:
+            self.refresh_thread.join(timeout=5)
+        self.status = 'stopped'
+    
+    # Cache Operations
+    def build_key(self, request: Dict) -> str:
+        """Content address of a generation request"""
+        material = json.dumps([
+            request.get('model'),
+            request.get('system'),
+            request.get('prompt'),
+            request.get('temperature'),
+            request.get('max_tokens')
+        ], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode()).hexdigest()
+    
+    def get(self, request: Dict) -> Optional[str]:
+        """Get cached content for a request (pinned entries are served when stale)"""
+        try:
+            key = self.build_key(request)
+            entry = self._read(key)
+            
+            if entry is None:
+                self._record('misses')
+                return None
+            
+            if time.time() < entry['fresh_until']:
+                self._record('hits')
+                return entry['content']
+            
+            if self._is_pinned(request):
+                # Serve stale, the refresh loop regenerates it
+                self._track_pinned(key, request)
+                self._record('stale_hits')
+                return entry['content']
+            
+            self._record('misses')
+            return None
+            
+        except Exception as e:
+            self.logger.error(f"LLM cache get error: {str(e)}")
+            self._record('misses')
+            return None
+    
+    def set(self, request: Dict, content: str) -> bool:
+        """Store generated content for a request"""
+        try:
+            key = self.build_key(request)
+            ttl = self._get_ttl(request.get('content_type'))
+            pinned = self._is_pinned(request)
+            
+            entry = {
+                'content': content,
+                'content_type': request.get('content_type'),
+                'created_at': time.time(),
+                'fresh_until': time.time() + ttl
+            }
+            
+            # Pinned entries outlive their freshness so they can be served stale
+            self._write(key, entry, self.config['pinned_retention'] if pinned else ttl)
+            
+            if pinned:
+                self._track_pinned(key, request)
+            
+            self._record('stores')
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"LLM cache set error: {str(e)}")
+            return False
+    
+    def refresh_pinned(self) -> int:
+        """Regenerate stale pinned entries, returns number refreshed"""
+        if not self.refresh_func:
+            return 0
+        
+        with self.pinned_lock:
+            pinned = list(self.pinned.items())
+        
+        stale = []
+        for key, request in pinned:
+            entry = self._read(key)
+            if entry is None or time.time() >= entry['fresh_until']:
+                stale.append(request)
+        
+        if not stale:
+            return 0
+        
+        try:
+            results = self.refresh_func(stale)
+        except Exception as e:
+            self.logger.error(f"LLM cache refresh error: {str(e)}")
+            self._record('refresh_failures', len(stale))
+            return 0
+        
+        refreshed = 0
+        for request, content in zip(stale, results):
+            if content:
+                self.set(request, content)
+                refreshed += 1
+            else:
+                # Keep serving the stale copy, try again next pass
+                self._record('refresh_failures')
+        
+        self._record('refreshes', refreshed)
+        return refreshed
+    
+    def get_metrics(self) -> Dict:
+        """Get cache metrics"""
+        with self.metrics_lock:
+            metrics = self.metrics.copy()
+        
+        lookups = metrics['hits'] + metrics['stale_hits'] + metrics['misses']
+        metrics['hit_rate'] = round((metrics['hits'] + metrics['stale_hits']) / lookups, 4) if lookups else 0.0
+        metrics['pinned_entries'] = len(self.pinned)
+        metrics['backend'] = 'redis' if self.redis_manager else 'disk'
+        metrics['last_updated'] = datetime.now().isoformat()
+        return metrics
+    
+    # Helper Methods
+    def _read(self, key: str) -> Optional[Dict]:
+        """Read entry from Redis or disk"""
+        if self.redis_manager:
+            return self.redis_manager.cache_get(self.config['namespace'], key)
+        
+        path = self._get_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        
+        if time.time() >= entry.get('expires_at', 0):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        
+        return entry
+    
+    def _write(self, key: str, entry: Dict, ttl: int):
+        """Write entry to Redis or disk"""
+        if self.redis_manager:
+            self.redis_manager.cache_set(self.config['namespace'], key, entry, ttl)
+            return
+        
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({**entry, 'expires_at': time.time() + ttl}, f)
+        os.replace(temp_path, path)
+    
+    def _get_path(self, key: str) -> str:
+        """Disk location of an entry (sharded by key prefix)"""
+        return os.path.join(self.config['cache_dir'], key[:2], f"{key}.json")
+    
+    def _get_ttl(self, content_type: Optional[str]) -> int:
+        """Freshness lifetime for a content type"""
+        return self.config['ttl_by_content_type'].get(content_type, self.config['default_ttl'])
+    
+    def _is_pinned(self, request: Dict) -> bool:
+        """Check if a request's content type is pinned"""
+        return request.get('pinned', False) or request.get('content_type') in self.config['pinned_content_types']
+    
+    def _track_pinned(self, key: str, request: Dict):
+        """Remember pinned request for background refresh"""
+        with self.pinned_lock:
+            self.pinned[key] = request
+    
+    def _refresh_loop(self):
+        """Background refresh of stale pinned entries"""
+        while not self.stop_event.wait(self.config['refresh_interval']):
+            self.refresh_pinned()
+    
+    def _record(self, counter: str, amount: int = 1):
+        """Update metrics"""
+        with self.metrics_lock:
+            self.metrics[counter] += amount
+
+if __name__ == "__main__":
+    # Example usage and testing
+    import tempfile
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    cache = LLMResponseCache(config={
+        'cache_dir': tempfile.mkdtemp(),
+        'ttl_by_content_type': {'faq_answer': 1},
+        'pinned_content_types': ['faq_answer']
+    })
+    cache.start(lambda requests: [f"refreshed answer to {r['prompt']}" for r in requests])
+    
+    request = {'model': 'gpt-4', 'system': 'You answer FAQs', 'prompt': 'Can I pay early?',
+               'temperature': 0.7, 'content_type': 'faq_answer'}
+    
+    print(f"First lookup: {cache.get(request)}")
+    cache.set(request, "Yes, without penalties.")
+    print(f"Second lookup: {cache.get(request)}")
+    
+    time.sleep(1.1)
+    print(f"Stale lookup: {cache.get(request)}")
+    cache.refresh_pinned()
+    print(f"After refresh: {cache.get(request)}")
+    print(cache.get_metrics())
+    
+    cache.stop()
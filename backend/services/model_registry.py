@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Model Registry
+LoanFlow Personal Loan Management System
+
+This module manages versioned scoring models including:
+- Versioned artifacts bundling the fitted model, scaler and compiled evaluator
+- Memory-mapped loading so worker processes share model pages
+- Warmup before a version serves traffic
+- Atomic hot swap of the active version without a restart
+- Per-version latency and score distribution metrics
+"""
+
+import logging
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+import numpy as np
+import joblib
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.tree_ensemble_compiler import TreeEnsembleCompiler
+
+class LoadedModel:
+    """Warmed model version ready to score, with its own metrics"""
+    
+    SCORE_BINS = np.linspace(0.0, 1.0, 11)
+    
+    def __init__(self, model_name: str, version: str, artifact: Dict, latency_samples: int = 1000):
+        self.model_name = model_name
+        self.version = version
+        self.model = artifact['model']
+        self.scaler = artifact.get('scaler')
+        self.compiled = artifact.get('compiled')
+        self.metadata = artifact.get('metadata', {})
+        self.n_features = artifact.get('n_features') or getattr(self.model, 'n_features_in_', None)
+        self.loaded_at = datetime.now().isoformat()
+        
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=latency_samples)
+        self.metrics = {
+            'calls': 0,
+            'rows': 0,
+            'errors': 0,
+            'score_sum': 0.0,
+            'score_min': None,
+            'score_max': None,
+            'score_histogram': [0] * (len(self.SCORE_BINS) - 1),
+            'label_counts': {}
+        }
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities (compiled evaluator when available)"""
+        start_time = time.perf_counter()
+        try:
+            if self.compiled is not None:
+                proba = self.compiled.predict_proba(X)
+            else:
+                proba = self.model.predict_proba(self._scale(X))
+            
+            self._record(start_time, proba[:, -1])
+            return proba
+            
+        except Exception:
+            self._record_error()
+            raise
+    
+    def predict(self, X) -> np.ndarray:
+        """Predicted labels (compiled evaluator when available)"""
+        start_time = time.perf_counter()
+        try:
+            if self.compiled is not None:
+                labels = self.compiled.predict(X)
+            else:
+                labels = self.model.predict(self._scale(X))
+            
+            self._record(start_time, labels=labels)
+            return labels
+            
+        except Exception:
+            self._record_error()
+            raise
+    
+    def warmup(self):
+        """Run a dummy prediction so first real request pays no lazy setup"""
+        dummy = np.zeros((1, self.n_features or 1))
+        if hasattr(self.model, 'predict_proba'):
+            self.predict_proba(dummy)
+        else:
+            self.predict(dummy)
+        
+        # Warmup calls are not traffic
+        with self.lock:
+            self.latencies.clear()
+            self.metrics.update({
+                'calls': 0,
+                'rows': 0,
+                'score_sum': 0.0,
+                'score_min': None,
+                'score_max': None,
+                'score_histogram': [0] * (len(self.SCORE_BINS) - 1),
+                'label_counts': {}
+            })
+    
+    def get_metrics(self) -> Dict:
+        """Get latency and score distribution metrics for this version"""
+        with self.lock:
+            latencies = sorted(self.latencies)
+            metrics = {key: (value.copy() if isinstance(value, (list, dict)) else value)
+                       for key, value in self.metrics.items()}
+        
+        scored = sum(metrics['score_histogram'])
+        score_sum = metrics.pop('score_sum')
+        metrics['score_mean'] = round(score_sum / scored, 4) if scored else None
+        
+        if latencies:
+            metrics['avg_latency_us'] = round(sum(latencies) / len(latencies) * 1e6, 1)
+            metrics['p95_latency_us'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1e6, 1)
+        
+        metrics.update({
+            'version': self.version,
+            'compiled': self.compiled is not None,
+            'loaded_at': self.loaded_at
+        })
+        return metrics
+    
+    # Helper Methods
+    def _scale(self, X) -> np.ndarray:
+        """Apply the fitted preprocessing saved with the model"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return self.scaler.transform(X) if self.scaler is not None else X
+    
+    def _record(self, start_time: float, scores: Optional[np.ndarray] = None, labels: Optional[np.ndarray] = None):
+        """Record call latency and output distribution"""
+        latency = time.perf_counter() - start_time
+        
+        with self.lock:
+            self.latencies.append(latency)
+            self.metrics['calls'] += 1
+            
+            if scores is not None:
+                scores = np.asarray(scores, dtype=np.float64)
+                self.metrics['rows'] += len(scores)
+                self.metrics['score_sum'] += float(scores.sum())
+                self.metrics['score_min'] = float(scores.min()) if self.metrics['score_min'] is None else min(self.metrics['score_min'], float(scores.min()))
+                self.metrics['score_max'] = float(scores.max()) if self.metrics['score_max'] is None else max(self.metrics['score_max'], float(scores.max()))
+                
+                histogram, _ = np.histogram(np.clip(scores, 0.0, 1.0), bins=self.SCORE_BINS)
+                self.metrics['score_histogram'] = [a + int(b) for a, b in zip(self.metrics['score_histogram'], histogram)]
+            
+            if labels is not None:
+                self.metrics['rows'] += len(labels)
+                values, counts = np.unique(labels, return_counts=True)
+                for value, count in zip(values, counts):
+                    key = str(value.item() if hasattr(value, 'item') else value)
+                    self.metrics['label_counts'][key] = self.metrics['label_counts'].get(key, 0) + int(count)
+    
+    def _record_error(self):
+        """Record failed prediction"""
+        with self.lock:
+            self.metrics['errors'] += 1
+
+class ModelRegistry:
+    """Versioned on-disk model store with hot swap of active versions"""
+    
+    ARTIFACT_FILE = 'artifact.joblib'
+    MANIFEST_FILE = 'manifest.json'
+    ACTIVE_FILE = 'ACTIVE'
+    
+    def __init__(self, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.status = 'stopped'
+        
+        self.config = {
+            'registry_dir': os.getenv('MODEL_REGISTRY_DIR', 'models/registry'),
+            'mmap_mode': 'r',  # Share array pages between worker processes
+            'watch_interval': int(os.getenv('MODEL_REGISTRY_WATCH_INTERVAL', '30')),  # seconds
+            'compile': True,
+            'latency_samples': 1000,
+            'keep_versions': 5
+        }
+        if config:
+            self.config.update(config)
+        
+        self.compiler = TreeEnsembleCompiler()
+        
+        # Active versions, replaced by reference so readers never see a partial swap
+        self.active = {}
+        self.retired = {}  # model_name -> previous LoadedModel, kept for metrics
+        self.lock = threading.Lock()
+        
+        self.stop_event = threading.Event()
+        self.watch_thread = None
+        
+        self.metrics = {
+            'versions_registered': 0,
+            'swaps': 0,
+            'load_failures': 0,
+            'last_swap': None
+        }
+    
+    def start(self):
+        """Start watching active version pointers written by other processes"""
+        if self.status == 'running':
+            return
+        
+        self.stop_event.clear()
+        self.watch_thread = threading.Thread(target=self._watch_loop, daemon=True, name='model-registry-watch')
+        self.watch_thread.start()
+        self.status = 'running'
+    
+    def stop(self):
+        """Stop watching active version pointers"""
+        self.stop_event.set()
+        if self.watch_thread:
+            self.watch_thread.join(timeout=5)
+        self.status = 'stopped'
+    
+    def get_status(self) -> str:
+        """Get registry status"""
+        return self.status
+    
+    # Versions
+    def register(self, model_name: str, model: Any, scaler: Any = None, metadata: Optional[Dict] = None, activate: bool = True) -> Optional[str]:
+        """Save fitted model and preprocessing as a new version"""
+        try:
+            artifact = {
+                'model': model,
+                'scaler': scaler,
+                'compiled': None,
+                'n_features': getattr(model, 'n_features_in_', None),
+                'metadata': metadata or {}
+            }
+            
+            # Ship the compiled evaluator in the artifact so it is mmapped too
+            if self.config['compile'] and hasattr(model, 'estimators_'):
+                compiled = self.compiler.compile_models({model_name: model}, {model_name.replace('_model', '_scaler'): scaler}).get(model_name)
+                artifact['compiled'] = compiled
+            
+            version = datetime.now().strftime('%Y%m%d%H%M%S%f')
+            version_dir = os.path.join(self._get_model_dir(model_name), version)
+            os.makedirs(version_dir, exist_ok=True)
+            
+            # Uncompressed so numpy arrays can be memory mapped on load
+            artifact_path = os.path.join(version_dir, self.ARTIFACT_FILE)
+            temp_path = f"{artifact_path}.tmp"
+            joblib.dump(artifact, temp_path)
+            os.replace(temp_path, artifact_path)
+            
+            manifest = {
+                'model_name': model_name,
+                'version': version,
+                'model_type': type(model).__name__,
+                'has_scaler': scaler is not None,
+                'compiled': artifact['compiled'] is not None,
+                'sha256': self._file_digest(artifact_path),
+                'created_at': datetime.now().isoformat(),
+                'metadata': metadata or {}
+            }
+            self._write_json(os.path.join(version_dir, self.MANIFEST_FILE), manifest)
+            
+            self.metrics['versions_registered'] += 1
+            self.logger.info(f"Registered {model_name} version {version}")
+            
+            if activate:
+                self.activate(model_name, version)
+            
+            self._prune_versions(model_name)
+            return version
+            
+        except Exception as e:
+            self.logger.error(f"Model registration error for {model_name}: {str(e)}")
+            return None
+    
+    def list_versions(self, model_name: str) -> List[Dict]:
+        """List version manifests, newest first"""
+        try:
+            model_dir = self._get_model_dir(model_name)
+            if not os.path.isdir(model_dir):
+                return []
+            
+            manifests = []
+            for version in sorted(os.listdir(model_dir), reverse=True):
+                manifest_path = os.path.join(model_dir, version, self.MANIFEST_FILE)
+                if os.path.exists(manifest_path):
+                    with open(manifest_path) as f:
+                        manifests.append(json.load(f))
+            return manifests
+            
+        except Exception as e:
+            self.logger.error(f"Version listing error for {model_name}: {str(e)}")
+            return []
+    
+    def get_active_version(self, model_name: str) -> Optional[str]:
+        """Get version named by the on-disk active pointer"""
+        try:
+            with open(os.path.join(self._get_model_dir(model_name), self.ACTIVE_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+    
+    def activate(self, model_name: str, version: str) -> bool:
+        """Load, warm and atomically swap in a version"""
+        try:
+            loaded = self.load(model_name, version)
+            if loaded is None:
+                return False
+            
+            self._swap(model_name, loaded)
+            self._write_active_pointer(model_name, version)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Model activation error for {model_name} {version}: {str(e)}")
+            return False
+    
+    def rollback(self, model_name: str) -> bool:
+        """Activate the version registered before the active one"""
+        active_version = self.get_active_version(model_name)
+        versions = [manifest['version'] for manifest in self.list_versions(model_name)]
+        older = [version for version in versions if active_version is None or version < active_version]
+        
+        if not older:
+            self.logger.warning(f"No earlier version of {model_name} to roll back to")
+            return False
+        
+        return self.activate(model_name, older[0])
+    
+    def load(self, model_name: str, version: str) -> Optional[LoadedModel]:
+        """Memory-map a version from disk and warm it"""
+        try:
+            artifact_path = os.path.join(self._get_model_dir(model_name), version, self.ARTIFACT_FILE)
+            artifact = joblib.load(artifact_path, mmap_mode=self.config['mmap_mode'])
+            
+            loaded = LoadedModel(model_name, version, artifact, self.config['latency_samples'])
+            loaded.warmup()
+            return loaded
+            
+        except Exception as e:
+            self.metrics['load_failures'] += 1
+            self.logger.error(f"Model load error for {model_name} {version}: {str(e)}")
+            return None
+    
+    def get(self, model_name: str) -> Optional[LoadedModel]:
+        """Get the active version of a model"""
+        return self.active.get(model_name)
+    
+    def load_active(self, model_names: List[str]) -> Dict[str, str]:
+        """Load the active version of each model that has one"""
+        loaded = {}
+        for model_name in model_names:
+            version = self.get_active_version(model_name)
+            current = self.active.get(model_name)
+            if version and ((current is not None and current.version == version) or self.activate(model_name, version)):
+                loaded[model_name] = version
+        return loaded
+    
+    def get_metrics(self) -> Dict:
+        """Get registry and per-version metrics"""
+        active, retired = dict(self.active), dict(self.retired)
+        
+        return {
+            **self.metrics,
+            'models': {
+                model_name: {
+                    'active': loaded.get_metrics(),
+                    'previous': retired[model_name].get_metrics() if model_name in retired else None
+                }
+                for model_name, loaded in active.items()
+            },
+            'last_updated': datetime.now().isoformat()
+        }
+    
+    # Helper Methods
+    def _swap(self, model_name: str, loaded: LoadedModel):
+        """Replace active model reference"""
+        with self.lock:
+            previous = self.active.get(model_name)
+            if previous is not None and previous.version == loaded.version:
+                return
+            
+            self.active[model_name] = loaded
+            if previous is not None:
+                self.retired[model_name] = previous
+            
+            self.metrics['swaps'] += 1
+            self.metrics['last_swap'] = datetime.now().isoformat()
+        
+        self.logger.info(f"Activated {model_name} version {loaded.version}")
+    
+    def _watch_loop(self):
+        """Pick up active version changes made by other processes"""
+        while not self.stop_event.wait(self.config['watch_interval']):
+            for model_name in list(self.active.keys()):
+                try:
+                    version = self.get_active_version(model_name)
+                    current = self.active.get(model_name)
+                    if version and (current is None or current.version != version):
+                        loaded = self.load(model_name, version)
+                        if loaded is not None:
+                            self._swap(model_name, loaded)
+                            
+                except Exception as e:
+                    self.logger.error(f"Model registry watch error for {model_name}: {str(e)}")
+    
+    def _prune_versions(self, model_name: str):
+        """Remove old versions beyond the retention count (never the active one)"""
+        active_version = self.get_active_version(model_name)
+        versions = [manifest['version'] for manifest in self.list_versions(model_name)]
+        
+        for version in versions[self.config['keep_versions']:]:
+            if version == active_version:
+                continue
+            
+            version_dir = os.path.join(self._get_model_dir(model_name), version)
+            for file_name in os.listdir(version_dir):
+                os.remove(os.path.join(version_dir, file_name))
+            os.rmdir(version_dir)
+    
+    def _write_active_pointer(self, model_name: str, version: str):
+        """Atomically point the model at a version"""
+        pointer_path = os.path.join(self._get_model_dir(model_name), self.ACTIVE_FILE)
+        temp_path = f"{pointer_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(version)
+        os.replace(temp_path, pointer_path)
+    
+    def _write_json(self, path: str, data: Dict):
+        """Atomically write JSON file"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, indent=2, default=str)
+        os.replace(temp_path, path)
+    
+    def _get_model_dir(self, model_name: str) -> str:
+        """Get directory holding a model's versions"""
+        return os.path.join(self.config['registry_dir'], model_name)
+    
+    def _file_digest(self, path: str) -> str:
+        """SHA-256 of an artifact file"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+if __name__ == "__main__":
+    # Example usage and testing
+    import tempfile
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    rng = np.random.default_rng(42)
+    X = rng.random((1000, 7))
+    y = (X[:, 0] > 0.5).astype(int)
+    
+    registry = ModelRegistry({'registry_dir': tempfile.mkdtemp()})
+    
+    for n_estimators in (50, 100):
+        scaler = StandardScaler().fit(X)
+        model = RandomForestClassifier(n_estimators=n_estimators, random_state=42).fit(scaler.transform(X), y)
+        registry.register('risk_model', model, scaler, {'n_estimators': n_estimators})
+        
+        active = registry.get('risk_model')
+        for row in X[:100]:
+            active.predict_proba(row)
+        print(f"Active {active.version}: {active.get_metrics()}")
+    
+    registry.rollback('risk_model')
+    print(f"After rollback: {registry.get('risk_model').version}")
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Portfolio Risk Engine
+LoanFlow Personal Loan Management System
+
+This module simulates credit losses over the active loan book including:
+- Columnar load of active loans (balance, rate, risk grade) into NumPy arrays
+- Correlated defaults from a two-factor Gaussian copula (economy-wide and per risk grade)
+- Scenario blocks simulated in a process pool over shared-memory exposures
+- Expected loss, VaR/CVaR, loss percentile tables and per-grade expected loss
+- Benchmark over synthetic portfolios of 10k to 1M loans
+"""
+
+import logging
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+import numpy as np
+from scipy.special import ndtr, ndtri
+
+class PortfolioRiskEngine:
+    """Monte Carlo loss distribution of the active loan portfolio"""
+    
+    def __init__(self, db_manager=None, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.db_manager = db_manager
+        
+        self.config = {
+            'scenarios': 5000,
+            'block_size': 250,  # Scenarios per pool task
+            'processes': int(os.getenv('PORTFOLIO_RISK_PROCESSES', str(os.cpu_count() or 1))),
+            'min_parallel_loans': 50000,  # Smaller portfolios simulate in-process
+            'start_method': 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn',
+            'seed': None,  # Fixed seed makes runs reproducible
+            'page_size': 50000,
+            # One-year probability of default per risk grade (None is ungraded)
+            'grade_pd': {'A': 0.01, 'B': 0.025, 'C': 0.05, 'D': 0.09, 'E': 0.15, 'F': 0.25, None: 0.06},
+            'high_risk_grades': ['E', 'F'],
+            'lgd': 0.75,  # Loss given default for unsecured personal loans
+            'systematic_correlation': 0.12,  # Asset correlation through the economy-wide factor
+            'grade_correlation': 0.04,  # Extra correlation within a risk grade
+            'confidence_levels': [0.95, 0.99, 0.999],
+            'percentiles': [50, 75, 90, 95, 99, 99.5, 99.9]
+        }
+        if config:
+            self.config.update(config)
+        
+        self.metrics = {
+            'runs': 0,
+            'last_run': None,
+            'last_loans': 0,
+            'last_load_seconds': 0.0,
+            'last_simulation_seconds': 0.0
+        }
+    
+    # Portfolio Loading
+    def load_portfolio(self) -> Optional[Dict[str, np.ndarray]]:
+        """Active loans as column arrays (keyset-paginated so memory holds one page of rows at a time)"""
+        if not self.db_manager:
+            return None
+        
+        start_time = time.time()
+        try:
+            ids, exposures, rates, grades = [], [], [], []
+            last_id = ''
+            while True:
+                rows = self.db_manager.execute_query(
+                    "SELECT id, COALESCE(current_balance, principal_amount) AS exposure, interest_rate, risk_grade "
+                    "FROM loans WHERE status = 'active' AND id > %s ORDER BY id LIMIT %s",
+                    (last_id, self.config['page_size'])
+                ) or []
+                
+                for row in rows:
+                    ids.append(row['id'])
+                    exposures.append(float(row['exposure'] or 0.0))
+                    rates.append(float(row['interest_rate'] or 0.0))
+                    grades.append(row['risk_grade'] if row['risk_grade'] in self.config['grade_pd'] else None)
+                if len(rows) < self.config['page_size']:
+                    break
+                last_id = rows[-1]['id']
+            
+            self.metrics['last_load_seconds'] = round(time.time() - start_time, 3)
+            return self.build_portfolio(np.asarray(exposures, dtype=np.float64), grades,
+                                        np.asarray(rates, dtype=np.float64), ids)
+                                        
+        except Exception as e:
+            self.logger.error(f"Portfolio load error: {str(e)}")
+            return None
+    
+    def build_portfolio(self, exposures: np.ndarray, grades: List[Optional[str]], rates: Optional[np.ndarray] = None,
+                        ids: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """Columnar portfolio sorted by grade so each grade is one contiguous slice"""
+        grade_names = list(self.config['grade_pd'].keys())
+        grade_index = {grade: i for i, grade in enumerate(grade_names)}
+        codes = np.fromiter((grade_index[grade] for grade in grades), dtype=np.int16, count=len(grades))
+        
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        bounds = np.searchsorted(codes, np.arange(len(grade_names) + 1)).tolist()
+        
+        return {
+            'ids': [ids[i] for i in order] if ids is not None else None,
+            'exposure': exposures[order],
+            'rate': rates[order] if rates is not None else np.zeros(len(order)),
+            'grade': codes,
+            'grade_names': grade_names,
+            'grade_bounds': bounds,
+            'pd': np.asarray([self.config['grade_pd'][grade] for grade in grade_names], dtype=np.float64)[codes]
+        }
+    
+    # Simulation
+    def simulate(self, portfolio: Dict[str, Any]) -> Dict:
+        """Loss distribution over the configured number of scenarios"""
+        start_time = time.time()
+        scenarios = self.config['scenarios']
+        bounds = portfolio['grade_bounds']
+        loss_given_default = (portfolio['exposure'] * self.config['lgd']).astype(np.float32)
+        
+        # Systematic factors for every scenario come from the parent, so blocking does not change results
+        seed_sequence = np.random.SeedSequence(self.config['seed'])
+        factor_seed, block_seed = seed_sequence.spawn(2)
+        conditional_pd = self._get_conditional_pd(np.random.default_rng(factor_seed), scenarios)
+        
+        blocks = []
+        block_size = self.config['block_size']
+        for start, child_seed in zip(range(0, scenarios, block_size), block_seed.spawn((scenarios + block_size - 1) // block_size)):
+            blocks.append((conditional_pd[start:start + block_size], child_seed))
+        
+        processes = min(self.config['processes'], len(blocks))
+        if processes > 1 and len(loss_given_default) >= self.config['min_parallel_loans']:
+            losses = self._simulate_parallel(loss_given_default, bounds, blocks, processes)
+        else:
+            losses = np.concatenate([_simulate_block(loss_given_default, bounds, block_pd, seed) for block_pd, seed in blocks])
+        
+        elapsed = time.time() - start_time
+        self.metrics['runs'] += 1
+        self.metrics['last_run'] = datetime.now().isoformat()
+        self.metrics['last_loans'] = len(loss_given_default)
+        self.metrics['last_simulation_seconds'] = round(elapsed, 3)
+        
+        return self._summarize(portfolio, losses, elapsed, processes)
+    
+    def run(self) -> Optional[Dict]:
+        """Load the active book and simulate it (None without loans)"""
+        portfolio = self.load_portfolio()
+        if portfolio is None or len(portfolio['exposure']) == 0:
+            return None
+        return self.simulate(portfolio)
+    
+    def benchmark(self, sizes: Optional[List[int]] = None) -> List[Dict]:
+        """Simulation runtime over synthetic portfolios"""
+        rng = np.random.default_rng(7)
+        grade_names = [grade for grade in self.config['grade_pd'] if grade is not None]
+        
+        results = []
+        for size in sizes or [10000, 100000, 1000000]:
+            grades = rng.choice(grade_names, size=size, p=[0.2, 0.25, 0.25, 0.15, 0.1, 0.05]).tolist()
+            portfolio = self.build_portfolio(rng.lognormal(9.3, 0.6, size), grades)
+            
+            summary = self.simulate(portfolio)
+            results.append({
+                'loans': size,
+                'scenarios': self.config['scenarios'],
+                'seconds': summary['simulation']['seconds'],
+                'processes': summary['simulation']['processes'],
+                'expected_loss_rate': summary['expected_loss_rate']
+            })
+            self.logger.info(f"Simulated {size} loans x {self.config['scenarios']} scenarios in {summary['simulation']['seconds']}s")
+        
+        return results
+    
+    def get_metrics(self) -> Dict:
+        """Get engine metrics"""
+        return self.metrics.copy()
+    
+    # Helper Methods
+    def _get_conditional_pd(self, rng: np.random.Generator, scenarios: int) -> np.ndarray:
+        """Default probability per scenario and grade given the drawn factors (scenarios x grades)"""
+        pd = np.asarray(list(self.config['grade_pd'].values()), dtype=np.float64)
+        rho = self.config['systematic_correlation']
+        rho_grade = self.config['grade_correlation']
+        
+        economy = rng.standard_normal((scenarios, 1))
+        grade_factors = rng.standard_normal((scenarios, len(pd)))
+        
+        # Default when the latent asset value falls below the threshold matching the unconditional PD
+        shift = np.sqrt(rho) * economy + np.sqrt(rho_grade) * grade_factors
+        return ndtr((ndtri(pd) - shift) / np.sqrt(1.0 - rho - rho_grade)).astype(np.float32)
+    
+    def _simulate_parallel(self, loss_given_default: np.ndarray, bounds: List[int], blocks: List, processes: int) -> np.ndarray:
+        """Simulate blocks in worker processes that read exposures from shared memory"""
+        shm = shared_memory.SharedMemory(create=True, size=max(1, loss_given_default.nbytes))
+        try:
+            np.ndarray(loss_given_default.shape, dtype=np.float32, buffer=shm.buf)[:] = loss_given_default
+            
+            context = multiprocessing.get_context(self.config['start_method'])
+            with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_attach_portfolio,
+                                     initargs=(shm.name, len(loss_given_default))) as executor:
+                futures = [executor.submit(_simulate_shared_block, bounds, block_pd, seed) for block_pd, seed in blocks]
+                return np.concatenate([future.result() for future in futures])
+        finally:
+            shm.close()
+            shm.unlink()
+    
+    def _summarize(self, portfolio: Dict[str, Any], losses: np.ndarray, elapsed: float, processes: int) -> Dict:
+        """Loss statistics of a simulation"""
+        exposure = portfolio['exposure']
+        total_exposure = float(exposure.sum())
+        rate = (lambda value: round(value / total_exposure, 6) if total_exposure else 0.0)
+        
+        expected_loss = float(losses.mean())
+        sorted_losses = np.sort(losses)
+        
+        tail = {}
+        for level in self.config['confidence_levels']:
+            var = float(np.quantile(sorted_losses, level))
+            cvar = float(sorted_losses[sorted_losses >= var].mean())
+            tail[str(level)] = {'var': round(var, 2), 'cvar': round(cvar, 2), 'var_rate': rate(var), 'cvar_rate': rate(cvar)}
+        
+        percentiles = np.percentile(sorted_losses, self.config['percentiles'])
+        by_grade = []
+        for i, grade in enumerate(portfolio['grade_names']):
+            start, end = portfolio['grade_bounds'][i], portfolio['grade_bounds'][i + 1]
+            if start == end:
+                continue
+            grade_exposure = float(exposure[start:end].sum())
+            by_grade.append({
+                'grade': grade or 'ungraded',
+                'loans': end - start,
+                'exposure': round(grade_exposure, 2),
+                'pd': self.config['grade_pd'][grade],
+                'expected_loss': round(grade_exposure * self.config['grade_pd'][grade] * self.config['lgd'], 2)
+            })
+        
+        return {
+            'total_loans': len(exposure),
+            'total_exposure': round(total_exposure, 2),
+            'expected_default_rate': round(float(portfolio['pd'].mean()), 6) if len(exposure) else 0.0,
+            'expected_loss': round(expected_loss, 2),
+            'expected_loss_rate': rate(expected_loss),
+            'analytical_expected_loss': round(float((exposure * portfolio['pd']).sum() * self.config['lgd']), 2),
+            'loss_std': round(float(losses.std()), 2),
+            'tail': tail,
+            'unexpected_loss': round(float(np.quantile(sorted_losses, max(self.config['confidence_levels']))) - expected_loss, 2),
+            'percentiles': [{'percentile': p, 'loss': round(float(loss), 2), 'loss_rate': rate(float(loss))}
+                            for p, loss in zip(self.config['percentiles'], percentiles)],
+            'by_grade': by_grade,
+            'simulation': {
+                'scenarios': len(losses),
+                'processes': processes,
+                'seconds': round(elapsed, 3),
+                'lgd': self.config['lgd'],
+                'systematic_correlation': self.config['systematic_correlation'],
+                'grade_correlation': self.config['grade_correlation']
+            },
+            'calculated_at': datetime.now().isoformat()
+        }
+
+# Worker process state (exposures attached from shared memory once per process)
+_worker_shm = None
+_worker_loss_given_default = None
+
+def _attach_portfolio(shm_name: str, size: int):
+    """Pool initializer: map the shared exposure array without copying"""
+    global _worker_shm, _worker_loss_given_default
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_loss_given_default = np.ndarray((size,), dtype=np.float32, buffer=_worker_shm.buf)
+
+def _simulate_shared_block(bounds: List[int], conditional_pd: np.ndarray, seed: np.random.SeedSequence) -> np.ndarray:
+    """Pool task over the attached exposures"""
+    return _simulate_block(_worker_loss_given_default, bounds, conditional_pd, seed)
+
+def _simulate_block(loss_given_default: np.ndarray, bounds: List[int], conditional_pd: np.ndarray,
+                    seed: np.random.SeedSequence) -> np.ndarray:
+    """Portfolio loss per scenario: each loan defaults independently given its grade's conditional PD"""
+    rng = np.random.default_rng(seed)
+    losses = np.zeros(len(conditional_pd), dtype=np.float64)
+    
+    for scenario, grade_pd in enumerate(conditional_pd):
+        loss = 0.0
+        for grade, pd in enumerate(grade_pd):
+            start, end = bounds[grade], bounds[grade + 1]
+            if start == end:
+                continue
+            defaulted = rng.random(end - start, dtype=np.float32) < pd
+            loss += float(np.dot(defaulted, loss_given_default[start:end]))
+        losses[scenario] = loss
+    
+    return losses
+
+if __name__ == "__main__":
+    # Example usage and testing
+    import json
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    engine = PortfolioRiskEngine(config={'seed': 42})
+    for result in engine.benchmark():
+        print(result)
+    
+    rng = np.random.default_rng(1)
+    portfolio = engine.build_portfolio(rng.lognormal(9.3, 0.6, 20000), rng.choice(['A', 'B', 'C', 'D', 'E', 'F'], 20000).tolist())
+    summary = engine.simulate(portfolio)
+    print(json.dumps({key: summary[key] for key in ('expected_loss', 'analytical_expected_loss', 'tail', 'percentiles')}, indent=2))
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Pricing Optimizer
+LoanFlow Personal Loan Management System
+
+This module sets risk-based rates from the applicant pool including:
+- Rate x term grid evaluated for every applicant of a risk band at once
+- Approval curve from affordability (payment against income headroom) via sorted cumulative sums
+- Take-up curve (logistic around the band's market rate) and rate-sensitive default curve
+- Margin after funding cost, expected credit loss and origination cost
+- Margin-maximizing rate per band under APR, default and volume constraints
+"""
+
+import logging
+import time
+from typing import Dict, Optional
+from datetime import datetime
+import numpy as np
+
+class PricingOptimizer:
+    """Grid search of rates and terms per risk band over the applicant pool"""
+    
+    # Risk band -> lowest credit score in the band (bands are checked in order)
+    BAND_CREDIT_SCORES = {'A': 760, 'B': 720, 'C': 680, 'D': 640, 'E': 600, 'F': 0}
+    
+    def __init__(self, db_manager=None, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.db_manager = db_manager
+        
+        self.config = {
+            'lookback_days': 90,  # Applicant pool window
+            'rate_grid': (0.05, 0.3599, 0.0025),  # Lowest rate, highest rate (APR cap), step
+            'terms': [12, 24, 36, 48, 60],  # Months
+            'unscored_band': 'D',  # Applicants without a credit score
+            'max_dti': 0.40,  # New payment plus existing debts over monthly income
+            # Per band: market rate, annual probability of default at the market rate
+            'bands': {
+                'A': {'market_rate': 0.08, 'annual_pd': 0.01},
+                'B': {'market_rate': 0.11, 'annual_pd': 0.025},
+                'C': {'market_rate': 0.15, 'annual_pd': 0.05},
+                'D': {'market_rate': 0.19, 'annual_pd': 0.09},
+                'E': {'market_rate': 0.24, 'annual_pd': 0.15},
+                'F': {'market_rate': 0.29, 'annual_pd': 0.25}
+            },
+            'max_take_up': 0.9,  # Take-up of an approved offer far below market
+            'rate_elasticity': 30.0,  # Logistic slope of take-up per unit of rate above market
+            'adverse_selection': 4.0,  # PD grows by exp(adverse_selection * rate above market)
+            'term_risk': 0.1,  # Annual PD grows by this share per year of term beyond one
+            'funding_rate': 0.055,
+            'lgd': 0.75,
+            'exposure_at_default': 0.6,  # Share of principal outstanding at an average default
+            'origination_cost': 150.0,  # Per funded loan
+            'max_lifetime_default_rate': 0.35,
+            'min_funded_share': 0.15  # Funded applicants over band applicants at the chosen offer
+        }
+        if config:
+            self.config.update(config)
+        
+        self.current_pricing = {}  # Band -> chosen offer of the last run
+        
+        self.metrics = {
+            'runs': 0,
+            'last_run': None,
+            'last_applicants': 0,
+            'last_grid_cells': 0,
+            'last_optimization_seconds': 0.0
+        }
+    
+    # Applicant Pool
+    def load_applicant_pool(self) -> Optional[Dict[str, np.ndarray]]:
+        """Recent applications as column arrays"""
+        if not self.db_manager:
+            return None
+        
+        try:
+            rows = self.db_manager.execute_query(
+                "SELECT loan_amount, credit_score, monthly_income, additional_income, existing_debts "
+                "FROM loan_applications WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)",
+                (self.config['lookback_days'],)
+            ) or []
+            
+            return {
+                'loan_amount': np.asarray([float(row['loan_amount'] or 0.0) for row in rows], dtype=np.float64),
+                'credit_score': np.asarray([float(row['credit_score'] or 0.0) for row in rows], dtype=np.float64),
+                'monthly_income': np.asarray([float(row['monthly_income'] or 0.0) + float(row['additional_income'] or 0.0)
+                                              for row in rows], dtype=np.float64),
+                'existing_debts': np.asarray([float(row['existing_debts'] or 0.0) for row in rows], dtype=np.float64)
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Applicant pool load error: {str(e)}")
+            return None
+    
+    # Optimization
+    def optimize(self, pool: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Dict]:
+        """Best offer per risk band, plus the best rate for every term"""
+        start_time = time.time()
+        try:
+            pool = pool if pool is not None else self.load_applicant_pool()
+            if pool is None or len(pool['loan_amount']) == 0:
+                return {}
+            
+            rates = np.arange(*self.config['rate_grid'])
+            terms = np.asarray(self.config['terms'], dtype=np.float64)
+            payment_factor = self._get_payment_factor(rates, terms)
+            funding_factor = self._get_payment_factor(np.asarray([self.config['funding_rate']]), terms)[0]
+            
+            # Interest over funding cost per dollar lent, before credit losses (rates x terms)
+            net_interest = (payment_factor - funding_factor) * terms
+            
+            bands = self._assign_bands(pool['credit_score'])
+            valid = pool['loan_amount'] > 0
+            # Largest payment per dollar of principal each applicant can afford
+            headroom = np.where(valid, (self.config['max_dti'] * pool['monthly_income'] - pool['existing_debts']) /
+                                np.where(valid, pool['loan_amount'], 1.0), -np.inf)
+            
+            results = {}
+            for band, settings in self.config['bands'].items():
+                members = bands == band
+                count = int(members.sum())
+                if count == 0:
+                    continue
+                results[band] = self._optimize_band(band, settings, headroom[members], pool['loan_amount'][members],
+                                                    rates, terms, payment_factor, net_interest)
+            
+            elapsed = time.time() - start_time
+            self.current_pricing = {band: result['best'] for band, result in results.items() if result['best']}
+            self.metrics['runs'] += 1
+            self.metrics['last_run'] = datetime.now().isoformat()
+            self.metrics['last_applicants'] = len(pool['loan_amount'])
+            self.metrics['last_grid_cells'] = len(rates) * len(terms) * len(results)
+            self.metrics['last_optimization_seconds'] = round(elapsed, 4)
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Pricing optimization error: {str(e)}")
+            return {}
+    
+    def get_rate(self, credit_score: Optional[float], term_months: int) -> Optional[float]:
+        """Optimized rate for an applicant's band and term (None when the band has no feasible offer for the term)"""
+        band = self._assign_bands(np.asarray([float(credit_score or 0.0)]))[0]
+        offer = self.current_pricing.get(band)
+        if not offer:
+            return None
+        # The band's best rate is only feasible at its own term
+        return offer['rates_by_term'].get(int(term_months))
+    
+    def get_market_rate(self, credit_score: Optional[float]) -> float:
+        """Market rate of an applicant's band"""
+        band = self._assign_bands(np.asarray([float(credit_score or 0.0)]))[0]
+        return self.config['bands'][band]['market_rate']
+    
+    def get_metrics(self) -> Dict:
+        """Get optimizer metrics"""
+        return self.metrics.copy()
+    
+    # Helper Methods
+    def _optimize_band(self, band: str, settings: Dict, headroom: np.ndarray, amounts: np.ndarray, rates: np.ndarray,
+                       terms: np.ndarray, payment_factor: np.ndarray, net_interest: np.ndarray) -> Dict:
+        """Evaluate the grid for one band's applicants"""
+        applicants = len(headroom)
+        
+        # Approval: applicants whose headroom covers the payment factor; sorted cumulative sums
+        # give counts and amounts for every grid cell without an applicants x grid array
+        order = np.argsort(headroom)
+        sorted_headroom = headroom[order]
+        amount_above = np.concatenate([np.cumsum(amounts[order][::-1])[::-1], [0.0]])
+        first_approved = np.searchsorted(sorted_headroom, payment_factor, side='left')
+        approved_count = applicants - first_approved
+        approved_amount = amount_above[first_approved]
+        
+        above_market = rates - settings['market_rate']
+        take_up = self.config['max_take_up'] / (1.0 + np.exp(self.config['rate_elasticity'] * above_market))
+        
+        annual_pd = settings['annual_pd'] * np.exp(self.config['adverse_selection'] * above_market)[:, None] * \
+            (1.0 + self.config['term_risk'] * (terms / 12.0 - 1.0))[None, :]
+        lifetime_pd = 1.0 - (1.0 - np.minimum(annual_pd, 0.99)) ** (terms / 12.0)
+        
+        # Defaulted loans earn about half their interest and lose LGD on the balance outstanding
+        margin_per_dollar = net_interest * (1.0 - 0.5 * lifetime_pd) - \
+            lifetime_pd * self.config['lgd'] * self.config['exposure_at_default']
+        funded_count = take_up[:, None] * approved_count
+        margin = take_up[:, None] * approved_amount * margin_per_dollar - funded_count * self.config['origination_cost']
+        
+        feasible = (lifetime_pd <= self.config['max_lifetime_default_rate']) & \
+                   (funded_count >= self.config['min_funded_share'] * applicants) & (margin > 0)
+        constrained = np.where(feasible, margin, -np.inf)
+        
+        best = None
+        if np.isfinite(constrained).any():
+            r, t = np.unravel_index(np.argmax(constrained), constrained.shape)
+            best_rate_by_term = np.argmax(constrained, axis=0)
+            best = {
+                'rate': round(float(rates[r]), 4),
+                'term_months': int(terms[t]),
+                'expected_margin': round(float(margin[r, t]), 2),
+                'approval_rate': round(float(approved_count[r, t] / applicants), 4),
+                'take_up': round(float(take_up[r]), 4),
+                'lifetime_default_rate': round(float(lifetime_pd[r, t]), 4),
+                'funded_loans': round(float(funded_count[r, t]), 1),
+                'funded_amount': round(float(take_up[r] * approved_amount[r, t]), 2),
+                'rates_by_term': {int(terms[j]): round(float(rates[best_rate_by_term[j]]), 4)
+                                  for j in range(len(terms)) if np.isfinite(constrained[best_rate_by_term[j], j])}
+            }
+        
+        # Best feasible margin at the market rate is the baseline the chosen offer is compared against
+        market_margin = float(constrained[int(np.argmin(np.abs(above_market)))].max())
+        return {
+            'band': band,
+            'applicants': applicants,
+            'market_rate': settings['market_rate'],
+            'market_margin': round(market_margin, 2) if np.isfinite(market_margin) else None,
+            'feasible_cells': int(feasible.sum()),
+            'best': best
+        }
+    
+    def _get_payment_factor(self, rates: np.ndarray, terms: np.ndarray) -> np.ndarray:
+        """Monthly payment per dollar of principal (rates x terms)"""
+        monthly = (rates / 12.0)[:, None]
+        return np.where(monthly > 0, monthly / (1.0 - (1.0 + monthly) ** -terms[None, :]), 1.0 / terms[None, :])
+    
+    def _assign_bands(self, credit_scores: np.ndarray) -> np.ndarray:
+        """Risk band per credit score (missing scores use the unscored band)"""
+        bands = np.full(len(credit_scores), self.config['unscored_band'], dtype=object)
+        assigned = credit_scores <= 0
+        for band, floor in self.BAND_CREDIT_SCORES.items():
+            selected = ~assigned & (credit_scores >= floor)
+            bands[selected] = band
+            assigned |= selected
+        return bands
+
+if __name__ == "__main__":
+    # Example usage and testing
+    logging.basicConfig(level=logging.INFO)
+    
+    rng = np.random.default_rng(11)
+    size = 500000
+    pool = {
+        'loan_amount': rng.lognormal(9.4, 0.6, size),
+        'credit_score': rng.normal(690, 60, size).clip(300, 850),
+        'monthly_income': rng.lognormal(8.4, 0.5, size),
+        'existing_debts': rng.lognormal(6.3, 0.8, size)
+    }
+    
+    optimizer = PricingOptimizer()
+    start = time.time()
+    results = optimizer.optimize(pool)
+    print(f"Optimized {size} applicants in {time.time() - start:.3f}s")
+    
+    for band, result in results.items():
+        best = result['best']
+        if best:
+            print(f"{band}: {best['rate']:.2%} for {best['term_months']}m, margin {best['expected_margin']:,.0f} "
+                  f"(market {result['market_margin'] or 0:,.0f}), take-up {best['take_up']:.0%}, default {best['lifetime_default_rate']:.1%}")
+        else:
+            print(f"{band}: no feasible offer")
+    
+    print(optimizer.get_rate(700, 36))
+    print(optimizer.get_metrics())
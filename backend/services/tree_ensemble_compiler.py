@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Tree Ensemble Compiler
+LoanFlow Personal Loan Management System
+
+This module compiles fitted scikit-learn tree ensembles for fast scoring including:
+- Flattening RandomForest and GradientBoosting classifiers into contiguous arrays
+- Vectorized traversal of all trees at once
+- Folding a fitted StandardScaler into the evaluator
+- Verification against the sklearn model outputs
+- Single-row and batch latency benchmarks
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+
+class CompiledTreeEnsemble:
+    """Array-backed evaluator for a fitted tree ensemble"""
+    
+    def __init__(self, kind: str, arrays: Dict[str, np.ndarray], classes: np.ndarray, n_features: int,
+                 max_depth: int, init_raw: Optional[np.ndarray] = None, learning_rate: float = 1.0,
+                 loss: str = 'log_loss', scaler_mean: Optional[np.ndarray] = None,
+                 scaler_scale: Optional[np.ndarray] = None):
+        self.kind = kind
+        self.classes_ = classes
+        self.n_features = n_features
+        self.max_depth = max_depth
+        self.init_raw = init_raw
+        self.learning_rate = learning_rate
+        self.loss = loss
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        
+        # Contiguous node arrays shared by all trees, leaves loop back to themselves
+        self.feature = np.ascontiguousarray(arrays['feature'], dtype=np.intp)
+        self.threshold = np.ascontiguousarray(arrays['threshold'], dtype=np.float64)
+        self.children = np.ascontiguousarray(arrays['children'], dtype=np.intp)  # [left, right] per node
+        self.values = np.ascontiguousarray(arrays['values'], dtype=np.float64)  # per node leaf output
+        self.roots = np.ascontiguousarray(arrays['roots'], dtype=np.intp)
+        self.tree_columns = arrays.get('tree_columns')  # gradient boosting: output column per tree
+        
+        self.n_trees = len(self.roots)
+        self.n_nodes = len(self.feature)
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities for each row"""
+        leaf_values = self._leaf_values(X)
+        
+        if self.kind == 'random_forest':
+            # Per-tree class distributions averaged over trees
+            return leaf_values.mean(axis=1)
+        
+        raw = self._raw_predictions(leaf_values)
+        return self._raw_to_proba(raw)
+    
+    def predict(self, X) -> np.ndarray:
+        """Predicted class labels for each row"""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+    
+    def get_info(self) -> Dict:
+        """Get compiled ensemble layout summary"""
+        return {
+            'kind': self.kind,
+            'trees': self.n_trees,
+            'nodes': self.n_nodes,
+            'max_depth': self.max_depth,
+            'features': self.n_features,
+            'classes': len(self.classes_),
+            'scaler_folded': self.scaler_mean is not None,
+            'bytes': int(self.feature.nbytes + self.threshold.nbytes + self.children.nbytes +
+                         self.values.nbytes + self.roots.nbytes)
+        }
+    
+    # Helper Methods
+    def _leaf_values(self, X) -> np.ndarray:
+        """Traverse every tree for every row (rows x trees x outputs)"""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        
+        if self.scaler_mean is not None:
+            X = (X - self.scaler_mean) / self.scaler_scale
+        X = X.astype(np.float32).astype(np.float64)
+        
+        n_rows = X.shape[0]
+        if n_rows == 1:
+            # Interactive single-row path avoids the 2-D gather bookkeeping
+            row = X[0]
+            nodes = self.roots
+            for _ in range(self.max_depth):
+                nodes = self.children[2 * nodes + (row[self.feature[nodes]] > self.threshold[nodes])]
+            return self.values[nodes][np.newaxis]
+        
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * X.shape[1])[:, None]
+        
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+        
+        return self.values[nodes]
+    
+    def _raw_predictions(self, leaf_values: np.ndarray) -> np.ndarray:
+        """Sum gradient boosting stages into raw scores per output column"""
+        n_columns = len(self.init_raw)
+        raw = np.empty((leaf_values.shape[0], n_columns), dtype=np.float64)
+        
+        for column in range(n_columns):
+            tree_mask = self.tree_columns == column
+            raw[:, column] = leaf_values[:, tree_mask, 0].sum(axis=1)
+        
+        return self.init_raw + self.learning_rate * raw
+    
+    def _raw_to_proba(self, raw: np.ndarray) -> np.ndarray:
+        """Convert raw boosting scores to class probabilities"""
+        if raw.shape[1] == 1:
+            scale = 2.0 if self.loss == 'exponential' else 1.0
+            positive = 1.0 / (1.0 + np.exp(-scale * raw[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        
+        shifted = np.exp(raw - raw.max(axis=1, keepdims=True))
+        return shifted / shifted.sum(axis=1, keepdims=True)
+
+class TreeEnsembleCompiler:
+    """Compile, verify and benchmark tree ensembles"""
+    
+    def __init__(self, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        
+        self.config = {
+            'verify_rows': 512,  # Random rows checked against sklearn before use
+            'tolerance': 1e-6,
+            'benchmark_rounds': 200
+        }
+        if config:
+            self.config.update(config)
+        
+        self.metrics = {
+            'compiled': 0,
+            'verification_failures': 0,
+            'unsupported': 0
+        }
+    
+    def compile(self, model: Any, scaler: Any = None) -> CompiledTreeEnsemble:
+        """Flatten a fitted ensemble (and optional fitted StandardScaler) into arrays"""
+        if isinstance(model, RandomForestClassifier):
+            compiled = self._compile_random_forest(model)
+        elif isinstance(model, GradientBoostingClassifier):
+            compiled = self._compile_gradient_boosting(model)
+        else:
+            raise ValueError(f"Unsupported model type: {type(model).__name__}")
+        
+        if scaler is not None and hasattr(scaler, 'mean_'):
+            compiled.scaler_mean = np.asarray(scaler.mean_, dtype=np.float64) if scaler.with_mean else None
+            compiled.scaler_scale = np.asarray(scaler.scale_, dtype=np.float64) if scaler.with_std else np.ones(compiled.n_features)
+            if compiled.scaler_mean is None:
+                compiled.scaler_mean = np.zeros(compiled.n_features)
+        
+        self.metrics['compiled'] += 1
+        return compiled
+    
+    def compile_models(self, models: Dict[str, Any], scalers: Optional[Dict[str, Any]] = None) -> Dict[str, CompiledTreeEnsemble]:
+        """Compile and verify models, skipping unfitted or mismatching ones"""
+        compiled_models = {}
+        scalers = scalers or {}
+        
+        for model_name, model in models.items():
+            try:
+                if not hasattr(model, 'estimators_'):
+                    continue  # Not fitted yet
+                
+                scaler = scalers.get(model_name.replace('_model', '_scaler'))
+                if scaler is not None and not hasattr(scaler, 'mean_'):
+                    continue  # Unfitted scaler, sklearn path cannot score either
+                
+                compiled = self.compile(model, scaler)
+                
+                if self.verify(model, compiled, scaler=scaler)['passed']:
+                    compiled_models[model_name] = compiled
+                    self.logger.info(f"Compiled {model_name}: {compiled.get_info()}")
+                else:
+                    self.logger.warning(f"Compiled {model_name} does not match sklearn, using sklearn model")
+                    
+            except ValueError as e:
+                self.metrics['unsupported'] += 1
+                self.logger.warning(f"Cannot compile {model_name}: {str(e)}")
+            except Exception as e:
+                self.logger.error(f"Model compilation error for {model_name}: {str(e)}")
+        
+        return compiled_models
+    
+    def verify(self, model: Any, compiled: CompiledTreeEnsemble, X: Optional[np.ndarray] = None, scaler: Any = None) -> Dict:
+        """Check compiled outputs equal sklearn outputs within tolerance"""
+        if X is None:
+            X = self._sample_inputs(model, compiled, scaler)
+        
+        X_model = scaler.transform(X) if scaler is not None else X
+        expected = model.predict_proba(X_model)
+        actual = compiled.predict_proba(X)
+        
+        max_error = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+        labels_match = bool(np.array_equal(model.predict(X_model), compiled.predict(X)))
+        passed = max_error <= self.config['tolerance'] and labels_match
+        
+        if not passed:
+            self.metrics['verification_failures'] += 1
+        
+        return {
+            'passed': passed,
+            'rows': len(X),
+            'max_abs_error': max_error,
+            'labels_match': labels_match
+        }
+    
+    def benchmark(self, model: Any, compiled: CompiledTreeEnsemble, X: np.ndarray, scaler: Any = None, rounds: Optional[int] = None) -> Dict:
+        """Compare single-row and batch latency of sklearn and compiled evaluators"""
+        rounds = rounds or self.config['benchmark_rounds']
+        row = X[:1]
+        
+        def sklearn_single():
+            return model.predict_proba(scaler.transform(row) if scaler is not None else row)
+        
+        def sklearn_batch():
+            return model.predict_proba(scaler.transform(X) if scaler is not None else X)
+        
+        results = {
+            'sklearn_single_us': self._time_call(sklearn_single, rounds),
+            'compiled_single_us': self._time_call(lambda: compiled.predict_proba(row), rounds),
+            'sklearn_batch_us': self._time_call(sklearn_batch, max(1, rounds // 20)),
+            'compiled_batch_us': self._time_call(lambda: compiled.predict_proba(X), max(1, rounds // 20)),
+            'batch_rows': len(X),
+            'benchmarked_at': datetime.now().isoformat()
+        }
+        results['single_speedup'] = round(results['sklearn_single_us'] / results['compiled_single_us'], 1)
+        results['batch_speedup'] = round(results['sklearn_batch_us'] / results['compiled_batch_us'], 1)
+        return results
+    
+    def get_metrics(self) -> Dict:
+        """Get compiler metrics"""
+        return self.metrics.copy()
+    
+    # Helper Methods
+    def _compile_random_forest(self, model: RandomForestClassifier) -> CompiledTreeEnsemble:
+        """Flatten random forest trees, leaf values are class distributions"""
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Multi-output forests are not supported")
+        
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        arrays = self._flatten_trees(trees, normalize=True)
+        
+        return CompiledTreeEnsemble(
+            kind='random_forest',
+            arrays=arrays,
+            classes=model.classes_,
+            n_features=model.n_features_in_,
+            max_depth=max(tree.max_depth for tree in trees)
+        )
+    
+    def _compile_gradient_boosting(self, model: GradientBoostingClassifier) -> CompiledTreeEnsemble:
+        """Flatten boosting stages, leaf values are raw score increments"""
+        if model.loss not in ('log_loss', 'deviance', 'exponential'):
+            raise ValueError(f"Unsupported boosting loss: {model.loss}")
+        
+        stages, n_columns = model.estimators_.shape
+        trees = [model.estimators_[stage, column].tree_ for stage in range(stages) for column in range(n_columns)]
+        arrays = self._flatten_trees(trees, normalize=False)
+        arrays['tree_columns'] = np.tile(np.arange(n_columns), stages)
+        
+        compiled = CompiledTreeEnsemble(
+            kind='gradient_boosting',
+            arrays=arrays,
+            classes=model.classes_,
+            n_features=model.n_features_in_,
+            max_depth=max(tree.max_depth for tree in trees),
+            init_raw=np.zeros(n_columns),
+            learning_rate=model.learning_rate,
+            loss='exponential' if model.loss == 'exponential' else 'log_loss'
+        )
+        
+        # Constant prior from the init estimator, recovered through the public API
+        probe = np.zeros((1, model.n_features_in_))
+        decision = np.asarray(model.decision_function(probe), dtype=np.float64).reshape(1, -1)
+        compiled.init_raw = decision[0] - compiled._raw_predictions(compiled._leaf_values(probe))[0]
+        
+        return compiled
+    
+    def _flatten_trees(self, trees: List[Any], normalize: bool) -> Dict[str, np.ndarray]:
+        """Concatenate sklearn tree structures into shared node arrays"""
+        node_counts = [tree.node_count for tree in trees]
+        offsets = np.concatenate([[0], np.cumsum(node_counts)[:-1]]).astype(np.intp)
+        
+        features, thresholds, children, values = [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            node_ids = np.arange(tree.node_count, dtype=np.intp) + offset
+            is_leaf = tree.children_left == -1
+            
+            # Leaves point at themselves so traversal can run a fixed number of steps
+            left = np.where(is_leaf, node_ids, tree.children_left + offset)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset)
+            
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            children.append(np.column_stack([left, right]).ravel())
+            
+            value = tree.value[:, 0, :].astype(np.float64)
+            if normalize:
+                totals = value.sum(axis=1, keepdims=True)
+                value = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+            values.append(value)
+        
+        return {
+            'feature': np.concatenate(features),
+            'threshold': np.concatenate(thresholds),
+            'children': np.concatenate(children),
+            'values': np.concatenate(values),
+            'roots': offsets
+        }
+    
+    def _sample_inputs(self, model: Any, compiled: CompiledTreeEnsemble, scaler: Any = None) -> np.ndarray:
+        """Random inputs around the split thresholds, in unscaled feature space"""
+        rng = np.random.default_rng(0)
+        internal = compiled.threshold != np.inf
+        
+        X = rng.normal(0.0, 1.0, (self.config['verify_rows'], compiled.n_features))
+        if internal.any():
+            # Put some rows exactly on split thresholds to exercise the comparison edge
+            thresholds = compiled.threshold[internal]
+            split_features = compiled.feature[internal]
+            picks = rng.integers(0, len(thresholds), X.shape)
+            on_split = rng.random(X.shape) < 0.3
+            same_feature = split_features[picks] == np.arange(compiled.n_features)
+            X = np.where(on_split & same_feature, thresholds[picks], X)
+        
+        if scaler is not None:
+            X = scaler.inverse_transform(X)
+        
+        return X
+    
+    def _time_call(self, func, rounds: int) -> float:
+        """Median call latency in microseconds"""
+        func()  # Warm up
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return round(float(np.median(timings)) * 1e6, 1)
+
+if __name__ == "__main__":
+    # Example usage and testing
+    from sklearn.preprocessing import StandardScaler
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    rng = np.random.default_rng(42)
+    X = rng.random((2000, 7))
+    y = (X[:, 0] + X[:, 2] - X[:, 5] + rng.normal(0, 0.2, len(X)) > 0.5).astype(int)
+    
+    scaler = StandardScaler().fit(X)
+    compiler = TreeEnsembleCompiler()
+    
+    for model in [RandomForestClassifier(n_estimators=100, random_state=42),
+                  GradientBoostingClassifier(n_estimators=100, random_state=42)]:
+        model.fit(scaler.transform(X), y)
+        compiled = compiler.compile(model, scaler)
+        
+        print(f"{type(model).__name__}: {compiled.get_info()}")
+        print(f"  verification: {compiler.verify(model, compiled, X, scaler=scaler)}")
+        print(f"  benchmark: {compiler.benchmark(model, compiled, X[:500], scaler=scaler)}")
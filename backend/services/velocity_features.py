@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Velocity Feature Service
+LoanFlow Personal Loan Management System
+
+This module tracks application velocity for fraud detection including:
+- Sliding window counts per IP, device, email, email domain and phone
+- Count-min sketches in Redis so memory does not grow with distinct identifiers
+- Rolling sketch per window, so a read is one HMGET per identifier and window
+- HyperLogLog distinct identity counts per window
+- Constant-cost feature reads at scoring time (one pipeline per batch)
+- Bounded list of identifiers that crossed a velocity threshold
+"""
+
+import logging
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
+from datetime import datetime
+
+# Subtract buckets that left the window from its rolling sketch, once (KEYS[2..] are the
+# buckets first_bucket .. oldest_live - 1, ARGV = first_bucket, oldest_live)
+ROLL_SKETCH_SCRIPT = """
+    local first = tonumber(ARGV[1])
+    local oldest = tonumber(ARGV[2])
+    local rolled = tonumber(redis.call('hget', KEYS[1], '_rolled') or ARGV[2])
+    if rolled >= oldest then
+        return 0
+    end
+    for index = math.max(rolled, first), oldest - 1 do
+        local counters = redis.call('hgetall', KEYS[index - first + 2])
+        for i = 1, #counters, 2 do
+            redis.call('hincrby', KEYS[1], counters[i], -tonumber(counters[i + 1]))
+        end
+    end
+    redis.call('hset', KEYS[1], '_rolled', oldest)
+    return 1
+"""
+
+class VelocityFeatureService:
+    """Sliding window velocity counters over application identifiers"""
+    
+    # Identifier dimensions counted per application
+    DIMENSIONS = ['ip', 'device', 'email', 'email_domain', 'phone']
+    
+    DIMENSION_LABELS = {
+        'ip': 'IP address',
+        'device': 'device',
+        'email': 'email address',
+        'email_domain': 'email domain',
+        'phone': 'phone number'
+    }
+    
+    def __init__(self, redis_manager=None, config: Optional[Dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.redis_manager = redis_manager
+        
+        self.config = {
+            # Window name -> (span seconds, bucket seconds); a window sums its live buckets
+            'windows': {
+                '10m': (600, 60),
+                '1h': (3600, 300),
+                '24h': (86400, 3600)
+            },
+            'sketch_width': 1024,  # Counters per row (overcount at most about e * bucket total / width)
+            'sketch_depth': 4,  # Rows (failure probability about e^-depth)
+            # Counts at which an identifier is flagged, per dimension and window
+            'thresholds': {
+                'ip': {'1h': 5},
+                'device': {'1h': 3},
+                'email': {'24h': 3},
+                'phone': {'24h': 3}
+            },
+            'flagged_max': 200,  # Most recent flagged identifiers kept for review
+            'flagged_ttl': 86400
+        }
+        if config:
+            self.config.update(config)
+        
+        self.roll_script = None
+        
+        self.metrics = {
+            'recorded': 0,
+            'lookups': 0,
+            'flagged': 0,
+            'errors': 0
+        }
+    
+    # Intake
+    def record(self, application: Dict) -> Dict[str, float]:
+        """Count an application in every window, returns its velocity features afterwards"""
+        if not self.redis_manager:
+            return {}
+        
+        try:
+            identifiers = self._get_identifiers(application)
+            now = time.time()
+            client = self.redis_manager.redis_client
+            pipe = client.pipeline(transaction=False)
+            
+            for window, (span, bucket_seconds) in self.config['windows'].items():
+                bucket = int(now // bucket_seconds)
+                ttl = span + bucket_seconds
+                oldest = bucket - span // bucket_seconds + 1
+                
+                total_key = self._build_key(f"total:{window}:{bucket}")
+                pipe.incr(total_key)
+                pipe.expire(total_key, ttl)
+                
+                for dimension, value in identifiers.items():
+                    fields = self._get_sketch_fields(value)
+                    
+                    # Buckets outlive the window until the rolling sketch has subtracted them
+                    sketch_key = self._build_key(f"cms:{dimension}:{window}:{bucket}")
+                    for field in fields:
+                        pipe.hincrby(sketch_key, field, 1)
+                    pipe.expire(sketch_key, 2 * span + bucket_seconds)
+                    
+                    rolling_key = self._build_key(f"cms:{dimension}:{window}")
+                    pipe.hsetnx(rolling_key, '_rolled', oldest)
+                    for field in fields:
+                        pipe.hincrby(rolling_key, field, 1)
+                    pipe.expire(rolling_key, ttl)
+                    
+                    hll_key = self._build_key(f"hll:{dimension}:{window}:{bucket}")
+                    pipe.pfadd(hll_key, value)
+                    pipe.expire(hll_key, ttl)
+            
+            pipe.execute()
+            self.metrics['recorded'] += 1
+            
+            features = self.get_features_batch([application], now)[0]
+            self._flag_if_over_threshold(identifiers, features)
+            return features
+            
+        except Exception as e:
+            self.logger.error(f"Velocity record error: {str(e)}")
+            self.metrics['errors'] += 1
+            return {}
+    
+    # Scoring
+    def get_features(self, application: Dict) -> Dict[str, float]:
+        """Velocity features for one application"""
+        return self.get_features_batch([application])[0]
+    
+    def get_features_batch(self, applications: List[Dict], now: Optional[float] = None) -> List[Dict[str, float]]:
+        """Velocity features for many applications in one Redis round trip"""
+        if not self.redis_manager or not applications:
+            return [{} for _ in applications]
+        
+        try:
+            now = now or time.time()
+            client = self.redis_manager.redis_client
+            pipe = client.pipeline(transaction=False)
+            window_buckets = self._get_window_buckets(now)
+            
+            # Window totals and distinct counts are shared by every application
+            for window, buckets in window_buckets.items():
+                for bucket in buckets:
+                    pipe.get(self._build_key(f"total:{window}:{bucket}"))
+                for dimension in self.DIMENSIONS:
+                    keys = [self._build_key(f"hll:{dimension}:{window}:{bucket}") for bucket in buckets]
+                    pipe.pfcount(*keys)
+            
+            identifiers = [self._get_identifiers(application) for application in applications]
+            
+            # Bring the rolling sketches of the batch's dimensions up to date before reading them
+            rolls = 0
+            for dimension in sorted({dimension for values in identifiers for dimension in values}):
+                for window, buckets in window_buckets.items():
+                    self._roll_sketch(pipe, dimension, window, buckets[0], len(buckets))
+                    rolls += 1
+            
+            reads = []  # (application index, dimension, window)
+            for i, values in enumerate(identifiers):
+                for dimension, value in values.items():
+                    fields = self._get_sketch_fields(value)
+                    for window in window_buckets:
+                        pipe.hmget(self._build_key(f"cms:{dimension}:{window}"), fields)
+                        reads.append((i, dimension, window))
+            
+            results = pipe.execute()
+            self.metrics['lookups'] += len(applications)
+            
+            shared = {}
+            position = 0
+            for window, buckets in window_buckets.items():
+                shared[f"applications_{window}"] = float(sum(int(value or 0) for value in results[position:position + len(buckets)]))
+                position += len(buckets)
+                for dimension in self.DIMENSIONS:
+                    shared[f"distinct_{dimension}_{window}"] = float(results[position] or 0)
+                    position += 1
+            
+            position += rolls
+            
+            features = [dict(shared) for _ in applications]
+            for i, dimension, window in reads:
+                # The estimate is the smallest of the identifier's counters
+                count = min(int(counter or 0) for counter in results[position])
+                position += 1
+                features[i][f"{dimension}_count_{window}"] = float(max(count, 0))
+            
+            return features
+            
+        except Exception as e:
+            self.logger.error(f"Velocity feature read error: {str(e)}")
+            self.metrics['errors'] += 1
+            return [{} for _ in applications]
+    
+    def calculate_velocity_risk(self, features: Dict[str, float]) -> float:
+        """Risk in [0, 1] from how far counts exceed their thresholds (the application itself excluded)"""
+        risk = 0.0
+        for dimension, windows in self.config['thresholds'].items():
+            for window, threshold in windows.items():
+                others = features.get(f"{dimension}_count_{window}", 0.0) - 1
+                if others <= 0 or threshold <= 1:
+                    continue
+                # Half risk at the threshold, full risk at twice the threshold
+                risk = max(risk, min(1.0, others / (2.0 * (threshold - 1))))
+        return risk
+    
+    def get_flagged(self, limit: int = 50) -> List[Dict]:
+        """Identifiers that crossed a threshold, highest count first"""
+        if not self.redis_manager:
+            return []
+        
+        try:
+            client = self.redis_manager.redis_client
+            entries = client.zrange(self._build_key('flagged'), 0, limit - 1, desc=True, withscores=True)
+            
+            flagged = []
+            for member, count in entries:
+                details = json.loads(member)
+                flagged.append({**details, 'count': int(count)})
+            return flagged
+            
+        except Exception as e:
+            self.logger.error(f"Velocity flagged read error: {str(e)}")
+            return []
+    
+    def get_metrics(self) -> Dict:
+        """Get velocity service metrics"""
+        return {
+            **self.metrics,
+            'sketch_counters_max': self._get_counter_bound(),
+            'last_updated': datetime.now().isoformat()
+        }
+    
+    # Helper Methods
+    def _get_identifiers(self, application: Dict) -> Dict[str, str]:
+        """Normalized identifier per dimension (missing ones are skipped)"""
+        email = str(application.get('email') or '').strip().lower()
+        phone = ''.join(char for char in str(application.get('phone') or '') if char.isdigit())[-10:]
+        
+        identifiers = {
+            'ip': str(application.get('ip_address') or '').strip(),
+            'device': str(application.get('device_id') or application.get('device_fingerprint') or '').strip(),
+            'email': email if '@' in email else '',
+            'email_domain': email.rsplit('@', 1)[1] if '@' in email else '',
+            'phone': phone
+        }
+        return {dimension: value for dimension, value in identifiers.items() if value}
+    
+    def _get_sketch_fields(self, value: str) -> List[str]:
+        """One counter per sketch row for a value"""
+        width = self.config['sketch_width']
+        depth = self.config['sketch_depth']
+        digest = hashlib.blake2b(value.encode(), digest_size=8 * depth).digest()
+        return [str(row * width + int.from_bytes(digest[row * 8:(row + 1) * 8], 'big') % width) for row in range(depth)]
+    
+    def _roll_sketch(self, pipe, dimension: str, window: str, oldest: int, bucket_count: int):
+        """Queue the subtraction of buckets that left the window from its rolling sketch"""
+        if self.roll_script is None:
+            self.roll_script = self.redis_manager.redis_client.register_script(ROLL_SKETCH_SCRIPT)
+        
+        # Every read and record rolls, so at most a window (plus one bucket) of departed buckets
+        # can be pending; older ones left before the rolling sketch last expired
+        first = oldest - bucket_count - 1
+        keys = [self._build_key(f"cms:{dimension}:{window}")] + \
+            [self._build_key(f"cms:{dimension}:{window}:{bucket}") for bucket in range(first, oldest)]
+        self.roll_script(keys=keys, args=[first, oldest], client=pipe)
+    
+    def _get_window_buckets(self, now: float) -> Dict[str, List[int]]:
+        """Live bucket indexes per window"""
+        buckets = {}
+        for window, (span, bucket_seconds) in self.config['windows'].items():
+            current = int(now // bucket_seconds)
+            buckets[window] = list(range(current - span // bucket_seconds + 1, current + 1))
+        return buckets
+    
+    def _flag_if_over_threshold(self, identifiers: Dict[str, str], features: Dict[str, float]):
+        """Remember identifiers at or above a threshold (bounded sorted set)"""
+        flagged = {}
+        for dimension, windows in self.config['thresholds'].items():
+            if dimension not in identifiers:
+                continue
+            for window, threshold in windows.items():
+                count = features.get(f"{dimension}_count_{window}", 0.0)
+                if count >= threshold:
+                    member = json.dumps({'dimension': dimension, 'value': identifiers[dimension], 'window': window,
+                                         'threshold': threshold}, sort_keys=True)
+                    flagged[member] = count
+        
+        if not flagged:
+            return
+        
+        key = self._build_key('flagged')
+        pipe = self.redis_manager.redis_client.pipeline(transaction=False)
+        pipe.zadd(key, flagged)
+        pipe.zremrangebyrank(key, 0, -self.config['flagged_max'] - 1)
+        pipe.expire(key, self.config['flagged_ttl'])
+        pipe.execute()
+        self.metrics['flagged'] += len(flagged)
+    
+    def _get_counter_bound(self) -> int:
+        """Most sketch counters that can exist in Redis, whatever the traffic"""
+        counters = self.config['sketch_width'] * self.config['sketch_depth']
+        # Buckets kept for up to two spans, plus one rolling sketch per window
+        buckets = sum(2 * span // bucket_seconds + 2 for span, bucket_seconds in self.config['windows'].values())
+        return counters * buckets * len(self.DIMENSIONS)
+    
+    def _build_key(self, key: str) -> str:
+        """Full Redis key (one hash tag keeps multi-key reads on one shard)"""
+        return self.redis_manager._build_key(f"velocity:{{velocity}}:{key}")
+
+if __name__ == "__main__":
+    # Example usage and testing
+    import os
+    import sys
+    
+    # Add the backend directory to Python path
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from cache.redis_manager import RedisManager
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    redis_manager = RedisManager()
+    redis_manager.initialize()
+    
+    velocity = VelocityFeatureService(redis_manager)
+    for i in range(6):
+        features = velocity.record({'ip_address': '203.0.113.7', 'email': f"applicant{i}@example.com",
+                                    'phone': '555-010-0000', 'device_id': f"device-{i % 2}"})
+    
+    print(features)
+    print(f"Velocity risk: {velocity.calculate_velocity_risk(features):.2f}")
+    print(velocity.get_flagged())
+    print(velocity.get_metrics())
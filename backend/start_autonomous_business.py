@@ -57,7 +57,7 @@ class AutonomousBusinessSystem:
             
             # Initialize AI services
             self.ai_services = AIServiceManager()
-            self.ai_services.initialize()
+            self.ai_services.initialize(self.redis_manager, self.db_manager)
             
             # Initialize business services
             self.business_services = BusinessServiceManager()
@@ -91,7 +91,7 @@ class AutonomousBusinessSystem:
             self.redis_manager.set('autonomous_system_status', 'running')
             self.redis_manager.set('autonomous_system_start_time', datetime.now().isoformat())
             
-            # Start the autonomous controller
+            # Start the autonomous controller (its scheduler also runs daily operations at 06:00)
             self.controller.start()
             
             # Start monitoring thread
@@ -99,11 +99,6 @@ class AutonomousBusinessSystem:
             monitor_thread.daemon = True
             monitor_thread.start()
             
-            # Start daily operations scheduler
-            scheduler_thread = threading.Thread(target=self._daily_operations_scheduler)
-            scheduler_thread.daemon = True
-            scheduler_thread.start()
-            
             self.running = True
             self.logger.info("Autonomous Business System started successfully")
             
@@ -167,27 +162,6 @@ class AutonomousBusinessSystem:
                 self.logger.error(f"Monitoring error: {str(e)}")
                 time.sleep(60)
     
-    def _daily_operations_scheduler(self):
-        """Schedule and run daily operations at 6 AM"""
-        while self.running and not self.shutdown_event.is_set():
-            try:
-                now = datetime.now()
-                # Check if it's 6 AM and we haven't run today
-                if now.hour == 6 and now.minute == 0:
-                    last_run = self.redis_manager.get('last_daily_operations')
-                    today = now.date().isoformat()
-                    
-                    if not last_run or last_run != today:
-                        self.logger.info("Starting daily operations...")
-                        self.controller.run_daily_operations()
-                        self.redis_manager.set('last_daily_operations', today)
-                
-                time.sleep(60)  # Check every minute
-                
-            except Exception as e:
-                self.logger.error(f"Daily operations scheduler error: {str(e)}")
-                time.sleep(60)
-    
     def _check_system_alerts(self, metrics):
         """Check for system alerts and admin intervention requirements"""
         alerts = []
@@ -0,0 +1,702 @@
+#!/usr/bin/env python3
+"""
+Job Worker Runtime
+LoanFlow Personal Loan Management System
+
+This module consumes RedisManager job queues including:
+- Worker process pool supervision
+- In-process worker threads for handlers that share the caller's services
+- Thread or asyncio concurrency inside each process
+- Prefetching and batched acknowledgement of in-flight jobs
+- Per-job timeouts with retry and dead letter handling
+- Routing by job type to registered handlers
+- Graceful drain on SIGTERM
+- Throughput, latency and failure metrics
+"""
+
+import asyncio
+import inspect
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Callable
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache.redis_manager import RedisManager
+
+class JobWorker:
+    """Single worker process consuming jobs from Redis queues"""
+    
+    def __init__(self, worker_id: str, queues: List[str], handlers: Dict[str, Callable], config: Dict, redis_manager=None):
+        self.logger = logging.getLogger(__name__)
+        self.worker_id = worker_id
+        self.queues = queues
+        self.handlers = handlers
+        self.config = config
+        self.redis_manager = redis_manager
+        self.status = 'initializing'
+        self.lock = threading.Lock()
+        self.draining = threading.Event()
+        
+        # Prefetched jobs waiting for a free slot
+        self.prefetched = queue.Queue(maxsize=max(1, config['prefetch']))
+        
+        # In-flight tracking and batched acknowledgement (claimed values by job id),
+        # one processing list per queue name under processing_key
+        self.processing_key = f"queue:processing:{worker_id}"
+        self.claimed_values = {}
+        self.running_jobs = {}
+        self.timed_out_jobs = set()
+        self.pending_acks = []
+        self.last_ack_flush = time.time()
+        self.last_heartbeat = 0.0
+        
+        # Worker metrics
+        self.metrics = {
+            'jobs_received': 0,
+            'jobs_completed': 0,
+            'jobs_failed': 0,
+            'jobs_timed_out': 0,
+            'jobs_unroutable': 0,
+            'jobs_returned': 0,
+            'acks_flushed': 0,
+            'total_latency': 0.0,
+            'max_latency': 0.0,
+            'started_at': datetime.now().isoformat()
+        }
+        self.latencies = deque(maxlen=1000)
+        self.type_counts = {}
+    
+    def run(self):
+        """Run worker until drained"""
+        # In-process workers run on a thread and are drained through stop()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self._handle_shutdown_signal)
+            signal.signal(signal.SIGINT, self._handle_shutdown_signal)
+        
+        try:
+            if self.redis_manager is None:
+                self.redis_manager = RedisManager()
+                self.redis_manager.initialize()
+            
+            self.status = 'running'
+            self.logger.info(f"Job worker {self.worker_id} started ({self.config['concurrency_mode']} x {self.config['concurrency']})")
+            
+            fetcher = threading.Thread(target=self._prefetch_loop, daemon=True)
+            fetcher.start()
+            
+            if self.config['concurrency_mode'] == 'async':
+                asyncio.run(self._run_async())
+            else:
+                self._run_threaded()
+            
+            fetcher.join(timeout=self.config['poll_timeout'] + 5)
+            
+            # Hand unstarted jobs back to the queue for other workers
+            self._return_prefetched_jobs()
+            self._flush_acks(force=True)
+            self._publish_heartbeat()
+            
+            self.status = 'stopped'
+            self.logger.info(f"Job worker {self.worker_id} drained and stopped")
+            
+        except Exception as e:
+            self.logger.error(f"Job worker {self.worker_id} error: {str(e)}")
+            self.status = 'error'
+            raise
+    
+    def stop(self):
+        """Stop fetching new jobs and drain in-flight work"""
+        self.draining.set()
+    
+    def get_metrics(self) -> Dict:
+        """Get worker performance metrics"""
+        with self.lock:
+            latencies = sorted(self.latencies)
+            metrics = {**self.metrics, 'jobs_by_type': dict(self.type_counts)}
+        
+        finished = metrics['jobs_completed'] + metrics['jobs_failed']
+        uptime = (datetime.now() - datetime.fromisoformat(metrics['started_at'])).total_seconds()
+        
+        return {
+            **metrics,
+            'worker_id': self.worker_id,
+            'status': self.status,
+            'in_flight': len(self.running_jobs),
+            'prefetched': self.prefetched.qsize(),
+            'avg_latency': round(metrics['total_latency'] / finished, 4) if finished else 0,
+            'p95_latency': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 4) if latencies else 0,
+            'throughput_per_second': round(finished / uptime, 3) if uptime > 0 else 0,
+            'last_updated': datetime.now().isoformat()
+        }
+    
+    # Fetching
+    def _prefetch_loop(self):
+        """Fetch jobs ahead of execution up to the prefetch limit"""
+        while not self.draining.is_set():
+            try:
+                self._maybe_publish_heartbeat()
+                
+                if self.prefetched.full():
+                    time.sleep(0.05)
+                    continue
+                
+                # Dequeued straight into this worker's processing list, so a crash cannot lose the job
+                claimed = self.redis_manager.claim_job(self.queues, self.processing_key, timeout=self.config['poll_timeout'])
+                if claimed is None:
+                    continue
+                
+                job, value = claimed
+                with self.lock:
+                    self.claimed_values[job['id']] = value
+                    self.metrics['jobs_received'] += 1
+                
+                if self.draining.is_set():
+                    self._return_job(job)
+                    break
+                
+                self.prefetched.put(job)
+                
+            except Exception as e:
+                self.logger.error(f"Job prefetch error: {str(e)}")
+                time.sleep(1)
+    
+    def _get_prefetched_job(self, timeout: float) -> Optional[Dict]:
+        """Get next prefetched job"""
+        try:
+            return self.prefetched.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    # Thread concurrency
+    def _run_threaded(self):
+        """Execute jobs on a bounded thread pool"""
+        executor = ThreadPoolExecutor(max_workers=self.config['concurrency'], thread_name_prefix=f"job-{self.worker_id}")
+        slots = threading.Semaphore(self.config['concurrency'])
+        
+        try:
+            while not self.draining.is_set():
+                self._check_job_timeouts()
+                self._flush_acks()
+                
+                if not slots.acquire(timeout=0.5):
+                    continue
+                
+                job = self._get_prefetched_job(0.5)
+                if job is None:
+                    slots.release()
+                    continue
+                
+                # Timeout clock starts at submission; slots keep queueing negligible
+                with self.lock:
+                    self.running_jobs[job['id']] = (time.time(), job)
+                
+                future = executor.submit(self._execute_job, job)
+                future.add_done_callback(lambda _: slots.release())
+            
+            # Wait for in-flight jobs, still reporting timeouts
+            while self.running_jobs:
+                self._check_job_timeouts()
+                self._flush_acks()
+                time.sleep(0.1)
+        
+        finally:
+            executor.shutdown(wait=False)
+    
+    def _execute_job(self, job: Dict):
+        """Execute job handler in a pool thread"""
+        handler = self._route_job(job)
+        if handler is None:
+            self._release_running_job(job)
+            return
+        
+        start_time = time.time()
+        
+        try:
+            handler(job)
+            self._release_running_job(job)
+            self._complete_job(job, time.time() - start_time)
+                
+        except Exception as e:
+            self._release_running_job(job)
+            self._fail_job(job, str(e))
+    
+    def _check_job_timeouts(self):
+        """Report jobs that exceeded their timeout (once per job)"""
+        now = time.time()
+        with self.lock:
+            expired = [
+                job for start_time, job in self.running_jobs.values()
+                if now - start_time > self._get_job_timeout(job) and job['id'] not in self.timed_out_jobs
+            ]
+            self.timed_out_jobs.update(job['id'] for job in expired)
+        
+        # Threads cannot be interrupted: a timed out job stays claimed, and is only retried
+        # once its handler returns, so it never runs twice at the same time
+        for job in expired:
+            self._record_job_timeout(job)
+    
+    def _release_running_job(self, job: Dict):
+        """Remove job from running set"""
+        with self.lock:
+            self.running_jobs.pop(job['id'], None)
+            self.timed_out_jobs.discard(job['id'])
+    
+    # Async concurrency
+    async def _run_async(self):
+        """Execute jobs as asyncio tasks bounded by a semaphore"""
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.config['concurrency']))
+        fetch_executor = ThreadPoolExecutor(max_workers=1)
+        semaphore = asyncio.Semaphore(self.config['concurrency'])
+        tasks = set()
+        
+        try:
+            while not self.draining.is_set():
+                self._flush_acks()
+                await semaphore.acquire()
+                
+                job = await loop.run_in_executor(fetch_executor, self._get_prefetched_job, 0.5)
+                if job is None:
+                    semaphore.release()
+                    continue
+                
+                task = asyncio.create_task(self._execute_job_async(job))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: semaphore.release())
+            
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        
+        finally:
+            fetch_executor.shutdown(wait=False)
+    
+    async def _execute_job_async(self, job: Dict):
+        """Execute job handler with a cancellable timeout"""
+        handler = self._route_job(job)
+        if handler is None:
+            return
+        
+        start_time = time.time()
+        timeout = self._get_job_timeout(job)
+        
+        try:
+            if inspect.iscoroutinefunction(handler):
+                await asyncio.wait_for(handler(job), timeout)
+            else:
+                # Executor threads cannot be cancelled, so the job stays claimed until the handler returns
+                future = asyncio.get_running_loop().run_in_executor(None, handler, job)
+                done, _ = await asyncio.wait([future], timeout=timeout)
+                if not done:
+                    self._record_job_timeout(job)
+                await future
+            
+            self._complete_job(job, time.time() - start_time)
+            
+        except asyncio.TimeoutError:
+            self._fail_job(job, 'Job timed out', timed_out=True)
+        except Exception as e:
+            self._fail_job(job, str(e))
+    
+    # Job outcome handling
+    def _route_job(self, job: Dict) -> Optional[Callable]:
+        """Find handler for job type"""
+        job_type = self._get_job_type(job)
+        handler = self.handlers.get(job_type) or self.handlers.get('*')
+        
+        if handler is None:
+            self.logger.error(f"No handler registered for job type '{job_type}' (job {job['id']})")
+            with self.lock:
+                self.metrics['jobs_unroutable'] += 1
+            self.redis_manager._move_to_dead_letter_queue(job)
+            self._ack(job)
+        
+        return handler
+    
+    def _complete_job(self, job: Dict, latency: float):
+        """Record successful job"""
+        with self.lock:
+            self.metrics['jobs_completed'] += 1
+            self.metrics['total_latency'] += latency
+            self.metrics['max_latency'] = max(self.metrics['max_latency'], latency)
+            self.latencies.append(latency)
+            job_type = self._get_job_type(job)
+            self.type_counts[job_type] = self.type_counts.get(job_type, 0) + 1
+        
+        self._ack(job)
+    
+    def _fail_job(self, job: Dict, error: str, timed_out: bool = False):
+        """Record failed job and schedule retry"""
+        self.logger.error(f"Job {job['id']} failed: {error}")
+        
+        with self.lock:
+            self.metrics['jobs_failed'] += 1
+            if timed_out:
+                self.metrics['jobs_timed_out'] += 1
+        
+        job['last_error'] = error
+        self.redis_manager.requeue_job(job)
+        self._ack(job)
+    
+    def _return_job(self, job: Dict):
+        """Put an unstarted job back at the head of its queue"""
+        with self.lock:
+            value = self.claimed_values.pop(job['id'], None)
+            self.metrics['jobs_returned'] += 1
+        
+        if value is not None:
+            self.redis_manager.return_job(self.processing_key, job, value)
+    
+    def _return_prefetched_jobs(self):
+        """Return all prefetched jobs that were never started"""
+        while True:
+            job = self._get_prefetched_job(0)
+            if job is None:
+                break
+            self._return_job(job)
+    
+    def _ack(self, job: Dict):
+        """Queue acknowledgement for the next batch flush"""
+        with self.lock:
+            value = self.claimed_values.pop(job['id'], None)
+            if value is not None:
+                self.pending_acks.append((job, value))
+        self._flush_acks()
+    
+    def _flush_acks(self, force: bool = False):
+        """Remove acknowledged jobs from the processing list in one round trip"""
+        with self.lock:
+            due = time.time() - self.last_ack_flush >= self.config['ack_interval']
+            if not self.pending_acks or not (force or due or len(self.pending_acks) >= self.config['ack_batch_size']):
+                return
+            
+            claimed = self.pending_acks
+            self.pending_acks = []
+            self.last_ack_flush = time.time()
+            self.metrics['acks_flushed'] += len(claimed)
+        
+        self.redis_manager.ack_jobs(self.processing_key, claimed)
+    
+    # Helper Methods
+    def _get_job_type(self, job: Dict) -> str:
+        """Get routing type for job"""
+        data = job.get('data')
+        if isinstance(data, dict) and data.get('type'):
+            return data['type']
+        return job.get('type', job.get('queue', 'default'))
+    
+    def _get_job_timeout(self, job: Dict) -> float:
+        """Get timeout for job type"""
+        return self.config['job_timeouts'].get(self._get_job_type(job), self.config['job_timeout'])
+    
+    def _record_job_timeout(self, job: Dict):
+        """Count and log a job still running past its timeout"""
+        with self.lock:
+            self.metrics['jobs_timed_out'] += 1
+        self.logger.error(f"Job {job['id']} exceeded its {self._get_job_timeout(job)}s timeout, waiting for its handler")
+    
+    def _maybe_publish_heartbeat(self):
+        """Publish heartbeat and metrics at the configured interval"""
+        if time.time() - self.last_heartbeat >= self.config['heartbeat_interval']:
+            self._publish_heartbeat()
+    
+    def _publish_heartbeat(self):
+        """Publish worker heartbeat with metrics snapshot"""
+        try:
+            self.last_heartbeat = time.time()
+            self.redis_manager.set(
+                f"worker:{self.worker_id}",
+                self.get_metrics(),
+                int(self.config['heartbeat_interval'] * 3)
+            )
+        except Exception as e:
+            self.logger.error(f"Worker heartbeat error: {str(e)}")
+    
+    def _handle_shutdown_signal(self, signum, frame):
+        """Handle SIGTERM/SIGINT by draining"""
+        self.logger.info(f"Job worker {self.worker_id} received signal {signum}, draining...")
+        self.stop()
+
+def _run_worker_process(worker_id: str, queues: List[str], handlers: Dict[str, Callable], config: Dict):
+    """Entry point for worker processes"""
+    worker = JobWorker(worker_id, queues, handlers, config)
+    worker.run()
+
+class JobWorkerManager:
+    """Supervises a pool of job worker processes"""
+    
+    def __init__(self, redis_manager, config: Dict = None):
+        self.logger = logging.getLogger(__name__)
+        self.redis_manager = redis_manager
+        self.handlers = {}
+        self.processes = {}
+        self.workers = {}  # In-process workers by id
+        self.status = 'initializing'
+        self.running = False
+        self.supervisor_thread = None
+        
+        # Worker configuration
+        self.config = {
+            # No default: a pool must only consume queues it has handlers for
+            'queues': [queue_name for queue_name in os.getenv('JOB_WORKER_QUEUES', '').split(',') if queue_name],
+            'processes': int(os.getenv('JOB_WORKER_PROCESSES', str(os.cpu_count() or 2))),
+            'concurrency_mode': os.getenv('JOB_WORKER_MODE', 'thread'),  # thread or async
+            'concurrency': int(os.getenv('JOB_WORKER_CONCURRENCY', '4')),
+            'prefetch': 8,
+            'ack_batch_size': 20,
+            'ack_interval': 1.0,  # seconds
+            'job_timeout': 300,  # seconds
+            'job_timeouts': {},  # Per job type overrides
+            'poll_timeout': 1,  # seconds
+            'heartbeat_interval': 5,  # seconds
+            'drain_timeout': 30,  # seconds
+            'maintenance_interval': 5,  # seconds
+            # 'thread' runs workers inside this process, sharing its services; fork is avoided
+            # because the supervisor process already runs threads
+            'start_method': 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        }
+        self.config.update(config or {})
+        
+        self.context = None
+        if self.config['start_method'] != 'thread':
+            self.context = multiprocessing.get_context(self.config['start_method'])
+    
+    def register_handler(self, job_type: str, handler: Callable):
+        """Register handler for a job type ('*' matches any type)"""
+        self.handlers[job_type] = handler
+        self.logger.info(f"Registered job handler for '{job_type}'")
+    
+    def start(self):
+        """Start worker processes and supervisor"""
+        try:
+            if not self.config['queues']:
+                raise ValueError("No job queues configured")
+            
+            self.logger.info(f"Starting {self.config['processes']} job worker processes...")
+            self.running = True
+            
+            # Requeue jobs left behind by workers that died
+            self.recover_orphaned_jobs()
+            
+            for index in range(self.config['processes']):
+                self._spawn_worker(index)
+            
+            self.supervisor_thread = threading.Thread(target=self._supervise, daemon=True)
+            self.supervisor_thread.start()
+            
+            self.status = 'healthy'
+            self.logger.info("Job worker pool started")
+            
+        except Exception as e:
+            self.logger.error(f"Job worker pool start failed: {str(e)}")
+            self.status = 'error'
+            raise
+    
+    def stop(self):
+        """Drain worker processes, terminating any that exceed the drain timeout"""
+        self.logger.info("Draining job worker pool...")
+        self.running = False
+        
+        # SIGTERM asks each worker process to drain; in-process workers are asked directly
+        for worker_id, process in self.processes.items():
+            if worker_id in self.workers:
+                self.workers[worker_id].stop()
+            elif process.is_alive():
+                process.terminate()
+        
+        deadline = time.time() + self.config['drain_timeout']
+        for worker_id, process in self.processes.items():
+            process.join(timeout=max(0, deadline - time.time()))
+            if process.is_alive():
+                if worker_id in self.workers:
+                    # Threads cannot be killed; their jobs are recovered once the heartbeat expires
+                    self.logger.warning(f"Job worker {worker_id} did not drain in time")
+                    continue
+                self.logger.warning(f"Job worker {worker_id} did not drain in time, killing")
+                process.kill()
+                process.join(timeout=5)
+                self.redis_manager.delete(f"worker:{worker_id}")
+        
+        # Jobs of terminated workers go back to their queues
+        self.recover_orphaned_jobs()
+        
+        self.status = 'stopped'
+        self.logger.info("Job worker pool stopped")
+    
+    def run_forever(self):
+        """Run pool in the foreground until SIGTERM/SIGINT"""
+        shutdown_event = threading.Event()
+        
+        def handle_signal(signum, frame):
+            shutdown_event.set()
+        
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGINT, handle_signal)
+        
+        self.start()
+        while not shutdown_event.is_set():
+            shutdown_event.wait(1)
+        self.stop()
+    
+    def get_status(self) -> str:
+        """Get worker pool status"""
+        return self.status
+    
+    def get_metrics(self) -> Dict:
+        """Get aggregated throughput, latency and failure metrics"""
+        try:
+            workers = {}
+            for worker_id in self.processes:
+                snapshot = self.redis_manager.get(f"worker:{worker_id}")
+                if snapshot:
+                    workers[worker_id] = snapshot
+            
+            totals = {
+                'jobs_received': 0,
+                'jobs_completed': 0,
+                'jobs_failed': 0,
+                'jobs_timed_out': 0,
+                'jobs_unroutable': 0,
+                'jobs_returned': 0,
+                'in_flight': 0,
+                'throughput_per_second': 0.0
+            }
+            total_latency = 0.0
+            for snapshot in workers.values():
+                for key in totals:
+                    totals[key] += snapshot.get(key, 0)
+                total_latency += snapshot.get('total_latency', 0.0)
+            
+            finished = totals['jobs_completed'] + totals['jobs_failed']
+            
+            return {
+                **totals,
+                'avg_latency': round(total_latency / finished, 4) if finished else 0,
+                'failure_rate': round(totals['jobs_failed'] / finished, 4) if finished else 0,
+                'processes_alive': sum(1 for p in self.processes.values() if p.is_alive()),
+                'workers': workers,
+                'status': self.status,
+                'last_updated': datetime.now().isoformat()
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Worker metrics error: {str(e)}")
+            return {'error': str(e)}
+    
+    def recover_orphaned_jobs(self) -> int:
+        """Requeue in-flight jobs of workers whose heartbeat has expired"""
+        try:
+            recovered = 0
+            prefix = self.redis_manager._build_key('queue:processing:')
+            
+            for full_key in self.redis_manager.redis_client.scan_iter(match=f"{prefix}*"):
+                # Keys are queue:processing:<worker_id>:{<queue_name>}
+                suffix = full_key[len(prefix):]
+                tagged = suffix.endswith('}') and ':{' in suffix
+                worker_id = suffix.rpartition(':{')[0] if tagged else suffix
+                if self.redis_manager.exists(f"worker:{worker_id}"):
+                    continue
+                
+                # Each job is moved back atomically, so concurrent recoveries cannot duplicate it
+                processing_key = f"queue:processing:{worker_id}"
+                for value in self.redis_manager.redis_client.lrange(full_key, 0, -1):
+                    job = self.redis_manager._deserialize_value(value)
+                    if not isinstance(job, dict):
+                        continue
+                    if tagged:
+                        recovered += self.redis_manager.return_job(processing_key, job, value)
+                    elif self.redis_manager.redis_client.lrem(full_key, 1, value):
+                        # Untagged list from before per-queue processing lists
+                        self.redis_manager.redis_client.rpush(self.redis_manager._build_key(
+                            self.redis_manager._build_queue_key(job.get('priority', 'normal'), job['queue'])), value)
+                        recovered += 1
+            
+            if recovered:
+                self.logger.warning(f"Recovered {recovered} orphaned jobs")
+            
+            return recovered
+            
+        except Exception as e:
+            self.logger.error(f"Orphaned job recovery error: {str(e)}")
+            return 0
+    
+    # Helper Methods
+    def _spawn_worker(self, index: int):
+        """Start a worker process (or thread for in-process workers)"""
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}:{int(time.time())}"
+        if self.context is None:
+            worker = JobWorker(worker_id, self.config['queues'], self.handlers, self.config, self.redis_manager)
+            process = threading.Thread(target=worker.run, name=f"job-worker-{index}", daemon=True)
+            self.workers[worker_id] = worker
+        else:
+            process = self.context.Process(
+                target=_run_worker_process,
+                args=(worker_id, self.config['queues'], self.handlers, self.config),
+                name=f"job-worker-{index}",
+                daemon=False
+            )
+        process.start()
+        self.processes[worker_id] = process
+    
+    def _supervise(self):
+        """Restart crashed workers and release due retries"""
+        while self.running:
+            try:
+                for worker_id, process in list(self.processes.items()):
+                    if not process.is_alive() and self.running:
+                        self.logger.warning(f"Job worker {worker_id} exited with code {getattr(process, 'exitcode', None)}, restarting")
+                        del self.processes[worker_id]
+                        self.workers.pop(worker_id, None)
+                        self._spawn_worker(len(self.processes))
+                
+                for queue_name in self.config['queues']:
+                    self.redis_manager.release_delayed_jobs(queue_name)
+                
+                self.recover_orphaned_jobs()
+                
+                time.sleep(self.config['maintenance_interval'])
+                
+            except Exception as e:
+                self.logger.error(f"Worker supervision error: {str(e)}")
+                time.sleep(self.config['maintenance_interval'])
+
+def _log_example_job(job: Dict):
+    """Example handler (module level so forkserver/spawn workers can import it)"""
+    logging.getLogger(__name__).info(f"Processed job {job['id']}: {job.get('data')}")
+
+if __name__ == "__main__":
+    # Example usage and testing
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(processName)s - %(levelname)s - %(message)s'
+    )
+    
+    redis_manager = RedisManager()
+    
+    try:
+        redis_manager.initialize()
+        
+        # Example queue only; loan processing jobs are consumed by the autonomous controller
+        manager = JobWorkerManager(redis_manager, {'queues': ['job_worker_example']})
+        manager.register_handler('*', _log_example_job)
+        redis_manager.enqueue_job('job_worker_example', {'type': 'example', 'message': 'hello'})
+        manager.run_forever()
+        
+    except Exception as e:
+        print(f"Job worker pool failed: {str(e)}")
+        sys.exit(1)
+    
+    finally:
+        redis_manager.shutdown()